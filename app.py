@@ -1,5 +1,6 @@
 # app.py
 import streamlit as st
+import profiling
 
 st.set_page_config(
     page_title="KeepGoing",
@@ -24,7 +25,14 @@ pages = [
     st.Page("pages/add_sport.py", title="➕ Ajouter un sport"),
     st.Page("pages/add_performance.py", title="🎯 Nouvelle performance"),
     st.Page("pages/analytics.py", title="📈 Analyse détaillée"),
+    st.Page("pages/import_data.py", title="📥 Importer des données"),
 ]
 
 pg = st.navigation(pages, position="top")
+
+# Profilage optionnel des reruns (panneau dans la sidebar et/ou lignes de log JSON)
+debug = st.secrets.get("debug", {})
+if debug.get("profiling") or debug.get("profiling_log"):
+    profiling.begin_rerun(pg.title, panel=bool(debug.get("profiling")), log=bool(debug.get("profiling_log")))
+
 pg.run()
\ No newline at end of file
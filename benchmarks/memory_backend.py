@@ -0,0 +1,43 @@
+# benchmarks/memory_backend.py
+import time
+from series import EntrySeries
+from storage import StorageBackend
+
+
+class MemoryBackend(StorageBackend):
+    """Backend en mémoire remplaçant Supabase pour les benchmarks.
+
+    latency simule le temps d'aller-retour réseau (secondes par appel) ; calls compte les appels.
+    """
+
+    def __init__(self, accounts=None, latency=0.0):
+        self.accounts = accounts or {}
+        self.latency = latency
+        self.calls = 0
+
+    def _call(self):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def load_sports(self, user_email, sport_name=None, start=None, end=None):
+        self._call()
+        sports = self.accounts.get(user_email, {})
+        names = [sport_name] if sport_name is not None else list(sports)
+        return {
+            name: {**sports[name], "entries": sports[name]["entries"].between(start, end)}
+            for name in names if name in sports
+        }
+
+    def save_sport(self, user_email, sport_name, unit, goal=None):
+        self._call()
+        self.accounts.setdefault(user_email, {})[sport_name] = {"unit": unit, "entries": EntrySeries(), "goal": goal}
+
+    def update_entries(self, user_email, sport_name, series):
+        self._call()
+        self.accounts[user_email][sport_name]["entries"] = series
+
+    def apply_changes(self, user_email, sport_name, upserts, deletions=(), current=None):
+        self._call()
+        sport = self.accounts[user_email][sport_name]
+        sport["entries"] = sport["entries"].with_changes(upserts, deletions)
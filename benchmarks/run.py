@@ -0,0 +1,253 @@
+# benchmarks/run.py
+"""Benchmarks des utilitaires et des pages sur des comptes synthétiques.
+
+Utilisation (depuis la racine du dépôt) :
+
+    python -m benchmarks.run                              # matrice complète, JSON sur la sortie standard
+    python -m benchmarks.run --quick --output avant.json
+    python -m benchmarks.run --compare avant.json apres.json
+
+Le stockage est remplacé par un backend en mémoire : aucune connexion Supabase n'est nécessaire.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+import streamlit
+from streamlit.testing.v1 import AppTest
+
+import utils
+from benchmarks.memory_backend import MemoryBackend
+from benchmarks.synthetic import BENCH_USER, generate_account
+
+SPORTS = [1, 10, 50]
+ENTRIES = [10, 1_000, 100_000]
+QUICK_SPORTS = [1, 10]
+QUICK_ENTRIES = [10, 1_000]
+
+PAGES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "pages")
+
+ANALYTICS_VIEWS = ["Sport individuel", "Comparaison globale", "Gestion des données"]
+
+
+def measure(fn, repeat):
+    """Mesure fn : pic mémoire sur une exécution tracée, puis temps sur repeat exécutions non tracées."""
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) * 1000)
+
+    return {
+        "wall_ms": {"min": min(times), "median": statistics.median(times), "max": max(times)},
+        "peak_kib": peak / 1024,
+        "runs": repeat
+    }
+
+
+def _utility_script():
+    """Script AppTest : exécute une fonction de utils dans un vrai contexte Streamlit."""
+    import time
+    import streamlit as st
+    import utils
+
+    data = utils.load_user_sports()
+    target = st.session_state["bench_target"]
+    cold = st.session_state["bench_cold"]
+
+    start = time.perf_counter()
+    if cold:
+        # Vide les mémoïsations pour mesurer le calcul complet
+        st.session_state["_sports_cache"]["summaries"].clear()
+        st.session_state["_sports_cache"].pop("rollups", None)
+    if target == "render_sidebar":
+        utils.render_sidebar(data)
+    else:
+        for period in ("week", "month", "year"):
+            utils.get_activity_by_period(data, period)
+    st.session_state["bench_ms"] = (time.perf_counter() - start) * 1000
+
+
+def bench_utilities(data, repeat):
+    """Mesure les utilitaires purs sur toutes les séries du compte."""
+    series = [s["entries"] for s in data.values()]
+    cases = {
+        "calculate_stats": lambda: [utils.calculate_stats(s) for s in series],
+        "calculate_streak": lambda: [utils.calculate_streak(s) for s in series],
+        "summarize_entries": lambda: [utils.summarize_entries(s) for s in series],
+        "compute_activity_rollups": lambda: utils.compute_activity_rollups(data)
+    }
+    return {name: measure(fn, repeat) for name, fn in cases.items()}
+
+
+def bench_in_context(backend, repeat):
+    """Mesure render_sidebar et get_activity_by_period dans une session AppTest (calcul complet et mémoïsé),
+    avec les appels au stockage des reruns mesurés."""
+    results = {}
+    for target in ("render_sidebar", "get_activity_by_period"):
+        for cold in (True, False):
+            at = AppTest.from_function(_utility_script, default_timeout=600)
+            at.session_state["bench_target"] = target
+            at.session_state["bench_cold"] = cold
+            at.run()
+
+            times = []
+            calls_before = backend.calls
+            for _ in range(repeat):
+                at.run()
+                times.append(at.session_state["bench_ms"])
+
+            results[f"{target}[{'cold' if cold else 'memoized'}]"] = {
+                "wall_ms": {"min": min(times), "median": statistics.median(times), "max": max(times)},
+                "backend_calls": backend.calls - calls_before,
+                "runs": repeat
+            }
+    return results
+
+
+def bench_pages(backend, repeat):
+    """Mesure l'exécution complète des pages : premier chargement puis reruns (cache de session chaud)."""
+    pages = [("dashboard", None)] + [("analytics", view) for view in ANALYTICS_VIEWS]
+    results = {}
+
+    for page, view in pages:
+        name = f"page:{page}" + (f"[{view}]" if view else "")
+        at = AppTest.from_file(os.path.join(PAGES_DIR, f"{page}.py"), default_timeout=600)
+        calls_before = backend.calls
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        at.run()
+        if view is not None:
+            at.radio[0].set_value(view).run()
+        first_ms = (time.perf_counter() - start) * 1000
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        if at.exception:
+            raise RuntimeError(f"{name} : {at.exception[0].value}")
+
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            at.run()
+            times.append((time.perf_counter() - start) * 1000)
+
+        results[name] = {
+            "first_run_ms": first_ms,
+            "wall_ms": {"min": min(times), "median": statistics.median(times), "max": max(times)},
+            "peak_kib": peak / 1024,
+            "backend_calls": backend.calls - calls_before,
+            "runs": repeat
+        }
+    return results
+
+
+def run(sports_sizes, entry_sizes, repeat, seed):
+    """Exécute la matrice de benchmarks et retourne le document de résultats."""
+    results = []
+    for n_sports in sports_sizes:
+        for n_entries in entry_sizes:
+            if n_entries < n_sports:
+                continue
+
+            data = generate_account(n_sports, n_entries, seed)
+            backend = MemoryBackend({BENCH_USER: data})
+            utils.get_storage = lambda: backend
+            # Écritures synchrones : pas de journal d'écritures différées
+            utils.get_write_queue = lambda: None
+            # Backend en mémoire : ni vérification de fraîcheur, ni cache partagé, ni instantanés disque
+            utils._revalidate_interval = lambda: None
+            utils.get_shared_cache = lambda: None
+            utils.get_snapshot_store = lambda: None
+
+            cases = {}
+            cases.update(bench_utilities(data, repeat))
+            cases.update(bench_in_context(backend, repeat))
+            cases.update(bench_pages(backend, repeat))
+
+            for case, measures in cases.items():
+                results.append({"case": case, "sports": n_sports, "entries": n_entries, **measures})
+            print(f"{n_sports} sport(s), {n_entries} entrées : {len(cases)} cas", file=sys.stderr)
+
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "streamlit": streamlit.__version__,
+            "repeat": repeat,
+            "seed": seed
+        },
+        "results": results
+    }
+
+
+def compare(base, current):
+    """Compare deux documents de résultats (médianes) et retourne les lignes du tableau."""
+    def key(r):
+        return r["case"], r["sports"], r["entries"]
+
+    base_results = {key(r): r for r in base["results"]}
+    rows = []
+    for r in current["results"]:
+        before = base_results.get(key(r))
+        if before is None:
+            continue
+        old, new = before["wall_ms"]["median"], r["wall_ms"]["median"]
+        rows.append({
+            "case": r["case"], "sports": r["sports"], "entries": r["entries"],
+            "base_ms": old, "current_ms": new, "ratio": new / old if old else None
+        })
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sports", type=int, nargs="+", help="Nombres de sports (défaut : 1 10 50)")
+    parser.add_argument("--entries", type=int, nargs="+", help="Nombres d'entrées (défaut : 10 1000 100000)")
+    parser.add_argument("--quick", action="store_true", help="Matrice réduite pour un contrôle rapide")
+    parser.add_argument("--repeat", type=int, default=5, help="Exécutions mesurées par cas")
+    parser.add_argument("--seed", type=int, default=0, help="Graine du générateur de comptes")
+    parser.add_argument("--output", help="Fichier JSON de sortie (défaut : sortie standard)")
+    parser.add_argument("--compare", nargs=2, metavar=("BASE", "CURRENT"), help="Compare deux fichiers de résultats")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        with open(args.compare[0]) as f_base, open(args.compare[1]) as f_current:
+            rows = compare(json.load(f_base), json.load(f_current))
+        for row in rows:
+            ratio = f"{row['ratio']:.2f}x" if row["ratio"] is not None else "-"
+            print(f"{row['case']:<50} {row['sports']:>3} sports {row['entries']:>7} entrées "
+                  f"{row['base_ms']:>10.2f} ms -> {row['current_ms']:>10.2f} ms  {ratio}")
+        return
+
+    sports_sizes = args.sports or (QUICK_SPORTS if args.quick else SPORTS)
+    entry_sizes = args.entries or (QUICK_ENTRIES if args.quick else ENTRIES)
+    document = run(sports_sizes, entry_sizes, args.repeat, args.seed)
+
+    output = json.dumps(document, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
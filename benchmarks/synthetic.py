@@ -0,0 +1,35 @@
+# benchmarks/synthetic.py
+import numpy as np
+from datetime import date
+from series import EntrySeries
+
+# Utilisateur des comptes synthétiques (celui qu'AppTest expose dans st.user)
+BENCH_USER = "test@example.com"
+
+UNITS = ["rep", "s", "km", "kg", "min"]
+
+
+def generate_account(n_sports, n_entries, seed=0, end=None):
+    """Génère un compte déterministe : n_entries performances réparties sur n_sports sports.
+
+    Chaque sport a des dates uniques (avec des jours sans séance) se terminant à end (aujourd'hui
+    par défaut) et des valeurs suivant une marche aléatoire positive.
+    """
+    rng = np.random.default_rng(seed)
+    end_day = np.datetime64(end or date.today(), "D")
+    counts = np.full(n_sports, n_entries // n_sports)
+    counts[:n_entries % n_sports] += 1
+
+    data = {}
+    for i, count in enumerate(counts):
+        count = int(count)
+        span = max(int(count * 1.3), count, 1)
+        offsets = np.sort(rng.choice(span, size=count, replace=False))[::-1]
+        values = np.maximum(50 + rng.normal(0, 2, count).cumsum(), 0.5).round(1)
+
+        data[f"Sport {i + 1:02d}"] = {
+            "unit": UNITS[i % len(UNITS)],
+            "entries": EntrySeries(end_day - offsets, values),
+            "goal": float(values.max().round()) if count else None
+        }
+    return data
@@ -0,0 +1,88 @@
+# codec.py
+import base64
+import re
+import struct
+import numpy as np
+import profiling
+from series import EntrySeries
+
+# Format compact de la colonne sports.entries : "KG<version>:" suivi du binaire en base64
+COMPACT_VERSION = 1
+COMPACT_PATTERN = re.compile(r"^KG(\d+):")
+
+# En-tête (little-endian) : nombre d'entrées, premier jour (jours depuis l'epoch),
+# taille en octets d'un écart entre deux dates (1, 2 ou 4) et d'une valeur (4 ou 8)
+HEADER = struct.Struct("<IiBB")
+
+DELTA_TYPES = {1: "<u1", 2: "<u2", 4: "<u4"}
+VALUE_TYPES = {4: "<f4", 8: "<f8"}
+
+
+def is_compact(raw):
+    """Indique si une valeur de la colonne entries est au format compact."""
+    return isinstance(raw, str) and COMPACT_PATTERN.match(raw) is not None
+
+
+def pack_entries(series):
+    """Encode une série en binaire : écarts entre jours consécutifs et valeurs en tableau.
+
+    Les valeurs sont stockées en float32 quand la conversion est exacte (répétitions, secondes...).
+    """
+    days = series.days
+    deltas = np.diff(days)
+    max_delta = int(deltas.max()) if len(deltas) else 0
+    delta_size = 1 if max_delta < 2 ** 8 else 2 if max_delta < 2 ** 16 else 4
+
+    values = series.values
+    # Valeurs hors de la plage float32 : la conversion donne inf, comparée puis stockée sur 8 octets
+    with np.errstate(over="ignore"):
+        value_size = 4 if np.array_equal(values.astype(np.float32).astype(np.float64), values) else 8
+
+    return b"".join((
+        HEADER.pack(len(days), int(days[0]) if len(days) else 0, delta_size, value_size),
+        deltas.astype(DELTA_TYPES[delta_size]).tobytes(),
+        values.astype(VALUE_TYPES[value_size]).tobytes()
+    ))
+
+
+def unpack_entries(payload):
+    """Décode le binaire de pack_entries en série (ValueError si le contenu est invalide)."""
+    if len(payload) < HEADER.size:
+        raise ValueError("Performances compactes tronquées")
+    count, first_day, delta_size, value_size = HEADER.unpack_from(payload)
+    if delta_size not in DELTA_TYPES or value_size not in VALUE_TYPES:
+        raise ValueError("Performances compactes invalides")
+
+    deltas_end = HEADER.size + max(count - 1, 0) * delta_size
+    if len(payload) != deltas_end + count * value_size:
+        raise ValueError("Performances compactes tronquées")
+    if not count:
+        return EntrySeries()
+
+    deltas = np.frombuffer(payload, DELTA_TYPES[delta_size], count - 1, HEADER.size)
+    days = np.empty(count, dtype=np.int64)
+    days[0] = first_day
+    np.cumsum(deltas, dtype=np.int64, out=days[1:])
+    days[1:] += first_day
+
+    values = np.frombuffer(payload, VALUE_TYPES[value_size], count, deltas_end).astype(np.float64)
+    return EntrySeries(days.astype("datetime64[D]"), values)
+
+
+@profiling.timed("codec.encode_entries")
+def encode_entries(series):
+    """Encode une série au format compact de la colonne sports.entries (binaire de pack_entries en base64)."""
+    return f"KG{COMPACT_VERSION}:" + base64.b64encode(pack_entries(series)).decode("ascii")
+
+
+@profiling.timed("codec.decode_entries")
+def decode_entries(raw):
+    """Décode une valeur au format compact en série, sans passer par des objets Python par entrée.
+
+    Lève ValueError si la version est inconnue ou le contenu invalide : une valeur illisible ne doit
+    pas être prise pour une série vide puis écrasée.
+    """
+    match = COMPACT_PATTERN.match(raw)
+    if match is None or int(match.group(1)) != COMPACT_VERSION:
+        raise ValueError(f"Format de performances inconnu : {raw[:8]!r}")
+    return unpack_entries(base64.b64decode(raw[match.end():], validate=True))
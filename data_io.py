@@ -0,0 +1,246 @@
+# data_io.py
+import csv
+import io
+import json
+import math
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+from datetime import date
+from series import EntrySeries
+
+# Nombre d'entrées sérialisées par morceau lors d'un export
+CHUNK_SIZE = 5000
+
+# Colonnes de l'export tabulaire (CSV, Parquet, Arrow)
+COLUMNS = ["Sport", "Date", "Performance", "Unité"]
+
+# Nombre maximal d'erreurs de validation conservées lors d'un import
+MAX_IMPORT_ERRORS = 50
+
+# Politiques de fusion quand une date importée existe déjà
+IMPORT_POLICIES = {
+    "Garder l'existant": "keep",
+    "Remplacer par l'import": "replace",
+    "Garder la meilleure": "best"
+}
+
+EXPORT_FORMATS = {
+    "JSON": {"extension": "json", "mime": "application/json"},
+    "CSV": {"extension": "csv", "mime": "text/csv"},
+    "Parquet": {"extension": "parquet", "mime": "application/vnd.apache.parquet"},
+    "Arrow": {"extension": "arrow", "mime": "application/vnd.apache.arrow.file"}
+}
+
+
+def _chunks(series):
+    """Découpe une série en morceaux (dates ISO, valeurs) de CHUNK_SIZE entrées."""
+    for start in range(0, len(series), CHUNK_SIZE):
+        end = start + CHUNK_SIZE
+        yield series.dates[start:end].astype(str).tolist(), series.values[start:end].tolist()
+
+
+def iter_json_export(data, sports):
+    """Génère l'export JSON ({sport: {"unit", "entries", "goal"}}) morceau par morceau."""
+    yield "{"
+    for i, name in enumerate(sports):
+        sport = data[name]
+        yield ("," if i else "") + f"\n  {json.dumps(name, ensure_ascii=False)}: {{\n"
+        yield f'    "unit": {json.dumps(sport["unit"], ensure_ascii=False)},\n    "entries": ['
+
+        first = True
+        for dates, values in _chunks(sport["entries"]):
+            lines = [json.dumps({"date": d, "value": v}) for d, v in zip(dates, values)]
+            yield ("" if first else ",") + "\n      " + ",\n      ".join(lines)
+            first = False
+
+        yield ("\n    ]" if not first else "]") + f',\n    "goal": {json.dumps(sport.get("goal"))}\n  }}'
+    yield "\n}\n" if sports else "}\n"
+
+
+def iter_csv_export(data, sports):
+    """Génère l'export CSV (une ligne par performance) morceau par morceau."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(COLUMNS)
+
+    for name in sports:
+        unit = data[name]["unit"]
+        for dates, values in _chunks(data[name]["entries"]):
+            writer.writerows(zip([name] * len(dates), dates, values, [unit] * len(dates)))
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+    yield buffer.getvalue()
+
+
+def export_schema():
+    """Schéma Arrow de l'export tabulaire."""
+    return pa.schema([
+        ("Sport", pa.string()),
+        ("Date", pa.date32()),
+        ("Performance", pa.float64()),
+        ("Unité", pa.string())
+    ])
+
+
+def iter_record_batches(data, sports):
+    """Génère les performances sous forme de RecordBatch Arrow, un par morceau."""
+    schema = export_schema()
+    for name in sports:
+        series = data[name]["entries"]
+        for start in range(0, len(series), CHUNK_SIZE):
+            end = start + CHUNK_SIZE
+            count = len(series.dates[start:end])
+            yield pa.record_batch([
+                pa.array([name] * count, pa.string()),
+                pa.array(series.dates[start:end], pa.date32()),
+                pa.array(series.values[start:end], pa.float64()),
+                pa.array([data[name]["unit"]] * count, pa.string())
+            ], schema=schema)
+
+
+def export_bytes(data, sports, export_format):
+    """Construit le fichier d'export à partir des morceaux générés (appelé au téléchargement)."""
+    output = io.BytesIO()
+
+    if export_format == "JSON":
+        for chunk in iter_json_export(data, sports):
+            output.write(chunk.encode("utf-8"))
+    elif export_format == "CSV":
+        for chunk in iter_csv_export(data, sports):
+            output.write(chunk.encode("utf-8"))
+    elif export_format == "Parquet":
+        with pq.ParquetWriter(output, export_schema(), compression="zstd") as writer:
+            for batch in iter_record_batches(data, sports):
+                writer.write_batch(batch)
+    else:  # Arrow IPC
+        with pa.ipc.new_file(output, export_schema()) as writer:
+            for batch in iter_record_batches(data, sports):
+                writer.write_batch(batch)
+
+    output.seek(0)
+    return output
+
+
+def preview_rows(data, sports, limit=100):
+    """Retourne les premières lignes de l'export tabulaire, sans parcourir tout l'historique."""
+    rows = []
+    for name in sports:
+        series = data[name]["entries"]
+        remaining = limit - len(rows)
+        if remaining <= 0:
+            break
+        for d, v in zip(series.dates[:remaining].astype(str).tolist(), series.values[:remaining].tolist()):
+            rows.append({"Sport": name, "Date": d, "Performance": v, "Unité": data[name]["unit"]})
+    return rows
+
+
+def import_format_for(file_name):
+    """Retourne le format d'import correspondant à l'extension d'un fichier, ou None."""
+    extension = file_name.rsplit(".", 1)[-1].lower()
+    return next((name for name, f in EXPORT_FORMATS.items() if f["extension"] == extension), None)
+
+
+def iter_import_rows(file, import_format):
+    """Génère les lignes brutes (sport, date, valeur, unité, objectif) d'un fichier au format d'export."""
+    file.seek(0)
+
+    if import_format == "CSV":
+        text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+        try:
+            for row in csv.DictReader(text):
+                yield row.get("Sport"), row.get("Date"), row.get("Performance"), row.get("Unité"), None
+        finally:
+            # Rend le fichier à Streamlit sans le fermer
+            text.detach()
+
+    elif import_format == "JSON":
+        # Le document JSON est chargé d'un bloc (pas de parseur incrémental dans la bibliothèque standard)
+        for sport, content in json.load(file).items():
+            for entry in content.get("entries", []):
+                yield sport, entry.get("date"), entry.get("value"), content.get("unit"), content.get("goal")
+
+    else:
+        if import_format == "Parquet":
+            batches = pq.ParquetFile(file).iter_batches(batch_size=CHUNK_SIZE)
+        else:  # Arrow IPC
+            reader = pa.ipc.open_file(file)
+            batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+
+        for batch in batches:
+            columns = [batch.column(name).cast(pa.string()).to_pylist() for name in COLUMNS]
+            for sport, day, value, unit in zip(*columns):
+                yield sport, day, value, unit, None
+
+
+def parse_import(file, import_format):
+    """Lit et valide un fichier importé.
+
+    Retourne ({sport: {"unit", "goal", "entries"}}, erreurs, nombre de lignes lues). Les lignes invalides
+    sont ignorées ; en cas de doublon dans le fichier, la dernière ligne d'une date l'emporte.
+    """
+    today = date.today()
+    columns = {}
+    errors = []
+    total = 0
+
+    for total, (sport, day, value, unit, goal) in enumerate(iter_import_rows(file, import_format), start=1):
+        sport = (sport or "").strip()
+        problem = None
+        try:
+            day = date.fromisoformat(str(day).strip()[:10])
+            value = float(value)
+        except (TypeError, ValueError):
+            problem = "date ou performance illisible"
+        else:
+            if not sport:
+                problem = "sport manquant"
+            elif not math.isfinite(value) or value < 0:
+                problem = "performance invalide"
+            elif day > today:
+                problem = "date dans le futur"
+
+        if problem:
+            if len(errors) < MAX_IMPORT_ERRORS:
+                errors.append(f"Ligne {total} : {problem}")
+            continue
+
+        sport_columns = columns.setdefault(sport, {"unit": None, "goal": goal, "dates": [], "values": []})
+        if unit and not sport_columns["unit"]:
+            sport_columns["unit"] = unit.strip()
+        sport_columns["dates"].append(day.isoformat())
+        sport_columns["values"].append(value)
+
+    sports = {
+        name: {
+            "unit": c["unit"],
+            "goal": c["goal"],
+            "entries": EntrySeries.from_columns(c["dates"], c["values"])
+        }
+        for name, c in columns.items()
+    }
+    return sports, errors, total
+
+
+def merge_imported(existing, imported, policy):
+    """Retourne les performances importées à écrire ({date: valeur}) et le nombre de dates déjà présentes."""
+    if not len(existing):
+        return dict(zip(imported.date_strings(), imported.values.tolist())), 0
+
+    positions = np.minimum(np.searchsorted(existing.dates, imported.dates), len(existing) - 1)
+    current = existing.values[positions]
+    conflict = existing.dates[positions] == imported.dates
+
+    if policy == "keep":
+        write = ~conflict
+    elif policy == "best":
+        write = ~conflict | (imported.values > current)
+    else:  # replace
+        write = ~conflict | (imported.values != current)
+
+    return (
+        dict(zip(imported.dates[write].astype(str).tolist(), imported.values[write].tolist())),
+        int(conflict.sum())
+    )
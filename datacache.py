@@ -0,0 +1,84 @@
+# datacache.py
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+def estimate_size(value):
+    """Estime la mémoire occupée (octets) par une valeur : tableaux numpy, séries et conteneurs imbriqués."""
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if hasattr(value, "__slots__"):
+        return sys.getsizeof(value) + sum(estimate_size(getattr(value, name, None)) for name in value.__slots__)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_size(k) + estimate_size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple, set)):
+        return sys.getsizeof(value) + sum(estimate_size(v) for v in value)
+    return sys.getsizeof(value)
+
+
+class SharedCache:
+    """Cache LRU partagé par toutes les sessions du processus, borné par un budget en octets.
+
+    Les valeurs ne sont jamais modifiées en place : les clés incluent la version des données, une écriture
+    produit une nouvelle clé et les anciennes valeurs sortent du cache par éviction. La taille de chaque
+    valeur est estimée à l'insertion ; une valeur plus grande que le budget n'est pas conservée.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """Retourne la valeur d'une clé (la plus récemment utilisée désormais), ou None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def peek(self, key):
+        """Retourne la valeur d'une clé sans modifier l'ordre LRU ni les compteurs, ou None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry[0] if entry is not None else None
+
+    def put(self, key, value):
+        """Ajoute une valeur et retourne l'instance partagée : celle déjà en cache pour la clé, sinon value."""
+        size = estimate_size(value)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry[0]
+            if size > self.max_bytes:
+                return value
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+                self.evictions += 1
+            return value
+
+    def stats(self):
+        """Retourne les compteurs du cache (succès, échecs, évictions) et son occupation."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes
+            }
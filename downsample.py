@@ -0,0 +1,134 @@
+# downsample.py
+import numpy as np
+import pandas as pd
+
+# Largeur de référence d'un graphique (pixels) : au-delà de ~1 point pour 2 pixels, rien n'est visible
+CHART_WIDTH = 1000
+DEFAULT_MAX_POINTS = CHART_WIDTH // 2
+# "Tous les points" reste borné : au-delà, le navigateur ralentit sans gain de lisibilité
+RAW_POINTS_FACTOR = 10
+
+# Modes d'affichage proposés dans les graphiques
+AGGREGATIONS = {
+    "Automatique": None,
+    "Hebdomadaire (meilleure)": "W-MON",
+    "Mensuelle (meilleure)": "MS",
+    "Tous les points": "raw"
+}
+
+
+def lttb_indices(x, y, threshold):
+    """Largest-Triangle-Three-Buckets : indices des points conservés, premier et dernier inclus."""
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    every = (n - 2) / (threshold - 2)
+
+    indices = np.empty(threshold, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, n)
+
+        # Moyenne du bucket suivant (le dernier point pour le dernier bucket)
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(area.argmax())
+        indices[i + 1] = a
+
+    return indices
+
+
+def minmax_indices(y, n_buckets):
+    """Min/max par bucket : indices des extrêmes de chaque bucket, premier et dernier inclus."""
+    n = len(y)
+    if 2 * n_buckets >= n or n_buckets < 1:
+        return np.arange(n)
+
+    y = np.asarray(y, dtype=np.float64)
+    bounds = np.linspace(0, n, n_buckets + 1).astype(np.int64)
+    picked = [0, n - 1]
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        if end > start:
+            bucket = y[start:end]
+            picked.extend((start + int(bucket.argmin()), start + int(bucket.argmax())))
+
+    return np.unique(picked)
+
+
+def record_indices(values):
+    """Indices des records personnels (valeur strictement supérieure à tout ce qui précède)."""
+    values = np.asarray(values, dtype=np.float64)
+    if not len(values):
+        return np.array([], dtype=np.int64)
+    previous_best = np.maximum.accumulate(np.concatenate(([-np.inf], values[:-1])))
+    return np.flatnonzero(values > previous_best)
+
+
+def downsample_indices(x, y, max_points=DEFAULT_MAX_POINTS, method="lttb"):
+    """Réduit une série à max_points indices en conservant les extrêmes et les records personnels."""
+    n = len(y)
+    if n <= max_points:
+        return np.arange(n)
+
+    y = np.asarray(y, dtype=np.float64)
+
+    # Un quart du budget au plus est réservé aux records, en gardant les plus fortes améliorations
+    records = record_indices(y)
+    reserved = min(len(records), max_points // 4)
+    if reserved < len(records):
+        gains = np.diff(np.concatenate(([y[records[0]]], y[records])))
+        records = records[np.sort(np.argsort(gains, kind="stable")[-reserved:])]
+
+    budget = max(max_points - reserved - 2, 3)
+    if method == "minmax":
+        base = minmax_indices(y, budget // 2)
+    else:
+        base = lttb_indices(x, y, budget)
+
+    return np.unique(np.concatenate((base, records, [int(y.argmin()), int(y.argmax())])))
+
+
+def aggregate_frame(df, freq):
+    """Agrège un DataFrame (date, value) par période en gardant la meilleure valeur de chaque période."""
+    grouped = df.groupby(pd.Grouper(key="date", freq=freq, label="left", closed="left"))["value"].max()
+    return grouped.dropna().reset_index()
+
+
+def prepare_chart_frame(df, mode="Automatique", max_points=DEFAULT_MAX_POINTS, method="lttb"):
+    """Prépare un DataFrame (date, value, ...) trié par date pour un graphique au budget de points borné.
+
+    Les modes agrégés restent soumis au budget : une agrégation encore trop dense est ensuite réduite.
+    Le mode "Tous les points" affiche la série brute jusqu'à RAW_POINTS_FACTOR fois le budget.
+    """
+    freq = AGGREGATIONS.get(mode)
+    if df.empty:
+        return df
+    if freq == "raw":
+        max_points *= RAW_POINTS_FACTOR
+    elif freq is not None:
+        df = aggregate_frame(df, freq)
+    if len(df) <= max_points:
+        return df
+
+    x = df["date"].to_numpy(dtype="datetime64[D]").astype(np.int64)
+    indices = downsample_indices(x, df["value"].to_numpy(), max_points, method)
+    return df.iloc[indices]
+
+
+def prepare_grouped_frame(df, key, mode="Automatique", max_points=DEFAULT_MAX_POINTS, method="lttb"):
+    """Prépare séparément chaque série d'un DataFrame (date, value, key) avec prepare_chart_frame.
+
+    La colonne key est rattachée après préparation : les modes agrégés ne conservent que date et value.
+    """
+    if df.empty:
+        return df
+    return pd.concat([prepare_chart_frame(group, mode, max_points, method).assign(**{key: name})
+                      for name, group in df.groupby(key, sort=False)], ignore_index=True)
@@ -0,0 +1,35 @@
+-- Stockage normalisé des performances : une ligne par (utilisateur, sport, date).
+--
+-- Activation côté application, dans .streamlit/secrets.toml :
+--
+--   [storage]
+--   entries_mode = "rows"
+--
+-- La colonne sports.entries est conservée : elle reste lue en mode "json"
+-- et peut être supprimée une fois la migration validée.
+
+create table if not exists sport_entries (
+    id          bigint generated always as identity primary key,
+    user_email  text             not null,
+    sport_name  text             not null,
+    date        date             not null,
+    value       double precision not null,
+    constraint sport_entries_user_sport_date_key unique (user_email, sport_name, date)
+);
+
+-- Recopie des performances existantes depuis la colonne JSON.
+-- entries peut contenir un tableau JSON ou une chaîne JSON encodée (json.dumps).
+insert into sport_entries (user_email, sport_name, date, value)
+select s.user_email,
+       s.sport_name,
+       (e ->> 'date')::date,
+       (e ->> 'value')::double precision
+from sports s
+cross join lateral jsonb_array_elements(
+    case jsonb_typeof(s.entries::jsonb)
+        when 'string' then (s.entries::jsonb #>> '{}')::jsonb
+        when 'array' then s.entries::jsonb
+        else '[]'::jsonb
+    end
+) as e
+on conflict (user_email, sport_name, date) do update set value = excluded.value;
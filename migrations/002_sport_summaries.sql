@@ -0,0 +1,89 @@
+-- Agrégats calculés par la base pour le tableau de bord et la sidebar.
+--
+-- Nécessite la table sport_entries (001_sport_entries.sql) et le mode :
+--
+--   [storage]
+--   entries_mode = "rows"
+--
+-- En mode "json", l'application calcule les résumés à partir des performances chargées.
+
+-- Résumé par sport : une ligne par sport, y compris les sports sans performance.
+-- p_today est la date du jour côté application (semaine = 7 derniers jours, mois = mois civil).
+create or replace function sport_summaries(p_user_email text, p_today date)
+returns table (
+    sport_name     text,
+    unit           text,
+    goal           double precision,
+    total          bigint,
+    first          double precision,
+    last           double precision,
+    best           double precision,
+    worst          double precision,
+    avg            double precision,
+    current_streak bigint,
+    best_streak    bigint,
+    week           bigint,
+    month          bigint
+)
+language sql stable
+as $$
+    with entries as (
+        select e.sport_name,
+               e.date,
+               e.value,
+               row_number() over (partition by e.sport_name order by e.date) as rank_asc,
+               row_number() over (partition by e.sport_name order by e.date desc) as rank_desc,
+               -- Constant sur une suite de jours consécutifs
+               e.date - (row_number() over (partition by e.sport_name order by e.date))::int as run
+        from sport_entries e
+        where e.user_email = p_user_email
+    ),
+    runs as (
+        select r.sport_name, count(*) as length, max(r.date) as run_end
+        from entries r
+        group by r.sport_name, r.run
+    ),
+    streaks as (
+        select r.sport_name,
+               max(r.length) as best_streak,
+               coalesce(max(r.length) filter (where r.run_end >= p_today - 1), 0) as current_streak
+        from runs r
+        group by r.sport_name
+    ),
+    stats as (
+        select e.sport_name,
+               count(*) as total,
+               max(e.value) filter (where e.rank_asc = 1) as first,
+               max(e.value) filter (where e.rank_desc = 1) as last,
+               max(e.value) as best,
+               min(e.value) as worst,
+               avg(e.value) as avg,
+               count(*) filter (where e.date >= p_today - 7) as week,
+               count(*) filter (where e.date >= date_trunc('month', p_today)::date) as month
+        from entries e
+        group by e.sport_name
+    )
+    select s.sport_name, s.unit, s.goal,
+           coalesce(st.total, 0), st.first, st.last, st.best, st.worst, st.avg,
+           coalesce(k.current_streak, 0), coalesce(k.best_streak, 0),
+           coalesce(st.week, 0), coalesce(st.month, 0)
+    from sports s
+    left join stats st on st.sport_name = s.sport_name
+    left join streaks k on k.sport_name = s.sport_name
+    where s.user_email = p_user_email;
+$$;
+
+-- Séances par sport et par semaine ISO (lundi), mois et année ; seules les périodes actives sont retournées.
+create or replace function sport_activity(p_user_email text)
+returns table (period text, sport_name text, start date, sessions bigint)
+language sql stable
+as $$
+    select 'week', e.sport_name, date_trunc('week', e.date)::date, count(*)
+    from sport_entries e where e.user_email = p_user_email group by 2, 3
+    union all
+    select 'month', e.sport_name, date_trunc('month', e.date)::date, count(*)
+    from sport_entries e where e.user_email = p_user_email group by 2, 3
+    union all
+    select 'year', e.sport_name, date_trunc('year', e.date)::date, count(*)
+    from sport_entries e where e.user_email = p_user_email group by 2, 3;
+$$;
@@ -0,0 +1,30 @@
+-- Catalogue des sports : nombre de performances sans transférer les performances.
+--
+-- Ces fonctions sont exposées par PostgREST comme des colonnes calculées de la table sports
+-- (select=sport_name,unit,goal,entry_count).
+
+-- Mode "rows" : compte des lignes de sport_entries (index unique user_email, sport_name, date).
+create or replace function entry_count(s sports)
+returns bigint
+language sql stable
+as $$
+    select count(*)
+    from sport_entries e
+    where e.user_email = s.user_email
+      and e.sport_name = s.sport_name;
+$$;
+
+-- Mode "json" : longueur du tableau sports.entries (tableau JSON ou chaîne JSON encodée).
+-- À supprimer avant la colonne entries une fois la migration vers sport_entries validée.
+create or replace function json_entry_count(s sports)
+returns integer
+language sql stable
+as $$
+    select coalesce(jsonb_array_length(
+        case jsonb_typeof(s.entries::jsonb)
+            when 'string' then (s.entries::jsonb #>> '{}')::jsonb
+            when 'array' then s.entries::jsonb
+            else '[]'::jsonb
+        end
+    ), 0);
+$$;
@@ -0,0 +1,37 @@
+-- Format compact de la colonne sports.entries (mode "json", secrets.toml) :
+--
+--   [storage]
+--   entries_format = "compact"
+--
+-- La colonne contient alors une chaîne "KG1:<base64>" (voir codec.py). Les lignes encore en JSON
+-- restent lisibles et sont réécrites au format compact à leur prochaine modification.
+-- Attention : la copie de 001_sport_entries.sql n'ignore pas les lignes compactes, elle échoue :
+-- le cast ::jsonb d'une chaîne "KG1:..." n'est pas du JSON valide et annule toute la copie.
+-- Exécuter 001 avant d'activer ce format, ou réécrire d'abord ces lignes en JSON.
+
+-- Nombre de performances : lu dans l'en-tête (uint32 little-endian) sans décoder les valeurs.
+create or replace function json_entry_count(s sports)
+returns integer
+language plpgsql stable
+as $$
+declare
+    raw jsonb := s.entries::jsonb;
+    text_value text;
+    header bytea;
+begin
+    if jsonb_typeof(raw) = 'array' then
+        return jsonb_array_length(raw);
+    end if;
+    if jsonb_typeof(raw) <> 'string' then
+        return 0;
+    end if;
+
+    text_value := raw #>> '{}';
+    if text_value like 'KG1:%' then
+        header := decode(substr(text_value, 5, 8), 'base64');
+        return get_byte(header, 0) + (get_byte(header, 1) << 8)
+             + (get_byte(header, 2) << 16) + (get_byte(header, 3) << 24);
+    end if;
+    return coalesce(jsonb_array_length(text_value::jsonb), 0);
+end;
+$$;
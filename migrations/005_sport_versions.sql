@@ -0,0 +1,26 @@
+-- Contrôle de concurrence optimiste sur sports.entries (mode "json").
+--
+-- Chaque modification de entries incrémente version. Le client réécrit la colonne avec un filtre
+-- version=eq.<version lue> : si une autre session a écrit entre-temps, aucune ligne n'est modifiée
+-- et le client réapplique son lot sur la version relue, sans relecture avant chaque écriture.
+-- En mode "rows", les performances sont écrites ligne par ligne et n'en ont pas besoin.
+
+alter table sports add column if not exists version bigint not null default 0;
+
+create or replace function bump_sport_version()
+returns trigger
+language plpgsql
+as $$
+begin
+    if new.entries is distinct from old.entries then
+        new.version := old.version + 1;
+    end if;
+    return new;
+end;
+$$;
+
+drop trigger if exists sports_bump_version on sports;
+create trigger sports_bump_version
+    before update on sports
+    for each row
+    execute function bump_sport_version();
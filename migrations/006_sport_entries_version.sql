@@ -0,0 +1,40 @@
+-- Marqueur de fraîcheur en mode "rows" : toute écriture dans sport_entries incrémente sports.version
+-- (colonne ajoutée par 005_sport_versions.sql), une fois par sport et par requête.
+--
+-- Les sessions comparent ces versions (select=sport_name,version), au plus toutes les
+-- [storage] revalidate_seconds, et ne relisent que les sports modifiés.
+
+create or replace function bump_sport_entries_version()
+returns trigger
+language plpgsql
+as $$
+begin
+    update sports s
+    set version = s.version + 1
+    from (select distinct user_email, sport_name from changed) c
+    where s.user_email = c.user_email and s.sport_name = c.sport_name;
+    return null;
+end;
+$$;
+
+-- Une table de transition par événement : un déclencheur par type d'écriture
+drop trigger if exists sport_entries_insert_version on sport_entries;
+create trigger sport_entries_insert_version
+    after insert on sport_entries
+    referencing new table as changed
+    for each statement
+    execute function bump_sport_entries_version();
+
+drop trigger if exists sport_entries_update_version on sport_entries;
+create trigger sport_entries_update_version
+    after update on sport_entries
+    referencing new table as changed
+    for each statement
+    execute function bump_sport_entries_version();
+
+drop trigger if exists sport_entries_delete_version on sport_entries;
+create trigger sport_entries_delete_version
+    after delete on sport_entries
+    referencing old table as changed
+    for each statement
+    execute function bump_sport_entries_version();
@@ -1,20 +1,15 @@
 # pages/add_performance.py
 import streamlit as st
-import pandas as pd
 from datetime import date
-from utils import (load_user_sports, update_sport_entries, get_weekly_progress,
-                   calculate_stats, get_monthly_progress, render_sidebar)
+from utils import load_user_sports, upsert_entry, get_sport_summary, get_rolling_analytics, render_sidebar
+from rolling import trailing_average
+from profiling import checkpoint
 
-st.title("Enregistrer une nouvelle performance")
-st.divider()
-
-data = load_user_sports()
 
-if not data:
-    st.warning("Vous devez d'abord créer un sport.")
-    if st.button("Créer un sport", type="primary"):
-        st.switch_page("pages/add_sport.py")
-else:
+@st.fragment
+def performance_panel():
+    """Sélection du sport, statistiques, formulaire et historique (changer de sport ne relance que ce bloc)."""
+    data = load_user_sports()
     # Sélection du sport en dehors du formulaire pour mise à jour dynamique
     selected_sport = st.session_state.get("selected_sport", list(data.keys())[0])
     sport = st.selectbox(
@@ -33,7 +28,7 @@ else:
 
     if entries:
         st.subheader(f"Statistiques - {sport}")
-        stats = calculate_stats(entries)
+        stats = get_sport_summary(sport, entries)
 
         col1, col2, col3, col4 = st.columns(4)
         with col1:
@@ -45,7 +40,15 @@ else:
         with col4:
             st.metric("Total séances", stats['total'])
 
+        # Tendance récente : mémorisée et prolongée à chaque performance ajoutée
+        rolling = get_rolling_analytics(sport, entries)
+        recent = trailing_average(rolling, 30, date.today())
+        recent = f"{recent:.1f} {data[sport]['unit']}" if recent is not None else "-"
+        st.caption(f"Moyenne des 30 derniers jours : {recent} · "
+                   f"{len(rolling['records'])} record(s) personnel(s) battu(s)")
+
         st.divider()
+    checkpoint("add_performance.statistiques")
 
     # Formulaire d'ajout
     with st.form("add_performance_form"):
@@ -73,12 +76,9 @@ else:
                 date_str = selected_date.isoformat()
                 entries = data[sport]["entries"]
 
-                existing_entry = next((e for e in entries if e["date"] == date_str), None)
-
-                if existing_entry:
+                if entries.get(date_str) is not None:
                     if st.session_state.get("confirm_overwrite"):
-                        existing_entry["value"] = performance
-                        if update_sport_entries(sport, entries):
+                        if upsert_entry(sport, date_str, performance):
                             st.success("Performance mise à jour avec succès !")
                             st.session_state["confirm_overwrite"] = False
                             st.rerun()
@@ -87,9 +87,7 @@ else:
                             f"Une performance existe déjà pour le {date_str}. Cliquez à nouveau pour remplacer.")
                         st.session_state["confirm_overwrite"] = True
                 else:
-                    new_entry = {"date": date_str, "value": performance}
-                    entries.append(new_entry)
-                    if update_sport_entries(sport, entries):
+                    if upsert_entry(sport, date_str, performance):
                         st.success("Performance enregistrée avec succès !")
                         st.balloons()
                         st.session_state["confirm_overwrite"] = False
@@ -97,17 +95,16 @@ else:
             else:
                 st.error("La performance doit être supérieure à 0")
 
+    checkpoint("add_performance.formulaire")
+
     # Historique des performances
     if entries:
         st.divider()
         st.subheader("Historique des performances")
 
-        # Trier par date décroissante
-        sorted_entries = sorted(entries, key=lambda x: x["date"], reverse=True)
-
-        # Créer un DataFrame pour l'affichage
-        df_history = pd.DataFrame(sorted_entries)
-        df_history["date"] = pd.to_datetime(df_history["date"]).dt.strftime('%d/%m/%Y')
+        # Créer un DataFrame pour l'affichage, trié par date décroissante
+        df_history = entries.to_frame().iloc[::-1]
+        df_history["date"] = df_history["date"].dt.strftime('%d/%m/%Y')
         df_history["value"] = df_history["value"].apply(lambda x: f"{x} {data[sport]['unit']}")
         df_history.columns = ["Date", "Performance"]
 
@@ -123,6 +120,22 @@ else:
             st.caption(
                 f"Affichage des 10 dernières sur {len(df_history)} performances. Voir toutes les performances dans la section Analyse.")
 
+    checkpoint("add_performance.historique")
+
+
+st.title("Enregistrer une nouvelle performance")
+st.divider()
+
+data = load_user_sports()
+checkpoint("add_performance.chargement")
+
+if not data:
+    st.warning("Vous devez d'abord créer un sport.")
+    if st.button("Créer un sport", type="primary"):
+        st.switch_page("pages/add_sport.py")
+else:
+    performance_panel()
+
 # Sidebar avec stats et déconnexion
 
-render_sidebar(data)
\ No newline at end of file
+render_sidebar()
\ No newline at end of file
@@ -1,11 +1,14 @@
 # pages/add_sport.py
 import streamlit as st
 from utils import load_user_sports, save_sport, render_sidebar
+from profiling import checkpoint
 
 st.title("Ajouter un nouveau sport")
 st.divider()
 
+# Catalogue seul : la vérification des doublons ne lit aucune performance
 data = load_user_sports()
+checkpoint("add_sport.chargement")
 
 col1, col2 = st.columns([2, 1])
 
@@ -55,5 +58,7 @@ with col2:
     - Définissez un objectif réaliste et motivant
     """)
 
+checkpoint("add_sport.formulaire")
+
 # Sidebar avec stats et déconnexion
-render_sidebar(data)
\ No newline at end of file
+render_sidebar()
\ No newline at end of file
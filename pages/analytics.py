@@ -2,15 +2,333 @@
 import streamlit as st
 import pandas as pd
 import altair as alt
-import json
-from datetime import datetime
-from utils import (load_user_sports, calculate_stats, update_sport_entries,
-                   delete_entry, render_sidebar)
+from datetime import date, timedelta
+from utils import (DATE_WINDOWS, load_user_sports, load_sport_entries, load_lifetime_summaries, load_entries_window,
+                   load_best_before, entries_loader, get_window_start, summarize_entries, apply_entry_changes,
+                   get_rolling_analytics, render_sidebar)
+from downsample import AGGREGATIONS, DEFAULT_MAX_POINTS, prepare_chart_frame, prepare_grouped_frame
+from rolling import ROLLING_CURVES, ROLLING_LOOKBACK, consistency_metrics, rolling_frame
+from series import EntrySeries
+from data_io import EXPORT_FORMATS, export_bytes, preview_rows
+from profiling import checkpoint
+
+
+@st.fragment
+def sport_view(window_start, window_end, whole_history):
+    """Graphique, statistiques et historique d'un sport sur la période."""
+    data = load_user_sports()
+    # Réduction des points envoyés aux graphiques pour les longs historiques
+    chart_mode = st.radio("Points affichés", list(AGGREGATIONS.keys()), horizontal=True, key="chart_mode")
+    # Records sur tout l'historique : agrégats, sans lire les performances hors période (bloc omis si
+    # le backend n'agrège pas)
+    lifetime = load_lifetime_summaries() if not whole_history else {}
+
+    sport_graph = st.selectbox("Choisissez un sport à analyser", list(data.keys()))
+    curves = st.multiselect("Tendances", list(ROLLING_CURVES.keys()), default=["Moyenne 30 jours"],
+                            key="rolling_curves")
+
+    # Analyses glissantes (calcul mémorisé) sur l'historique complet s'il est demandé ou déjà chargé ; sinon
+    # sur la période précédée des jours nécessaires aux fenêtres glissantes, sans lire tout l'historique
+    # (les records partent alors de la meilleure performance antérieure, lue sans l'historique)
+    prior_best = None
+    if whole_history or "entries" in data[sport_graph]:
+        history = load_sport_entries([sport_graph])[sport_graph]["entries"]
+    else:
+        lookback_start = window_start - timedelta(days=ROLLING_LOOKBACK) if window_start is not None else None
+        history = load_entries_window([sport_graph], lookback_start, window_end).get(sport_graph, EntrySeries())
+        prior_best = load_best_before(sport_graph, lookback_start) if lookback_start is not None else None
+    rolling = get_rolling_analytics(sport_graph, history, prior_best)
+    entries = history.between(window_start, window_end)
+
+    if entries:
+        df = entries.to_frame()
+        df_chart = prepare_chart_frame(df, chart_mode)
+        df_curves, df_records = rolling_frame(rolling, curves, window_start, window_end)
+        df_curves = prepare_grouped_frame(df_curves, "curve", chart_mode)
+
+        # Graphique principal, tendances et records personnels superposés
+        x = alt.X("date:T", title="Date", axis=alt.Axis(format="%d/%m"))
+        chart = (
+            alt.Chart(df_chart)
+            .mark_line(point=True, size=3)
+            .encode(
+                x=x,
+                y=alt.Y("value:Q", title=f"Performance ({data[sport_graph]['unit']})"),
+                tooltip=[
+                    alt.Tooltip("date:T", title="Date", format="%d/%m/%Y"),
+                    alt.Tooltip("value:Q", title="Performance")
+                ],
+            )
+        )
+        trends = (
+            alt.Chart(df_curves)
+            .mark_line(strokeDash=[6, 3], size=2)
+            .encode(
+                x=x,
+                y="value:Q",
+                color=alt.Color("curve:N", title="Tendance"),
+                tooltip=[
+                    alt.Tooltip("curve:N", title="Tendance"),
+                    alt.Tooltip("date:T", title="Date", format="%d/%m/%Y"),
+                    alt.Tooltip("value:Q", title="Valeur", format=".1f")
+                ],
+            )
+        )
+        records = (
+            alt.Chart(df_records)
+            .mark_point(shape="diamond", size=120, filled=True, color="gold")
+            .encode(
+                x=x,
+                y="value:Q",
+                tooltip=[
+                    alt.Tooltip("date:T", title="Record du", format="%d/%m/%Y"),
+                    alt.Tooltip("value:Q", title="Record")
+                ],
+            )
+        )
+
+        st.altair_chart(alt.layer(chart, trends, records).properties(title=f"Évolution de {sport_graph}", height=400),
+                        use_container_width=True)
+        if len(df_chart) < len(df):
+            st.caption(f"{len(df_chart)} points affichés sur {len(df)} (records et extrêmes conservés).")
+        checkpoint("analytics.sport.graphique")
+
+        # Statistiques avancées sur la période
+        stats = summarize_entries(entries)
+
+        st.subheader("Statistiques détaillées" if whole_history else "Statistiques sur la période")
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            st.metric("Progression totale", f"{stats['progression']:.1f}%")
+        with col2:
+            st.metric("Écart-type", f"{pd.Series(entries.values).std():.2f}")
+        with col3:
+            st.metric("Médiane", f"{stats['median']:.1f} {data[sport_graph]['unit']}")
+        with col4:
+            improvement = stats['last'] - stats['first']
+            st.metric("Amélioration", f"{improvement:+.1f} {data[sport_graph]['unit']}")
+
+        # Régularité sur la période ; records de la période par rapport à tout l'historique
+        consistency = consistency_metrics(rolling, window_start, window_end)
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            st.metric("Séances par semaine", f"{consistency['per_week']:.1f}")
+        with col2:
+            st.metric("Semaines actives", f"{consistency['active_weeks']:.0f}%")
+        with col3:
+            st.metric("Écart moyen", f"{consistency['mean_gap']:.1f} j" if consistency["mean_gap"] is not None else "-",
+                      help=f"Plus long écart : {consistency['longest_gap'] or 0} jours")
+        with col4:
+            st.metric("Records sur la période", len(df_records))
+
+        if not whole_history and sport_graph in lifetime:
+            record = lifetime[sport_graph]
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                st.metric("Record (tout l'historique)", f"{record['best']} {data[sport_graph]['unit']}")
+            with col2:
+                st.metric("Séances (tout l'historique)", record["total"])
+            with col3:
+                st.metric("Moyenne (tout l'historique)", f"{record['avg']:.1f} {data[sport_graph]['unit']}")
+
+        # Tableau des performances
+        st.subheader("Historique complet" if whole_history else "Historique de la période")
+        df_display = df.copy()
+        df_display['date'] = df_display['date'].dt.strftime('%d/%m/%Y')
+        df_display['value'] = df_display['value'].apply(lambda x: f"{x} {data[sport_graph]['unit']}")
+        st.dataframe(df_display[['date', 'value']], use_container_width=True, hide_index=True)
+        checkpoint("analytics.sport.tableaux")
+
+    else:
+        st.info("Aucune donnée disponible pour ce sport sur la période.")
+
+
+@st.fragment
+def comparison_view(window_start, window_end, whole_history):
+    """Comparaison normalisée de tous les sports sur la période."""
+    data = load_user_sports()
+    chart_mode = st.radio("Points affichés", list(AGGREGATIONS.keys()), horizontal=True, key="chart_mode")
+    lifetime = load_lifetime_summaries() if not whole_history else {}
+
+    windows = load_entries_window([name for name, sport_data in data.items() if sport_data["count"]],
+                                  window_start, window_end)
+    sports_with_data = [name for name, entries in windows.items() if entries]
+    points_per_sport = max(50, DEFAULT_MAX_POINTS // max(len(sports_with_data), 1))
+
+    all_data = []
+    for sport_name in sports_with_data:
+        entries = windows[sport_name]
+        df_sport = prepare_chart_frame(entries.to_frame(), chart_mode, points_per_sport)
+
+        # Normalisation sur toute la période, pas seulement sur les points affichés
+        low, high = entries.values.min(), entries.values.max()
+        normalized = (df_sport["value"] - low) / (high - low) if high != low else 0.0
+        all_data.append(df_sport.assign(value_normalized=normalized, sport=sport_name,
+                                        unit=data[sport_name]["unit"]))
+
+    if all_data:
+        df_all = pd.concat(all_data, ignore_index=True)
+
+        chart_all = (
+            alt.Chart(df_all)
+            .mark_line(point=True, size=3)
+            .encode(
+                x=alt.X("date:T", title="Date"),
+                y=alt.Y("value_normalized:Q", title="Performance normalisée (0-1)"),
+                color=alt.Color("sport:N", title="Sport"),
+                tooltip=["sport:N", "date:T", "value:Q", "unit:N"],
+            )
+            .properties(
+                title="Comparaison de tous les sports (valeurs normalisées)",
+                height=400
+            )
+        )
+
+        st.altair_chart(chart_all, use_container_width=True)
+        checkpoint("analytics.comparaison.graphique")
+        st.caption(
+            "Les valeurs sont normalisées entre 0 et 1 pour permettre la comparaison entre différentes unités.")
+
+        # Statistiques par sport sur la période, record sur tout l'historique
+        st.subheader("Résumé par sport")
+        summary_data = []
+        for sport_name in sports_with_data:
+            stats = summarize_entries(windows[sport_name])
+            unit = data[sport_name]["unit"]
+            # Sur une période, le record de tout l'historique n'est affiché que s'il est disponible sans lecture
+            record = lifetime.get(sport_name, stats if whole_history else None)
+            summary_data.append({
+                "Sport": sport_name,
+                "Séances": stats['total'],
+                "Meilleure": f"{stats['best']} {unit}",
+                "Moyenne": f"{stats['avg']:.1f} {unit}",
+                "Progression": f"{stats['progression']:.1f}%",
+                "Record": f"{record['best']} {unit}" if record is not None else "-"
+            })
+
+        if summary_data:
+            st.dataframe(pd.DataFrame(summary_data), use_container_width=True, hide_index=True)
+        checkpoint("analytics.comparaison.resume")
+
+
+@st.fragment
+def edit_view(window_start, window_end):
+    """Édition paginée des performances d'un sport sur la période."""
+    data = load_user_sports()
+    sport_edit = st.selectbox("Sélectionner un sport", list(data.keys()), key="edit_sport")
+    entries_edit = load_entries_window([sport_edit], window_start, window_end).get(sport_edit)
+
+    if entries_edit:
+        st.write(f"**{data[sport_edit]['count']} performance(s) enregistrée(s)**")
+
+        # Période commune et pagination : seule la page affichée devient un widget
+        page_size = st.selectbox("Lignes par page", [25, 50, 100, 250], index=1, key="edit_page_size")
+        df_window = entries_edit.to_frame().iloc[::-1]
+
+        page_count = max(1, -(-len(df_window) // page_size))
+        page = st.number_input("Page", min_value=1, max_value=page_count, value=1, step=1,
+                               key=f"edit_page_{sport_edit}")
+        st.caption(f"{len(df_window)} performance(s) sur la période - page {page}/{page_count}")
+
+        df_page = df_window.iloc[(page - 1) * page_size:page * page_size].reset_index(drop=True)
+        df_page["date"] = df_page["date"].dt.date
+        df_page["delete"] = False
+
+        st.write("Modifier ou supprimer des performances :")
+        edited = st.data_editor(
+            df_page,
+            column_config={
+                "date": st.column_config.DateColumn("Date", format="DD/MM/YYYY", disabled=True),
+                "value": st.column_config.NumberColumn(
+                    f"Performance ({data[sport_edit]['unit']})", min_value=0.0, step=1.0, required=True
+                ),
+                "delete": st.column_config.CheckboxColumn("Supprimer")
+            },
+            num_rows="fixed",
+            hide_index=True,
+            use_container_width=True,
+            key=f"editor_{sport_edit}_{window_start}_{window_end}_{page}_{page_size}"
+        )
+
+        # Différence entre la page affichée et la page éditée
+        deleted = edited["delete"]
+        changed = ~deleted & edited["value"].notna() & (edited["value"] != df_page["value"])
+        upserts = {d.isoformat(): float(v) for d, v in zip(edited.loc[changed, "date"],
+                                                            edited.loc[changed, "value"])}
+        deletions = [d.isoformat() for d in edited.loc[deleted, "date"]]
+
+        if upserts or deletions:
+            st.caption(f"{len(upserts)} modification(s) et {len(deletions)} suppression(s) en attente. "
+                       "Enregistrez avant de changer de page.")
+
+        if st.button("Enregistrer les modifications", type="primary", disabled=not (upserts or deletions),
+                     key=f"save_edits_{sport_edit}"):
+            if apply_entry_changes(sport_edit, upserts, deletions):
+                st.success("Modifications enregistrées !")
+                st.rerun()
+    else:
+        st.info("Aucune donnée à modifier pour ce sport sur la période.")
+    checkpoint("analytics.edition")
+
+
+@st.fragment
+def export_view(window_start, window_end, whole_history):
+    """Export des performances de la période."""
+    data = load_user_sports()
+    st.write("Exportez vos données dans différents formats")
+
+    export_format = st.radio("Format d'export", list(EXPORT_FORMATS.keys()), horizontal=True)
+    sport_export = st.selectbox("Sport à exporter", ["Tous les sports"] + list(data.keys()), key="export_sport")
+
+    if sport_export == "Tous les sports":
+        export_sports = list(data.keys())
+        filename = "keepgoing_all_sports"
+    else:
+        export_sports = [sport_export]
+        filename = f"keepgoing_{sport_export.lower().replace(' ', '_')}"
+
+    if whole_history:
+        # Catalogue : les performances ne sont lues qu'au téléchargement (hors du script, sans st.user)
+        export_source = data
+        export_count = sum(data[name]["count"] for name in export_sports)
+        load_export = entries_loader(export_sports)
+    else:
+        windows = load_entries_window(export_sports, window_start, window_end)
+        export_source = {
+            name: {"unit": data[name]["unit"], "goal": data[name]["goal"], "entries": series}
+            for name, series in windows.items()
+        }
+        export_count = sum(len(series) for series in windows.values())
+
+    if export_count:
+        file_format = EXPORT_FORMATS[export_format]
+
+        # Le fichier n'est construit qu'au clic sur le bouton de téléchargement
+        st.download_button(
+            label=f"📥 Télécharger {export_format}",
+            data=lambda: export_bytes(load_export() if whole_history else export_source, export_sports,
+                                      export_format),
+            file_name=f"{filename}.{file_format['extension']}",
+            mime=file_format["mime"],
+            use_container_width=True
+        )
+
+        with st.expander("Aperçu des données"):
+            preview = preview_rows(export_source, export_sports)
+            st.dataframe(pd.DataFrame(preview), use_container_width=True, hide_index=True)
+            if export_count > len(preview):
+                st.caption(f"Aperçu des {len(preview)} premières lignes sur {export_count}.")
+    else:
+        st.info("Aucune donnée à exporter sur la période")
+    checkpoint("analytics.export")
+
 
 st.title("Analyse détaillée de vos performances")
 st.divider()
 
+# Catalogue des sports : les performances sont chargées pour les seuls sports affichés
 data = load_user_sports()
+checkpoint("analytics.chargement")
 
 if not data:
     st.info("Aucune donnée à analyser pour le moment.")
@@ -22,115 +340,29 @@ else:
         horizontal=True
     )
 
+    # Période analysée, commune aux trois modes : seules les performances de la période sont lues
+    col1, col2 = st.columns([2, 1])
+    with col1:
+        window_label = st.selectbox("Période analysée", list(DATE_WINDOWS.keys()) + ["Personnalisée"],
+                                    index=2, key="analytics_window")
+    if window_label == "Personnalisée":
+        with col2:
+            today = date.today()
+            custom_range = st.date_input("Dates", value=(today - timedelta(days=364), today), max_value=today,
+                                         key="analytics_custom_window")
+        # Une plage en cours de saisie n'a qu'une borne
+        window_start, window_end = (tuple(custom_range) + (None, None))[:2]
+    else:
+        window_start, window_end = get_window_start(DATE_WINDOWS[window_label]), None
+    whole_history = window_start is None and window_end is None
+
+    # Chaque vue est un fragment : ses widgets (sport, points affichés, page, format...) ne relancent
+    # que la vue, à partir des données déjà chargées pour la session
     if view_mode == "Sport individuel":
-        sport_graph = st.selectbox("Choisissez un sport à analyser", list(data.keys()))
-        entries = data[sport_graph]["entries"]
-
-        if entries:
-            df = pd.DataFrame(entries)
-            df["date"] = pd.to_datetime(df["date"])
-            df = df.sort_values("date")
-
-            # Graphique principal
-            chart = (
-                alt.Chart(df)
-                .mark_line(point=True, size=3)
-                .encode(
-                    x=alt.X("date:T", title="Date", axis=alt.Axis(format="%d/%m")),
-                    y=alt.Y("value:Q", title=f"Performance ({data[sport_graph]['unit']})"),
-                    tooltip=[
-                        alt.Tooltip("date:T", title="Date", format="%d/%m/%Y"),
-                        alt.Tooltip("value:Q", title="Performance")
-                    ],
-                )
-                .properties(
-                    title=f"Évolution de {sport_graph}",
-                    height=400
-                )
-            )
-
-            st.altair_chart(chart, use_container_width=True)
-
-            # Statistiques avancées
-            stats = calculate_stats(entries)
-
-            st.subheader("Statistiques détaillées")
-            col1, col2, col3, col4 = st.columns(4)
-            with col1:
-                st.metric("Progression totale", f"{stats['progression']:.1f}%")
-            with col2:
-                st.metric("Écart-type", f"{pd.Series([e['value'] for e in entries]).std():.2f}")
-            with col3:
-                st.metric("Médiane", f"{stats['median']:.1f} {data[sport_graph]['unit']}")
-            with col4:
-                improvement = stats['last'] - entries[0]['value']
-                st.metric("Amélioration", f"{improvement:+.1f} {data[sport_graph]['unit']}")
-
-            # Tableau des performances
-            st.subheader("Historique complet")
-            df_display = df.copy()
-            df_display['date'] = df_display['date'].dt.strftime('%d/%m/%Y')
-            df_display['value'] = df_display['value'].apply(lambda x: f"{x} {data[sport_graph]['unit']}")
-            st.dataframe(df_display[['date', 'value']], use_container_width=True, hide_index=True)
-
-        else:
-            st.info("Aucune donnée disponible pour ce sport.")
+        sport_view(window_start, window_end, whole_history)
 
     elif view_mode == "Comparaison globale":
-        all_data = []
-        for sport_name, sport_data in data.items():
-            for entry in sport_data["entries"]:
-                all_data.append({
-                    "sport": sport_name,
-                    "date": entry["date"],
-                    "value": entry["value"],
-                    "unit": sport_data["unit"]
-                })
-
-        if all_data:
-            df_all = pd.DataFrame(all_data)
-            df_all["date"] = pd.to_datetime(df_all["date"])
-
-            # Normalisation
-            df_all["value_normalized"] = df_all.groupby("sport")["value"].transform(
-                lambda x: (x - x.min()) / (x.max() - x.min()) if x.max() != x.min() else 0
-            )
-
-            chart_all = (
-                alt.Chart(df_all)
-                .mark_line(point=True, size=3)
-                .encode(
-                    x=alt.X("date:T", title="Date"),
-                    y=alt.Y("value_normalized:Q", title="Performance normalisée (0-1)"),
-                    color=alt.Color("sport:N", title="Sport"),
-                    tooltip=["sport:N", "date:T", "value:Q", "unit:N"],
-                )
-                .properties(
-                    title="Comparaison de tous les sports (valeurs normalisées)",
-                    height=400
-                )
-            )
-
-            st.altair_chart(chart_all, use_container_width=True)
-            st.caption(
-                "Les valeurs sont normalisées entre 0 et 1 pour permettre la comparaison entre différentes unités.")
-
-            # Statistiques par sport
-            st.subheader("Résumé par sport")
-            summary_data = []
-            for sport_name, sport_data in data.items():
-                if sport_data["entries"]:
-                    stats = calculate_stats(sport_data["entries"])
-                    summary_data.append({
-                        "Sport": sport_name,
-                        "Séances": stats['total'],
-                        "Meilleure": f"{stats['best']} {sport_data['unit']}",
-                        "Moyenne": f"{stats['avg']:.1f} {sport_data['unit']}",
-                        "Progression": f"{stats['progression']:.1f}%"
-                    })
-
-            if summary_data:
-                st.dataframe(pd.DataFrame(summary_data), use_container_width=True, hide_index=True)
+        comparison_view(window_start, window_end, whole_history)
 
     else:  # Gestion des données
         st.subheader("Gestion et export des données")
@@ -138,107 +370,10 @@ else:
         tab1, tab2 = st.tabs(["Modifier les données", "Exporter les données"])
 
         with tab1:
-            sport_edit = st.selectbox("Sélectionner un sport", list(data.keys()), key="edit_sport")
-            entries_edit = data[sport_edit]["entries"]
-
-            if entries_edit:
-                st.write(f"**{len(entries_edit)} performance(s) enregistrée(s)**")
-
-                # Tableau avec édition
-                df_edit = pd.DataFrame(entries_edit)
-                df_edit["date"] = pd.to_datetime(df_edit["date"])
-                df_edit = df_edit.sort_values("date", ascending=False)
-
-                st.write("Modifier ou supprimer des performances :")
-
-                for idx, row in df_edit.iterrows():
-                    col1, col2, col3, col4 = st.columns([2, 2, 1, 1])
-
-                    with col1:
-                        st.text(row["date"].strftime("%d/%m/%Y"))
-                    with col2:
-                        new_value = st.number_input(
-                            "Valeur",
-                            value=float(row["value"]),
-                            min_value=0.0,
-                            step=1.0,
-                            key=f"edit_{sport_edit}_{row['date'].isoformat()}",
-                            label_visibility="collapsed"
-                        )
-                    with col3:
-                        if st.button("Modifier", key=f"mod_{sport_edit}_{row['date'].isoformat()}"):
-                            # Trouver et modifier l'entrée
-                            date_str = row["date"].isoformat()
-                            for entry in entries_edit:
-                                if entry["date"] == date_str:
-                                    entry["value"] = new_value
-                                    break
-
-                            if update_sport_entries(sport_edit, entries_edit):
-                                st.success("Modifié !")
-                                st.rerun()
-                    with col4:
-                        if st.button("🗑️", key=f"del_{sport_edit}_{row['date'].isoformat()}"):
-                            if delete_entry(sport_edit, row["date"].isoformat()):
-                                st.success("Supprimé !")
-                                st.rerun()
-            else:
-                st.info("Aucune donnée à modifier pour ce sport.")
+            edit_view(window_start, window_end)
 
         with tab2:
-            st.write("Exportez vos données dans différents formats")
-
-            export_format = st.radio("Format d'export", ["JSON", "CSV"], horizontal=True)
-            sport_export = st.selectbox("Sport à exporter", ["Tous les sports"] + list(data.keys()), key="export_sport")
-
-            if sport_export == "Tous les sports":
-                export_data = data
-                filename = "keepgoing_all_sports"
-            else:
-                export_data = {sport_export: data[sport_export]}
-                filename = f"keepgoing_{sport_export.lower().replace(' ', '_')}"
-
-            if export_format == "JSON":
-                json_str = json.dumps(export_data, indent=2, ensure_ascii=False)
-                st.download_button(
-                    label="Télécharger JSON",
-                    data=json_str,
-                    file_name=f"{filename}.json",
-                    mime="application/json",
-                    use_container_width=True
-                )
-
-                with st.expander("Aperçu des données JSON"):
-                    st.code(json_str, language="json")
-
-            else:  # CSV
-                # Convertir en format plat pour CSV
-                csv_data = []
-                for sport_name, sport_data in export_data.items():
-                    for entry in sport_data["entries"]:
-                        csv_data.append({
-                            "Sport": sport_name,
-                            "Date": entry["date"],
-                            "Performance": entry["value"],
-                            "Unité": sport_data["unit"]
-                        })
-
-                if csv_data:
-                    df_csv = pd.DataFrame(csv_data)
-                    csv_str = df_csv.to_csv(index=False)
-
-                    st.download_button(
-                        label="📥 Télécharger CSV",
-                        data=csv_str,
-                        file_name=f"{filename}.csv",
-                        mime="text/csv",
-                        use_container_width=True
-                    )
-
-                    with st.expander("Aperçu des données CSV"):
-                        st.dataframe(df_csv, use_container_width=True)
-                else:
-                    st.info("Aucune donnée à exporter")
+            export_view(window_start, window_end, whole_history)
 
 # Sidebar avec stats et déconnexion
-render_sidebar(data)
\ No newline at end of file
+render_sidebar()
@@ -1,18 +1,46 @@
 # pages/dashboard.py
 import streamlit as st
-import pandas as pd
 import altair as alt
-from utils import (load_user_sports, calculate_stats, calculate_streak,
-                   get_weekly_progress, get_monthly_progress, get_user_level,
-                   get_activity_by_period, render_sidebar)
+from utils import (load_user_summaries, load_user_activity, get_global_summary,
+                   get_user_level, render_sidebar)
+from profiling import checkpoint
+
+
+@st.fragment
+def activity_chart():
+    """Graphique d'activité par période (changer de période ne relance que ce graphique)."""
+    st.subheader("Activité sur la période")
+
+    period_choice = st.radio("Période", ["Semaine", "Mois", "Année"], horizontal=True)
+    period_map = {"Semaine": "week", "Mois": "month", "Année": "year"}
+
+    activity_data = load_user_activity()[period_map[period_choice]]
+
+    if not activity_data.empty:
+        df_activity = activity_data.reset_index().melt(id_vars="Période", var_name="Sport", value_name="Séances")
+
+        chart = alt.Chart(df_activity).mark_bar().encode(
+            x=alt.X("Période:N", title="", sort=None),
+            y=alt.Y("sum(Séances):Q", title="Nombre de séances"),
+            color=alt.Color("Sport:N", title="Sport"),
+            tooltip=["Période", "Sport", "Séances"]
+        ).properties(height=300)
+
+        st.altair_chart(chart, use_container_width=True)
+    else:
+        st.info("Aucune donnée d'activité disponible")
+    checkpoint("dashboard.activite")
+
 
 st.title("KeepGoing - Tableau de bord")
 st.write("Suivez vos performances et progressez dans vos activités sportives")
 st.divider()
 
-data = load_user_sports()
+# Résumés agrégés par sport : les performances ne sont pas chargées sur cette page
+summaries = load_user_summaries()
+checkpoint("dashboard.chargement")
 
-if not data:
+if not summaries:
     st.info("Bienvenue sur KeepGoing ! Commencez par ajouter votre premier sport.")
     col1, col2, col3 = st.columns([1, 2, 1])
     with col2:
@@ -22,17 +50,18 @@ else:
     # Statistiques globales
     st.subheader("Statistiques globales")
 
-    total_sessions = sum(len(s["entries"]) for s in data.values())
-    week_total = sum(get_weekly_progress(s["entries"]) for s in data.values())
-    month_total = sum(get_monthly_progress(s["entries"]) for s in data.values())
-    max_streak = max([calculate_streak(s["entries"]) for s in data.values()], default=0)
+    summary = get_global_summary(summaries)
+    total_sessions = summary["total"]
+    week_total = summary["week"]
+    month_total = summary["month"]
+    max_streak = summary["best_streak"]
 
     # Niveau utilisateur
     level_info = get_user_level(total_sessions)
 
     cols = st.columns(5)
     with cols[0]:
-        st.metric("Sports actifs", len(data))
+        st.metric("Sports actifs", len(summaries))
     with cols[1]:
         st.metric("Total séances", total_sessions)
     with cols[2]:
@@ -51,30 +80,28 @@ else:
         st.success("🎉 Niveau maximum atteint !")
 
     st.divider()
+    checkpoint("dashboard.statistiques")
 
     # Cartes de sports avec bouton d'ajout de performance
     st.subheader("Vos sports")
 
     cols = st.columns(3)
-    for idx, (sport_name, sport_data) in enumerate(data.items()):
+    for idx, (sport_name, stats) in enumerate(summaries.items()):
         with cols[idx % 3]:
 
             with st.container(border=True):
                 st.subheader(sport_name)
 
-                entries = sport_data["entries"]
-
-                if entries:
-                    stats = calculate_stats(entries)
-                    streak = calculate_streak(entries)
-                    week_progress = get_weekly_progress(entries)
+                if stats["total"]:
+                    streak = stats["current_streak"]
+                    week_progress = stats["week"]
 
                     col1, col2 = st.columns(2)
                     with col1:
-                        st.metric("Dernière", f"{stats['last']} {sport_data['unit']}")
-                        st.metric("Meilleure", f"{stats['best']} {sport_data['unit']}")
+                        st.metric("Dernière", f"{stats['last']} {stats['unit']}")
+                        st.metric("Meilleure", f"{stats['best']} {stats['unit']}")
                     with col2:
-                        st.metric("Moyenne", f"{stats['avg']:.1f} {sport_data['unit']}")
+                        st.metric("Moyenne", f"{stats['avg']:.1f} {stats['unit']}")
                         st.metric("Série actuelle", f"{streak} jours")
 
                     # Barre de progression hebdomadaire
@@ -85,10 +112,10 @@ else:
                         st.caption("Aucune séance cette semaine")
 
                     # Objectif
-                    if sport_data.get("goal"):
-                        goal_progress = (stats['last'] / sport_data['goal']) * 100
+                    if stats["goal"]:
+                        goal_progress = (stats['last'] / stats['goal']) * 100
                         st.progress(min(goal_progress / 100, 1.0))
-                        st.caption(f"Objectif : {sport_data['goal']} {sport_data['unit']} ({goal_progress:.0f}%)")
+                        st.caption(f"Objectif : {stats['goal']} {stats['unit']} ({goal_progress:.0f}%)")
                 else:
                     st.info("Aucune performance enregistrée")
 
@@ -97,27 +124,11 @@ else:
                     st.session_state["selected_sport"] = sport_name
                     st.switch_page("pages/add_performance.py")
 
-    # Graphique d'activité
-    st.subheader("Activité sur la période")
-
-    period_choice = st.radio("Période", ["Semaine", "Mois", "Année"], horizontal=True)
-    period_map = {"Semaine": "week", "Mois": "month", "Année": "year"}
-
-    activity_data = get_activity_by_period(data, period_map[period_choice])
+    checkpoint("dashboard.cartes")
 
-    if activity_data:
-        df_activity = pd.DataFrame(list(activity_data.items()), columns=["Période", "Séances"])
-
-        chart = alt.Chart(df_activity).mark_bar(color="#1f77b4").encode(
-            x=alt.X("Période:N", title=""),
-            y=alt.Y("Séances:Q", title="Nombre de séances"),
-            tooltip=["Période", "Séances"]
-        ).properties(height=300)
-
-        st.altair_chart(chart, use_container_width=True)
-    else:
-        st.info("Aucune donnée d'activité disponible")
+    # Graphique d'activité
+    activity_chart()
 
     st.divider()
 # Sidebar enrichie avec statistiques complètes
-render_sidebar(data)
\ No newline at end of file
+render_sidebar()
\ No newline at end of file
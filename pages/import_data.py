@@ -0,0 +1,113 @@
+# pages/import_data.py
+import streamlit as st
+import pandas as pd
+from data_io import IMPORT_POLICIES, import_format_for, merge_imported, parse_import
+from profiling import checkpoint
+from series import EntrySeries
+from utils import load_user_sports, load_sport_entries, save_sport, import_sport_entries, render_sidebar
+
+st.title("Importer des données")
+st.write("Importez un historique au format d'export de KeepGoing (JSON, CSV, Parquet ou Arrow)")
+st.divider()
+
+data = load_user_sports()
+checkpoint("import.chargement")
+
+uploaded = st.file_uploader("Fichier à importer", type=["json", "csv", "parquet", "arrow"])
+
+if uploaded is None:
+    st.info("""
+    **Formats acceptés :**
+
+    - CSV avec les colonnes Sport, Date, Performance, Unité
+    - JSON de la forme {"Sport": {"unit": ..., "entries": [{"date": ..., "value": ...}], "goal": ...}}
+    - Parquet ou Arrow exportés depuis la page d'analyse
+    """)
+else:
+    # Le fichier n'est lu qu'une fois, pas à chaque interaction
+    parsed = st.session_state.get("import_parsed")
+    if parsed is None or parsed["file_id"] != uploaded.file_id:
+        with st.spinner("Lecture du fichier..."):
+            try:
+                sports, errors, total = parse_import(uploaded, import_format_for(uploaded.name))
+            except Exception as e:
+                st.error(f"Fichier illisible : {str(e)}")
+                st.stop()
+        parsed = {"file_id": uploaded.file_id, "sports": sports, "errors": errors, "total": total}
+        st.session_state["import_parsed"] = parsed
+        checkpoint("import.lecture")
+
+    sports = parsed["sports"]
+    valid_count = sum(len(s["entries"]) for s in sports.values())
+    st.write(f"**{parsed['total']} ligne(s) lue(s), {valid_count} performance(s) valide(s) "
+             f"pour {len(sports)} sport(s)**")
+
+    if parsed["errors"]:
+        with st.expander(f"Lignes ignorées ({len(parsed['errors'])} premières)"):
+            st.text("\n".join(parsed["errors"]))
+
+    if sports:
+        policy_label = st.radio("En cas de date déjà enregistrée", list(IMPORT_POLICIES.keys()), horizontal=True)
+        policy = IMPORT_POLICIES[policy_label]
+
+        # Résumé par sport, sans créer de widget par ligne ; seuls les sports du fichier sont chargés
+        load_sport_entries([name for name in sports if name in data])
+        plan = {}
+        summary = []
+        for name, imported in sports.items():
+            existing = data[name]["entries"] if name in data else EntrySeries()
+            upserts, conflicts = merge_imported(existing, imported["entries"], policy)
+            plan[name] = upserts
+
+            if name in data and imported["unit"] and imported["unit"] != data[name]["unit"]:
+                st.warning(f"{name} : unité du fichier ({imported['unit']}) différente de l'unité "
+                           f"enregistrée ({data[name]['unit']}), l'unité existante est conservée.")
+
+            summary.append({
+                "Sport": name,
+                "Statut": "Existant" if name in data else "Nouveau",
+                "Performances": len(imported["entries"]),
+                "Dates déjà présentes": conflicts,
+                "À écrire": len(upserts)
+            })
+
+        st.dataframe(pd.DataFrame(summary), use_container_width=True, hide_index=True)
+        checkpoint("import.resume")
+
+        to_write = sum(len(upserts) for upserts in plan.values())
+        if st.button(f"Importer {to_write} performance(s)", type="primary", use_container_width=True,
+                     disabled=to_write == 0):
+            progress = st.progress(0.0, text="Import en cours...")
+            written = 0
+            success = True
+
+            for name, upserts in plan.items():
+                if name not in data:
+                    unit = sports[name]["unit"] or "pts"
+                    if not save_sport(name, unit, sports[name]["goal"]):
+                        success = False
+                        break
+                if not upserts:
+                    continue
+
+                def report(done, offset=written, sport=name):
+                    progress.progress((offset + done) / to_write, text=f"Import de {sport} : {done}/{len(upserts)}")
+
+                if not import_sport_entries(name, upserts, report):
+                    success = False
+                    break
+                written += len(upserts)
+
+            if success:
+                progress.progress(1.0, text="Import terminé")
+                st.success(f"{written} performance(s) importée(s) avec succès !")
+                st.session_state.pop("import_parsed", None)
+                data = load_user_sports()
+            else:
+                st.error(f"Import interrompu après {written} performance(s).")
+            checkpoint("import.ecriture")
+    else:
+        st.warning("Aucune performance valide dans ce fichier.")
+
+# Sidebar avec stats et déconnexion
+render_sidebar()
@@ -0,0 +1,115 @@
+# profiling.py
+import json
+import logging
+import threading
+import time
+from functools import wraps
+
+logger = logging.getLogger("keepgoing.profiling")
+
+# Profil du rerun en cours, propre au thread qui exécute le script de la session
+_local = threading.local()
+
+
+class RerunProfile:
+    """Mesures collectées pendant un rerun : sections chronométrées et appels au stockage."""
+
+    def __init__(self, label, panel=True, log=False):
+        self.label = label
+        self.panel = panel
+        self.log = log
+        self.started = time.perf_counter()
+        self.last_checkpoint = self.started
+        self.sections = {}
+        self.backend_calls = 0
+        self.backend_ms = 0.0
+        self.backend_bytes = 0
+
+    def add(self, name, ms):
+        """Ajoute une durée (ms) à une section : nombre d'appels, total et maximum."""
+        calls, total, longest = self.sections.get(name, (0, 0.0, 0.0))
+        self.sections[name] = (calls + 1, total + ms, max(longest, ms))
+
+    def summary(self, complete=True):
+        """Retourne les mesures sous forme de dictionnaire sérialisable."""
+        return {
+            "page": self.label,
+            "complete": complete,
+            "total_ms": round((time.perf_counter() - self.started) * 1000, 3),
+            "backend_calls": self.backend_calls,
+            "backend_ms": round(self.backend_ms, 3),
+            "backend_bytes": self.backend_bytes,
+            "sections": [
+                {"name": name, "calls": calls, "total_ms": round(total, 3), "max_ms": round(longest, 3)}
+                for name, (calls, total, longest) in sorted(self.sections.items(), key=lambda s: -s[1][1])
+            ]
+        }
+
+
+def _emit(profile, complete):
+    """Écrit le profil en une ligne de log JSON."""
+    logger.info(json.dumps(profile.summary(complete), ensure_ascii=False))
+
+
+def begin_rerun(label, panel=True, log=False):
+    """Démarre le profil du rerun courant (un profil non terminé du rerun précédent est journalisé)."""
+    previous = getattr(_local, "profile", None)
+    if previous is not None and previous.log:
+        _emit(previous, complete=False)
+    _local.profile = RerunProfile(label, panel, log)
+
+
+def end_rerun():
+    """Termine le profil du rerun courant et le retourne (None si le profilage est désactivé)."""
+    profile = getattr(_local, "profile", None)
+    _local.profile = None
+    if profile is not None and profile.log:
+        _emit(profile, complete=True)
+    return profile
+
+
+def current():
+    """Retourne le profil du rerun courant, ou None."""
+    return getattr(_local, "profile", None)
+
+
+def timed(name):
+    """Décorateur : chronomètre la fonction quand un profil est actif (un seul test sinon)."""
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            profile = getattr(_local, "profile", None)
+            if profile is None:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                profile.add(name, (time.perf_counter() - start) * 1000)
+        return wrapper
+    return decorator
+
+
+def checkpoint(name):
+    """Attribue à la section name le temps écoulé depuis le checkpoint précédent (ou le début du rerun)."""
+    profile = getattr(_local, "profile", None)
+    if profile is None:
+        return
+    now = time.perf_counter()
+    profile.add(name, (now - profile.last_checkpoint) * 1000)
+    profile.last_checkpoint = now
+
+
+def record_backend_call(started, payload=None):
+    """Compte un appel au stockage commencé à started (perf_counter).
+
+    payload est une fonction retournant les données reçues ; elle n'est appelée que si le profilage est
+    actif, pour estimer le volume transféré (taille JSON).
+    """
+    profile = getattr(_local, "profile", None)
+    if profile is None:
+        return
+    profile.backend_calls += 1
+    profile.backend_ms += (time.perf_counter() - started) * 1000
+    if payload is not None:
+        profile.backend_bytes += len(json.dumps(payload(), default=str))
@@ -0,0 +1,156 @@
+# rolling.py
+import numpy as np
+import pandas as pd
+import profiling
+from downsample import record_indices
+
+# Fenêtres glissantes (jours calendaires, jour de la performance inclus)
+ROLLING_WINDOWS = {"7 jours": 7, "30 jours": 30, "90 jours": 90}
+# Jours d'historique à lire avant une période pour y calculer exactement toutes les fenêtres
+ROLLING_LOOKBACK = max(ROLLING_WINDOWS.values()) - 1
+
+# Courbes proposées sur les graphiques : (clé de l'état, fenêtre)
+ROLLING_CURVES = {
+    **{f"Moyenne {label}": ("avg", window) for label, window in ROLLING_WINDOWS.items()},
+    **{f"Meilleure {label}": ("best", window) for label, window in ROLLING_WINDOWS.items()}
+}
+
+
+def _week_index(days):
+    """Numéro de semaine (lundi) d'un nombre de jours depuis l'epoch (le 01/01/1970 est un jeudi)."""
+    return (days + 3) // 7
+
+
+@profiling.timed("rolling.compute")
+def compute_rolling(series, prior_best=None):
+    """Calcule moyennes et meilleures valeurs glissantes, records et régularité d'une série, en temps linéaire.
+
+    Les fenêtres temporelles de pandas (rolling("7D")) tiennent une somme courante pour les moyennes et
+    une file monotone pour les maximums : chaque point entre et sort une seule fois de la fenêtre.
+    prior_best : meilleure valeur des performances antérieures à une série partielle (None : aucune).
+    """
+    days = series.days
+    values = series.values
+    indexed = pd.Series(values, index=pd.DatetimeIndex(series.dates))
+
+    state = {"days": days, "values": values, "avg": {}, "best": {}}
+    for window in ROLLING_WINDOWS.values():
+        rolling = indexed.rolling(f"{window}D")
+        state["avg"][window] = rolling.mean().to_numpy()
+        state["best"][window] = rolling.max().to_numpy()
+
+    # Records : valeur strictement supérieure à tout ce qui précède (la première séance n'en est pas un)
+    if prior_best is None:
+        records = record_indices(values)
+        state["records"] = records[records > 0]
+    else:
+        records = record_indices(np.concatenate(([prior_best], values)))
+        state["records"] = records[records > 0] - 1
+
+    state.update(_aggregates(days, values))
+    if prior_best is not None and (state["record_best"] is None or prior_best > state["record_best"]):
+        state["record_best"] = prior_best
+    state["prior_best"] = prior_best
+    return state
+
+
+def _aggregates(days, values):
+    """Totaux de régularité d'une série : meilleure valeur, sommes, écarts entre séances, semaines actives."""
+    gaps = np.diff(days)
+    weeks = _week_index(days)
+    return {
+        "record_best": float(values.max()) if len(values) else None,
+        "sum": float(values.sum()),
+        "sum_sq": float(np.square(values).sum()),
+        "gap_sum": int(gaps.sum()),
+        "gap_max": int(gaps.max()) if len(gaps) else 0,
+        "active_weeks": int(np.count_nonzero(np.diff(weeks))) + 1 if len(weeks) else 0
+    }
+
+
+def _bounds(days, start, end):
+    """Indices [lo, hi) des jours compris entre start et end (dates incluses, None : pas de borne)."""
+    dates = days.astype("datetime64[D]")
+    lo = 0 if start is None else np.searchsorted(dates, np.datetime64(start, "D"), side="left")
+    hi = len(dates) if end is None else np.searchsorted(dates, np.datetime64(end, "D"), side="right")
+    return lo, hi
+
+
+def extend_rolling(state, day, value):
+    """Ajoute une performance postérieure à la dernière date d'un état, sans recalculer l'historique.
+
+    Seules les performances des fenêtres du nouveau jour sont relues (recherche par dichotomie).
+    """
+    days = np.append(state["days"], day)
+    values = np.append(state["values"], value)
+    extended = {"days": days, "values": values, "avg": {}, "best": {}, "prior_best": state.get("prior_best")}
+
+    for window, avg in state["avg"].items():
+        tail = values[np.searchsorted(days, day - window + 1):]
+        extended["avg"][window] = np.append(avg, tail.mean())
+        extended["best"][window] = np.append(state["best"][window], tail.max())
+
+    previous_best = state["record_best"]
+    is_record = previous_best is not None and value > previous_best
+    extended["records"] = np.append(state["records"], len(values) - 1) if is_record else state["records"]
+
+    gap = int(day - state["days"][-1]) if len(state["days"]) else 0
+    new_week = not len(state["days"]) or _week_index(day) != _week_index(state["days"][-1])
+    extended.update({
+        "record_best": value if previous_best is None else max(previous_best, value),
+        "sum": state["sum"] + value,
+        "sum_sq": state["sum_sq"] + value * value,
+        "gap_sum": state["gap_sum"] + gap,
+        "gap_max": max(state["gap_max"], gap),
+        "active_weeks": state["active_weeks"] + int(new_week)
+    })
+    return extended
+
+
+def trailing_average(state, window, day):
+    """Moyenne des performances des window jours se terminant le jour day (inclus), None s'il n'y en a pas."""
+    end = np.datetime64(day, "D").astype(np.int64)
+    days = state["days"]
+    values = state["values"][np.searchsorted(days, end - window + 1):np.searchsorted(days, end, side="right")]
+    return float(values.mean()) if len(values) else None
+
+
+def consistency_metrics(state, start=None, end=None):
+    """Régularité : séances par semaine, part des semaines actives, écarts entre séances, dispersion.
+
+    Sur tout l'état par défaut ; entre start et end (inclus), les totaux sont recalculés sur la période.
+    """
+    if start is not None or end is not None:
+        lo, hi = _bounds(state["days"], start, end)
+        state = {"days": state["days"][lo:hi], **_aggregates(state["days"][lo:hi], state["values"][lo:hi])}
+    count = len(state["days"])
+    if not count:
+        return {"per_week": 0.0, "active_weeks": 0.0, "mean_gap": None, "longest_gap": None, "variation": None}
+
+    span_weeks = int(_week_index(state["days"][-1]) - _week_index(state["days"][0])) + 1
+    mean = state["sum"] / count
+    variance = max(state["sum_sq"] / count - mean * mean, 0.0)
+    return {
+        "per_week": count / span_weeks,
+        "active_weeks": state["active_weeks"] / span_weeks * 100,
+        "mean_gap": state["gap_sum"] / (count - 1) if count > 1 else None,
+        "longest_gap": state["gap_max"] if count > 1 else None,
+        "variation": float(np.sqrt(variance)) / mean * 100 if mean else None
+    }
+
+
+def rolling_frame(state, curves, start=None, end=None):
+    """Retourne les courbes choisies (date, value, curve) et les records (date, value) bornés à une période."""
+    dates = state["days"].astype("datetime64[D]")
+    lo, hi = _bounds(state["days"], start, end)
+    period = pd.to_datetime(dates[lo:hi])
+
+    lines = [
+        pd.DataFrame({"date": period, "value": state[ROLLING_CURVES[curve][0]][ROLLING_CURVES[curve][1]][lo:hi],
+                      "curve": curve})
+        for curve in curves
+    ]
+    lines = pd.concat(lines, ignore_index=True) if lines else pd.DataFrame(columns=["date", "value", "curve"])
+
+    records = state["records"][(state["records"] >= lo) & (state["records"] < hi)]
+    return lines, pd.DataFrame({"date": pd.to_datetime(dates[records]), "value": state["values"][records]})
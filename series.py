@@ -0,0 +1,138 @@
+# series.py
+import numpy as np
+import pandas as pd
+import profiling
+
+
+class EntrySeries:
+    """Performances d'un sport en colonnes : dates triées (datetime64[D]) et valeurs (float64).
+
+    Les dates sont uniques : en cas de doublon, la dernière valeur enregistrée l'emporte.
+    Les dates triées servent d'index : la position d'une date est trouvée par dichotomie (O(log n)).
+    Les instances ne sont pas modifiées en place : les écritures retournent une nouvelle série, dont
+    les colonnes sont recopiées (O(n), une copie contiguë par colonne ; un lot n'en fait qu'une).
+    version : version de la ligne stockée telle que lue ou écrite par le backend (contrôle de
+    concurrence) ; None pour une série dérivée ou d'un backend sans version.
+    """
+
+    __slots__ = ("dates", "values", "version")
+
+    def __init__(self, dates=None, values=None):
+        self.dates = np.asarray(dates if dates is not None else [], dtype="datetime64[D]")
+        self.values = np.asarray(values if values is not None else [], dtype=np.float64)
+        self.version = None
+
+    @classmethod
+    def from_columns(cls, dates, values):
+        """Construit une série à partir de colonnes non triées, en dédoublonnant les dates."""
+        dates = np.asarray(dates, dtype="datetime64[D]")
+        values = np.asarray(values, dtype=np.float64)
+
+        # Données déjà triées sans doublon (lectures ordonnées par date) : pas de tri
+        if len(dates) > 1 and not (dates[1:] > dates[:-1]).all():
+            order = np.argsort(dates, kind="stable")
+            dates, values = dates[order], values[order]
+            # Garde la dernière valeur de chaque date
+            keep = np.append(dates[1:] != dates[:-1], True)
+            dates, values = dates[keep], values[keep]
+
+        return cls(dates, values)
+
+    @classmethod
+    @profiling.timed("series.from_records")
+    def from_records(cls, records):
+        """Construit une série depuis le format JSON stocké ([{"date": ..., "value": ...}])."""
+        if isinstance(records, cls):
+            return records
+        return cls.from_columns(
+            [r["date"][:10] for r in records],
+            [r["value"] for r in records]
+        )
+
+    def to_records(self):
+        """Retourne la série au format JSON stocké."""
+        return [{"date": d, "value": v} for d, v in zip(self.date_strings(), self.values.tolist())]
+
+    @profiling.timed("series.to_frame")
+    def to_frame(self):
+        """Retourne un DataFrame (date, value) trié par date."""
+        return pd.DataFrame({"date": pd.to_datetime(self.dates), "value": self.values})
+
+    def date_strings(self):
+        """Retourne les dates au format ISO (AAAA-MM-JJ)."""
+        return self.dates.astype(str).tolist()
+
+    @property
+    def days(self):
+        """Dates exprimées en nombre de jours depuis l'epoch (int64)."""
+        return self.dates.astype(np.int64)
+
+    def _locate(self, date_str):
+        """Retourne la position d'insertion d'une date et si elle est déjà présente."""
+        day = np.datetime64(date_str[:10], "D")
+        pos = int(np.searchsorted(self.dates, day))
+        return pos, pos < len(self.dates) and self.dates[pos] == day
+
+    def get(self, date_str, default=None):
+        """Retourne la valeur enregistrée à une date, ou default."""
+        pos, found = self._locate(date_str)
+        return float(self.values[pos]) if found else default
+
+    def with_entry(self, date_str, value):
+        """Retourne une nouvelle série avec la performance ajoutée ou remplacée."""
+        pos, found = self._locate(date_str)
+        if found:
+            values = self.values.copy()
+            values[pos] = value
+            return EntrySeries(self.dates, values)
+        return EntrySeries(
+            np.insert(self.dates, pos, np.datetime64(date_str[:10], "D")),
+            np.insert(self.values, pos, value)
+        )
+
+    def without_date(self, date_str):
+        """Retourne une nouvelle série sans la performance de la date donnée."""
+        pos, found = self._locate(date_str)
+        if not found:
+            return self
+        return EntrySeries(np.delete(self.dates, pos), np.delete(self.values, pos))
+
+    def with_changes(self, upserts, deletions=()):
+        """Retourne une nouvelle série avec un lot de modifications ({date: valeur}) et de suppressions.
+
+        Une date à la fois modifiée et supprimée garde la valeur modifiée ; pour un autre ordre, fusionner
+        d'abord les lots (writebehind.merge_changes).
+        """
+        changes = EntrySeries.from_columns([d[:10] for d in upserts], list(upserts.values()))
+        removed = np.unique(np.concatenate([
+            changes.dates, np.array([d[:10] for d in deletions], dtype="datetime64[D]")
+        ]))
+
+        # Positions des dates existantes à retirer (modifiées ou supprimées)
+        positions = np.minimum(np.searchsorted(self.dates, removed), max(len(self.dates) - 1, 0))
+        drop = positions[self.dates[positions] == removed] if len(self.dates) else positions[:0]
+        dates, values = np.delete(self.dates, drop), np.delete(self.values, drop)
+
+        # Fusion des dates modifiées, déjà triées, aux positions trouvées par dichotomie
+        at = np.searchsorted(dates, changes.dates)
+        return EntrySeries(np.insert(dates, at, changes.dates), np.insert(values, at, changes.values))
+
+    def between(self, start, end):
+        """Retourne la sous-série des dates comprises entre start et end (inclus, None : pas de borne)."""
+        lo = 0 if start is None else np.searchsorted(self.dates, np.datetime64(start, "D"), side="left")
+        hi = len(self.dates) if end is None else np.searchsorted(self.dates, np.datetime64(end, "D"), side="right")
+        return EntrySeries(self.dates[lo:hi], self.values[lo:hi])
+
+    def __len__(self):
+        return len(self.dates)
+
+    def __iter__(self):
+        return iter(self.to_records())
+
+    def __repr__(self):
+        return f"EntrySeries({len(self)} entrées)"
+
+
+def as_series(entries):
+    """Convertit une liste d'entrées JSON en EntrySeries si nécessaire."""
+    return entries if isinstance(entries, EntrySeries) else EntrySeries.from_records(entries or [])
@@ -0,0 +1,130 @@
+# snapshot.py
+import hashlib
+import json
+import os
+import struct
+import time
+import zlib
+from codec import pack_entries, unpack_entries
+
+# En-tête (little-endian) : signature, version du format, taille et CRC32 des métadonnées JSON
+MAGIC = b"KGSNAP"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<6sHII")
+SUFFIX = ".snap"
+
+
+class SnapshotStore:
+    """Instantanés disque des sports d'un utilisateur, pour afficher une nouvelle session sans attendre
+    le backend.
+
+    Un fichier par utilisateur : en-tête, métadonnées JSON (sports, unité, objectif, version, position,
+    taille et CRC32 des performances) puis les performances de chaque sport au format binaire de
+    codec.pack_entries. Un fichier expiré (ttl secondes), tronqué ou dont une somme de contrôle ne
+    correspond pas est ignoré et supprimé. Les plus anciens sont supprimés au-delà de max_bytes.
+    """
+
+    def __init__(self, directory, ttl=7 * 24 * 3600, max_bytes=64 * 1024 * 1024):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, user_email):
+        digest = hashlib.sha256(user_email.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, digest + SUFFIX)
+
+    def save(self, user_email, sports):
+        """Écrit l'instantané des sports ({sport: {"unit", "goal", "entries"}}) de façon atomique."""
+        blobs, meta, offset = [], {"user": user_email, "saved_at": time.time(), "sports": {}}, 0
+        for sport_name, sport in sports.items():
+            blob = pack_entries(sport["entries"])
+            meta["sports"][sport_name] = {
+                "unit": sport["unit"], "goal": sport.get("goal"), "version": sport["entries"].version,
+                "offset": offset, "length": len(blob), "crc": zlib.crc32(blob)
+            }
+            blobs.append(blob)
+            offset += len(blob)
+
+        header = json.dumps(meta, ensure_ascii=False).encode("utf-8")
+        path = self._path(user_email)
+        temp = f"{path}.{os.getpid()}.tmp"
+        with open(temp, "wb") as f:
+            f.write(HEADER.pack(MAGIC, FORMAT_VERSION, len(header), zlib.crc32(header)))
+            f.write(header)
+            for blob in blobs:
+                f.write(blob)
+        os.replace(temp, path)
+        self.cleanup()
+
+    def load(self, user_email):
+        """Retourne l'instantané d'un utilisateur ({"saved_at", "sports"}), ou None s'il est absent ou invalide."""
+        path = self._path(user_email)
+        try:
+            if time.time() - os.path.getmtime(path) > self.ttl:
+                os.remove(path)
+                return None
+            with open(path, "rb") as f:
+                content = f.read()
+        except OSError:
+            return None
+
+        try:
+            return self._decode(content, user_email)
+        except (ValueError, KeyError, struct.error):
+            # Fichier illisible : supprimé, il sera réécrit au prochain chargement complet
+            self._remove(path)
+            return None
+
+    @staticmethod
+    def _decode(content, user_email):
+        magic, version, meta_size, meta_crc = HEADER.unpack_from(content)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError("Format d'instantané inconnu")
+        header = content[HEADER.size:HEADER.size + meta_size]
+        if len(header) != meta_size or zlib.crc32(header) != meta_crc:
+            raise ValueError("Métadonnées d'instantané corrompues")
+        meta = json.loads(header)
+        if meta["user"] != user_email:
+            raise ValueError("Instantané d'un autre utilisateur")
+
+        body = memoryview(content)[HEADER.size + meta_size:]
+        sports = {}
+        for sport_name, fields in meta["sports"].items():
+            blob = bytes(body[fields["offset"]:fields["offset"] + fields["length"]])
+            if len(blob) != fields["length"] or zlib.crc32(blob) != fields["crc"]:
+                raise ValueError(f"Performances d'instantané corrompues : {sport_name}")
+            entries = unpack_entries(blob)
+            entries.version = fields["version"]
+            sports[sport_name] = {"unit": fields["unit"], "goal": fields["goal"], "entries": entries}
+        return {"saved_at": meta["saved_at"], "sports": sports}
+
+    def cleanup(self):
+        """Supprime les instantanés expirés, puis les plus anciens tant que le total dépasse max_bytes."""
+        files = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(SUFFIX):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            if time.time() - stat.st_mtime > self.ttl:
+                self._remove(path)
+            else:
+                files.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
@@ -0,0 +1,822 @@
+# storage.py
+import functools
+import json
+import logging
+import random
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from datetime import timedelta
+import httpx
+from postgrest.exceptions import APIError
+import profiling
+from codec import decode_entries, encode_entries, is_compact
+from series import EntrySeries
+
+logger = logging.getLogger("keepgoing.storage")
+
+# Taille de page des requêtes Supabase (limite par défaut de PostgREST)
+PAGE_SIZE = 1000
+
+# Erreurs réseau transitoires : une lecture est relancée, avec attente exponentielle bornée
+RETRYABLE_ERRORS = (httpx.TimeoutException, httpx.NetworkError, httpx.RemoteProtocolError)
+MAX_RETRY_DELAY = 2.0
+
+# Code PostgreSQL d'une colonne (ou d'un champ calculé) inexistante : migration pas encore appliquée
+UNDEFINED_COLUMN = "42703"
+
+# Nouvelles tentatives d'une écriture en conflit avec une écriture concurrente (mode JSON)
+CONFLICT_RETRIES = 3
+
+# Champs des résumés agrégés par la base (sous-ensemble de utils.summarize_entries, sans médiane)
+SUMMARY_FIELDS = ["total", "first", "last", "best", "worst", "avg", "current_streak", "best_streak", "week", "month"]
+
+
+class LazySport(dict):
+    """Sport du catalogue ({"unit", "goal", "count"}) dont les performances sont chargées au premier accès.
+
+    sport["entries"] appelle loader(nom) et garde le résultat ; "entries" in sport et sport.get("entries")
+    ne déclenchent pas de chargement. Si loader retourne None (échec), une série vide est retournée sans
+    être conservée.
+    """
+
+    def __init__(self, name, fields, loader):
+        super().__init__(fields)
+        self.name = name
+        self.loader = loader
+
+    def __missing__(self, key):
+        if key != "entries":
+            raise KeyError(key)
+        series = self.loader(self.name)
+        if series is None:
+            return EntrySeries()
+        self["entries"] = series
+        self["count"] = len(series)
+        return series
+
+
+class ConcurrentWriteError(RuntimeError):
+    """Écriture refusée : les performances ont été modifiées ailleurs à chaque nouvelle tentative."""
+
+
+class StorageBackend:
+    """Interface de persistance des sports et de leurs performances.
+
+    Les méthodes lèvent une exception en cas d'échec ; l'affichage des erreurs reste à la charge de utils.
+    Le paramètre current des écritures est la série connue en cache : un backend peut s'en servir
+    pour éviter une relecture, mais ne doit pas en dépendre.
+    """
+
+    # Nombre de performances écrites par requête lors d'un import (None : tout en une écriture)
+    write_batch_size = None
+
+    def load_sports(self, user_email, sport_name=None, start=None, end=None):
+        """Retourne {sport: {"unit", "entries", "goal"}} pour l'utilisateur (ou un seul de ses sports).
+
+        start et end (dates incluses, None : pas de borne) limitent les performances lues.
+        """
+        raise NotImplementedError
+
+    def load_catalog(self, user_email, sport_name=None):
+        """Retourne {sport: {"unit", "goal", "count"}} sans les performances.
+
+        Un backend qui a dû lire les performances pour les compter peut les joindre ("entries").
+        """
+        return {
+            name: {**sport, "count": len(sport["entries"])}
+            for name, sport in self.load_sports(user_email, sport_name).items()
+        }
+
+    def load_entries(self, user_email, sport_name, start=None, end=None):
+        """Retourne la série des performances d'un sport (entre start et end si précisés)."""
+        sports = self.load_sports(user_email, sport_name, start, end)
+        if sport_name not in sports:
+            raise LookupError(f"Sport introuvable : {sport_name}")
+        return sports[sport_name]["entries"]
+
+    def load_best(self, user_email, sport_name, before):
+        """Retourne la meilleure performance d'un sport avant la date before (exclue), None s'il n'y en a pas."""
+        entries = self.load_entries(user_email, sport_name, None, before - timedelta(days=1))
+        return float(entries.values.max()) if len(entries) else None
+
+    def save_sport(self, user_email, sport_name, unit, goal=None):
+        """Crée un sport sans performance."""
+        raise NotImplementedError
+
+    def update_entries(self, user_email, sport_name, series):
+        """Remplace toutes les performances d'un sport.
+
+        Retourne la série écrite avec sa nouvelle version (voir load_versions), ou None si le backend
+        ne peut pas garantir que cette version correspond exactement à la série.
+        """
+        raise NotImplementedError
+
+    def apply_changes(self, user_email, sport_name, upserts, deletions=(), current=None):
+        """Ajoute ou remplace ({date: valeur}) et supprime des performances en une écriture.
+
+        Retourne la série complète écrite avec sa nouvelle version si le backend la connaît (elle peut
+        inclure des écritures concurrentes fusionnées), sinon None. Sans current, un backend qui ne relit
+        pas les performances retourne None.
+        """
+        raise NotImplementedError
+
+    def delete_entry(self, user_email, sport_name, date_str, current=None):
+        """Supprime la performance d'une date (même retour que apply_changes)."""
+        return self.apply_changes(user_email, sport_name, {}, [date_str], current)
+
+    def load_summaries(self, user_email, today):
+        """Retourne les résumés agrégés par la base ({sport: {"unit", "goal", SUMMARY_FIELDS...}}).
+
+        None si le backend ne sait pas agréger : utils calcule alors les résumés à partir des performances.
+        """
+        return None
+
+    def load_activity(self, user_email):
+        """Retourne les séances par période ([(période, sport, début ISO, séances)]), ou None."""
+        return None
+
+    def load_versions(self, user_email):
+        """Retourne la version de chaque sport ({sport: version}), modifiée à chaque écriture de ses
+        performances, ou None si le backend n'en tient pas : sert à revalider un cache à moindre coût.
+        """
+        return None
+
+
+class InFlightReads:
+    """Lectures en cours partagées : un appel identique pendant une lecture attend son résultat."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pending = {}
+        self.generations = {}
+
+    def wrote(self, user_email):
+        """Signale une écriture terminée : les lectures suivantes ne rejoignent plus une lecture antérieure."""
+        with self.lock:
+            self.generations[user_email] = self.generations.get(user_email, 0) + 1
+
+    def run(self, key, fetch):
+        """Exécute fetch(), ou attend le résultat d'un appel de même clé déjà en cours."""
+        with self.lock:
+            future = self.pending.get(key)
+            leader = future is None
+            if leader:
+                future = self.pending[key] = Future()
+        if leader:
+            try:
+                future.set_result(fetch())
+            except BaseException as e:
+                # Les appelants en attente reçoivent la même erreur
+                future.set_exception(e)
+            finally:
+                with self.lock:
+                    del self.pending[key]
+        return future.result()
+
+
+def coalesced(method):
+    """Regroupe les appels simultanés d'une lecture avec les mêmes arguments en une seule requête.
+
+    Le résultat est partagé entre les appelants (sessions) et ne doit pas être modifié en place.
+    """
+    @functools.wraps(method)
+    def wrapper(self, user_email, *args, **kwargs):
+        # La génération de l'utilisateur sépare les lectures d'avant et d'après une écriture
+        generation = self.in_flight.generations.get(user_email, 0)
+        key = (method.__name__, user_email, generation, args, tuple(sorted(kwargs.items())))
+        return self.in_flight.run(key, lambda: method(self, user_email, *args, **kwargs))
+    return wrapper
+
+
+def writes(method):
+    """Marque une écriture : une lecture lancée ensuite n'est pas regroupée avec une lecture plus ancienne."""
+    @functools.wraps(method)
+    def wrapper(self, user_email, *args, **kwargs):
+        try:
+            return method(self, user_email, *args, **kwargs)
+        finally:
+            self.in_flight.wrote(user_email)
+    return wrapper
+
+
+class SupabaseBackend(StorageBackend):
+    """Stockage Supabase : colonne JSON sports.entries ("json") ou table sport_entries ("rows").
+
+    En mode "json", entries_format="compact" écrit la colonne au format binaire de codec.py ;
+    les lignes encore en JSON restent lisibles et sont converties à leur prochaine écriture.
+    """
+
+    def __init__(self, client, entries_mode="json", entries_format="json", read_retries=2, retry_delay=0.2):
+        self.client = client
+        self.read_retries = read_retries
+        self.retry_delay = retry_delay
+        self.in_flight = InFlightReads()
+        self.rows_mode = entries_mode == "rows"
+        self.compact = entries_format == "compact"
+        self.write_batch_size = 1000 if self.rows_mode else None
+        # Fonctionnalités des migrations facultatives, désactivées à la première colonne introuvable
+        self.migrated = {"catalog": True, "versions": True}
+
+    def _missing_migration(self, error, feature, migration):
+        """Désactive une fonctionnalité dont la migration n'est pas appliquée ; relève toute autre erreur."""
+        if error.code != UNDEFINED_COLUMN:
+            raise error
+        logger.warning("Migration %s non appliquée (%s) : mode dégradé, voir migrations/README.md",
+                       migration, error.message)
+        self.migrated[feature] = False
+
+    def _execute(self, query, read=False):
+        """Exécute une requête PostgREST en la comptant dans le profil du rerun.
+
+        Une lecture (read=True) est relancée après une erreur réseau transitoire, au plus read_retries fois.
+        """
+        attempt = 0
+        while True:
+            started = time.perf_counter()
+            try:
+                response = query.execute()
+            except RETRYABLE_ERRORS:
+                if not read or attempt >= self.read_retries:
+                    raise
+                # Attente exponentielle avec gigue, pour ne pas relancer toutes les sessions ensemble
+                time.sleep(min(self.retry_delay * 2 ** attempt, MAX_RETRY_DELAY) * random.uniform(0.5, 1.0))
+                attempt += 1
+                continue
+            profiling.record_backend_call(started, lambda: response.data)
+            return response
+
+    def _select_versioned(self, make_query, columns):
+        """Exécute la lecture make_query(colonnes) avec la colonne version (migrations/005), ou sans elle
+        si la migration n'est pas appliquée : les séries lues n'ont alors pas de version."""
+        if self.migrated["versions"]:
+            try:
+                return self._execute(make_query(columns + ", version"), read=True)
+            except APIError as e:
+                self._missing_migration(e, "versions", "005_sport_versions.sql")
+        return self._execute(make_query(columns), read=True)
+
+    def _fetch_all_rows(self, make_query):
+        """Exécute une requête paginée et retourne toutes les lignes."""
+        rows = []
+        start = 0
+        while True:
+            page = self._execute(make_query().range(start, start + PAGE_SIZE - 1), read=True).data
+            rows.extend(page)
+            if len(page) < PAGE_SIZE:
+                return rows
+            start += PAGE_SIZE
+
+    @staticmethod
+    @profiling.timed("storage.decode_json")
+    def _parse_sport_row(row):
+        """Convertit une ligne de la table sports en dictionnaire de sport."""
+        raw_entries = row.get("entries", [])
+
+        # Format compact : décodé directement en colonnes (ValueError si illisible)
+        if is_compact(raw_entries):
+            raw_entries = decode_entries(raw_entries)
+        # Accepte string JSON OU liste
+        elif isinstance(raw_entries, str):
+            try:
+                raw_entries = json.loads(raw_entries)
+            except Exception:
+                raw_entries = []
+
+        entries = EntrySeries.from_records(raw_entries or [])
+        entries.version = row.get("version")
+        return {"unit": row["unit"], "entries": entries, "goal": row.get("goal")}
+
+    @staticmethod
+    def _entry_row(user_email, sport_name, date_str, value):
+        """Construit une ligne de la table sport_entries."""
+        return {"user_email": user_email, "sport_name": sport_name, "date": date_str, "value": value}
+
+    @staticmethod
+    def _date_window(query, start, end):
+        """Restreint une requête sur sport_entries aux dates comprises entre start et end."""
+        if start is not None:
+            query = query.gte("date", start.isoformat())
+        if end is not None:
+            query = query.lte("date", end.isoformat())
+        return query
+
+    @coalesced
+    def load_sports(self, user_email, sport_name=None, start=None, end=None):
+        def make_query(columns):
+            query = self.client.table("sports").select(columns).eq("user_email", user_email)
+            return query.eq("sport_name", sport_name) if sport_name is not None else query
+
+        # Mode "rows" : versions lues avant les performances (une écriture intercalée la rend périmée, pas fausse)
+        response = self._select_versioned(make_query, "sport_name, unit, goal" if self.rows_mode
+                                          else "sport_name, unit, goal, entries")
+        data = {row["sport_name"]: self._parse_sport_row(row) for row in response.data}
+        versions = {row["sport_name"]: row.get("version") for row in response.data}
+
+        if self.rows_mode:
+            def make_query():
+                q = self.client.table("sport_entries").select("sport_name, date, value").eq("user_email", user_email)
+                if sport_name is not None:
+                    q = q.eq("sport_name", sport_name)
+                return self._date_window(q, start, end).order("sport_name").order("date")
+
+            columns = {name: ([], []) for name in data}
+            for row in self._fetch_all_rows(make_query):
+                if row["sport_name"] in columns:
+                    dates, values = columns[row["sport_name"]]
+                    dates.append(row["date"])
+                    values.append(row["value"])
+
+            for name, (dates, values) in columns.items():
+                data[name]["entries"] = EntrySeries.from_columns(dates, values)
+                if start is None and end is None:
+                    data[name]["entries"].version = versions[name]
+        elif start is not None or end is not None:
+            # Mode JSON : la colonne est lue en entier, seule la série retournée est restreinte
+            for sport in data.values():
+                sport["entries"] = sport["entries"].between(start, end)
+
+        return data
+
+    @coalesced
+    def load_catalog(self, user_email, sport_name=None):
+        if self.migrated["catalog"]:
+            # Champ calculé côté base (migrations/003_sport_catalog.sql) : seul le nombre d'entrées est transféré
+            count_field = "entry_count" if self.rows_mode else "json_entry_count"
+            query = self.client.table("sports").select(f"sport_name, unit, goal, {count_field}")
+            query = query.eq("user_email", user_email)
+            if sport_name is not None:
+                query = query.eq("sport_name", sport_name)
+            try:
+                return {
+                    row["sport_name"]: {"unit": row["unit"], "goal": row.get("goal"), "count": row[count_field] or 0}
+                    for row in self._execute(query, read=True).data
+                }
+            except APIError as e:
+                self._missing_migration(e, "catalog", "003_sport_catalog.sql")
+
+        # Sans le champ calculé : performances lues puis comptées, et jointes pour ne pas être relues
+        return {
+            name: {"unit": sport["unit"], "goal": sport.get("goal"), "count": len(sport["entries"]),
+                   "entries": sport["entries"]}
+            for name, sport in self.load_sports(user_email, sport_name).items()
+        }
+
+    @coalesced
+    def load_entries(self, user_email, sport_name, start=None, end=None):
+        if self.rows_mode:
+            whole = start is None and end is None
+            version = self._row_version(user_email, sport_name) if whole else None
+            rows = self._fetch_all_rows(lambda: self._date_window(self.client.table("sport_entries").select(
+                "date, value").eq("user_email", user_email).eq("sport_name", sport_name), start, end).order("date"))
+            series = EntrySeries.from_columns([row["date"] for row in rows], [row["value"] for row in rows])
+            series.version = version
+            return series
+
+        response = self._select_versioned(lambda columns: self.client.table("sports").select(columns).eq(
+            "user_email", user_email).eq("sport_name", sport_name), "entries")
+        if not response.data:
+            raise LookupError(f"Sport introuvable : {sport_name}")
+        entries = self._parse_sport_row({"unit": None, **response.data[0]})["entries"]
+        # Seule la série complète garde sa version : elle peut servir de base à une écriture
+        return entries if start is None and end is None else entries.between(start, end)
+
+    @coalesced
+    def load_best(self, user_email, sport_name, before):
+        if not self.rows_mode:
+            return super().load_best(user_email, sport_name, before)
+        # Mode "rows" : une seule ligne transférée (index unique user_email, sport_name, date)
+        rows = self._execute(self.client.table("sport_entries").select("value").eq("user_email", user_email).eq(
+            "sport_name", sport_name).lt("date", before.isoformat()).order("value", desc=True).limit(1), read=True).data
+        return float(rows[0]["value"]) if rows else None
+
+    @writes
+    def save_sport(self, user_email, sport_name, unit, goal=None):
+        self._execute(self.client.table("sports").insert({
+            "user_email": user_email,
+            "sport_name": sport_name,
+            "unit": unit,
+            "entries": self._encode_entries(EntrySeries()),
+            "goal": goal
+        }))
+
+    def _write_if_version(self, user_email, sport_name, series, version):
+        """Écrit la colonne entries si la ligne est toujours à la version donnée, en une requête.
+
+        Retourne la série avec sa nouvelle version (incrémentée par la base), ou None en cas de conflit.
+        """
+        rows = self._execute(self.client.table("sports").update({
+            "entries": self._encode_entries(series)
+        }).eq("user_email", user_email).eq("sport_name", sport_name).eq("version", version)).data
+        if not rows:
+            return None
+        series.version = rows[0]["version"]
+        return series
+
+    def _encode_entries(self, series):
+        """Encode une série pour la colonne sports.entries selon le format configuré."""
+        return encode_entries(series) if self.compact else json.dumps(series.to_records())
+
+    @writes
+    def update_entries(self, user_email, sport_name, series):
+        if not self.rows_mode:
+            # Remplacement inconditionnel (la dernière écriture l'emporte) : l'application passe par
+            # apply_changes, conditionnel à la version ; seul son mode dégradé (sans 005) l'utilise
+            rows = self._execute(self.client.table("sports").update({
+                "entries": self._encode_entries(series)
+            }).eq("user_email", user_email).eq("sport_name", sport_name)).data
+            # Ligne retournée par PostgREST : version incrémentée par le déclencheur de migrations/005
+            return self._with_version(series, rows[0].get("version") if rows else None)
+
+        before = self._row_version(user_email, sport_name)
+        statements = 0
+        records = series.to_records()
+
+        if records:
+            self._execute(self.client.table("sport_entries").upsert(
+                [self._entry_row(user_email, sport_name, e["date"], e["value"]) for e in records],
+                on_conflict="user_email,sport_name,date"
+            ))
+            statements += 1
+
+        # Supprime les dates absentes de la nouvelle série
+        kept = {e["date"] for e in records}
+        stored = self._fetch_all_rows(lambda: self.client.table("sport_entries").select("date").eq(
+            "user_email", user_email).eq("sport_name", sport_name).order("date"))
+        removed = [row["date"] for row in stored if row["date"] not in kept]
+        if removed:
+            self._execute(self.client.table("sport_entries").delete().eq("user_email", user_email).eq(
+                "sport_name", sport_name).in_("date", removed))
+            statements += 1
+
+        return self._written_rows(user_email, sport_name, series, before, statements)
+
+    @writes
+    def apply_changes(self, user_email, sport_name, upserts, deletions=(), current=None):
+        if not self.rows_mode:
+            # Mode JSON : la colonne entries est réécrite en entier, à condition que sa version n'ait pas
+            # changé depuis la lecture de current (migrations/005_sport_versions.sql). En cas de conflit,
+            # le lot est réappliqué par date sur la version relue.
+            for _ in range(CONFLICT_RETRIES + 1):
+                if not self.migrated["versions"]:
+                    break
+                if current is None or current.version is None:
+                    current = self.load_entries(user_email, sport_name)
+                    if current.version is None:
+                        break
+                try:
+                    written = self._write_if_version(user_email, sport_name,
+                                                     current.with_changes(upserts, deletions), current.version)
+                except APIError as e:
+                    self._missing_migration(e, "versions", "005_sport_versions.sql")
+                    break
+                if written is not None:
+                    return written
+                current = None
+            else:
+                raise ConcurrentWriteError(f"{sport_name} est modifié ailleurs en même temps, réessayez")
+
+            # Sans migrations/005 : lecture puis réécriture complète, sans contrôle de concurrence
+            series = (current if current is not None else self.load_entries(user_email, sport_name))
+            series = series.with_changes(upserts, deletions)
+            self.update_entries(user_email, sport_name, series)
+            return series
+
+        statements = 0
+        if upserts:
+            self._execute(self.client.table("sport_entries").upsert(
+                [self._entry_row(user_email, sport_name, d, v) for d, v in upserts.items()],
+                on_conflict="user_email,sport_name,date"
+            ))
+            statements += 1
+        if deletions:
+            self._execute(self.client.table("sport_entries").delete().eq("user_email", user_email).eq(
+                "sport_name", sport_name).in_("date", list(deletions)))
+            statements += 1
+
+        if current is None or current.version is None:
+            return None
+        return self._written_rows(user_email, sport_name, current.with_changes(upserts, deletions),
+                                  current.version, statements)
+
+    @staticmethod
+    def _with_version(series, version):
+        """Retourne la série écrite (mêmes colonnes, instance distincte) avec sa nouvelle version."""
+        written = EntrySeries(series.dates, series.values)
+        written.version = version
+        return written
+
+    def _row_version(self, user_email, sport_name):
+        """Retourne la version courante d'un sport (None sans migrations/005 ou si le sport n'existe pas)."""
+        if not self.migrated["versions"]:
+            return None
+        try:
+            rows = self._execute(self.client.table("sports").select("version").eq(
+                "user_email", user_email).eq("sport_name", sport_name), read=True).data
+        except APIError as e:
+            self._missing_migration(e, "versions", "005_sport_versions.sql")
+            return None
+        return rows[0]["version"] if rows else None
+
+    def _written_rows(self, user_email, sport_name, series, before, statements):
+        """Mode "rows" : retourne la série écrite avec la version atteinte après ses requêtes d'écriture.
+
+        before : version de la série de départ. Le déclencheur de migrations/006 incrémente la version
+        une fois par requête : si elle n'a pas avancé d'exactement `statements` depuis before, une autre
+        écriture s'est intercalée (ou 006 n'est pas appliquée) et la série n'est pas retournée.
+        """
+        if before is None:
+            return None
+        after = self._row_version(user_email, sport_name)
+        return self._with_version(series, after) if after == before + statements else None
+
+    @coalesced
+    def load_summaries(self, user_email, today):
+        if not self.rows_mode:
+            return None
+        rows = self._execute(self.client.rpc("sport_summaries", {
+            "p_user_email": user_email, "p_today": today.isoformat()
+        }), read=True).data
+        return {
+            row["sport_name"]: {"unit": row["unit"], "goal": row["goal"], **{f: row[f] for f in SUMMARY_FIELDS}}
+            for row in rows
+        }
+
+    @coalesced
+    def load_activity(self, user_email):
+        if not self.rows_mode:
+            return None
+        rows = self._execute(self.client.rpc("sport_activity", {"p_user_email": user_email}), read=True).data
+        return [(row["period"], row["sport_name"], row["start"], row["sessions"]) for row in rows]
+
+    @coalesced
+    def load_versions(self, user_email):
+        # Colonne sports.version (migrations/005 et 006) : une ligne courte par sport
+        if not self.migrated["versions"]:
+            return None
+        query = self.client.table("sports").select("sport_name, version").eq("user_email", user_email)
+        try:
+            rows = self._execute(query, read=True).data
+        except APIError as e:
+            self._missing_migration(e, "versions", "005_sport_versions.sql")
+            return None
+        return {row["sport_name"]: row["version"] for row in rows}
+
+    @writes
+    def delete_entry(self, user_email, sport_name, date_str, current=None):
+        # Mode JSON : écriture conditionnelle à la version, un cache périmé est détecté sans relecture
+        return self.apply_changes(user_email, sport_name, {}, [date_str], current)
+
+
+class SQLiteBackend(StorageBackend):
+    """Stockage local SQLite (mode WAL), une ligne par performance indexée par (utilisateur, sport, date)."""
+
+    write_batch_size = 5000
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS sports (
+            user_email TEXT NOT NULL,
+            sport_name TEXT NOT NULL,
+            unit       TEXT NOT NULL,
+            goal       REAL,
+            version    INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (user_email, sport_name)
+        ) WITHOUT ROWID;
+
+        CREATE TABLE IF NOT EXISTS sport_entries (
+            user_email TEXT NOT NULL,
+            sport_name TEXT NOT NULL,
+            date       TEXT NOT NULL,
+            value      REAL NOT NULL,
+            PRIMARY KEY (user_email, sport_name, date)
+        ) WITHOUT ROWID;
+    """
+
+    # Mêmes agrégats que les fonctions SQL de migrations/002_sport_summaries.sql
+    SUMMARY_QUERY = """
+        WITH entries AS (
+            SELECT sport_name, date, value,
+                   row_number() OVER (PARTITION BY sport_name ORDER BY date) AS rank_asc,
+                   row_number() OVER (PARTITION BY sport_name ORDER BY date DESC) AS rank_desc,
+                   julianday(date) - row_number() OVER (PARTITION BY sport_name ORDER BY date) AS run
+            FROM sport_entries
+            WHERE user_email = :user
+        ),
+        runs AS (
+            SELECT sport_name, count(*) AS length, max(date) AS run_end
+            FROM entries
+            GROUP BY sport_name, run
+        ),
+        streaks AS (
+            SELECT sport_name,
+                   max(length) AS best_streak,
+                   coalesce(max(CASE WHEN run_end >= date(:today, '-1 day') THEN length END), 0) AS current_streak
+            FROM runs
+            GROUP BY sport_name
+        ),
+        stats AS (
+            SELECT sport_name,
+                   count(*) AS total,
+                   max(CASE WHEN rank_asc = 1 THEN value END) AS first,
+                   max(CASE WHEN rank_desc = 1 THEN value END) AS last,
+                   max(value) AS best,
+                   min(value) AS worst,
+                   avg(value) AS avg,
+                   sum(date >= date(:today, '-7 days')) AS week,
+                   sum(date >= date(:today, 'start of month')) AS month
+            FROM entries
+            GROUP BY sport_name
+        )
+        SELECT s.sport_name, s.unit, s.goal,
+               coalesce(st.total, 0), st.first, st.last, st.best, st.worst, st.avg,
+               coalesce(k.current_streak, 0), coalesce(k.best_streak, 0),
+               coalesce(st.week, 0), coalesce(st.month, 0)
+        FROM sports s
+        LEFT JOIN stats st ON st.sport_name = s.sport_name
+        LEFT JOIN streaks k ON k.sport_name = s.sport_name
+        WHERE s.user_email = :user
+    """
+
+    ACTIVITY_QUERY = """
+        SELECT 'week', sport_name, date(date, '-' || ((strftime('%w', date) + 6) % 7) || ' days') AS start, count(*)
+        FROM sport_entries WHERE user_email = :user GROUP BY sport_name, start
+        UNION ALL
+        SELECT 'month', sport_name, strftime('%Y-%m-01', date) AS start, count(*)
+        FROM sport_entries WHERE user_email = :user GROUP BY sport_name, start
+        UNION ALL
+        SELECT 'year', sport_name, strftime('%Y-01-01', date) AS start, count(*)
+        FROM sport_entries WHERE user_email = :user GROUP BY sport_name, start
+    """
+
+    def __init__(self, path="keepgoing.db"):
+        self.path = path
+        # Une connexion partagée par le processus : Streamlit exécute chaque rerun dans un nouveau thread
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(self.SCHEMA)
+        # Bases créées avant la colonne version
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(sports)")]
+        if "version" not in columns:
+            self._conn.execute("ALTER TABLE sports ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+
+    @staticmethod
+    def _bump_version(conn, user_email, sport_name):
+        """Incrémente la version d'un sport dans la transaction d'écriture de ses performances et la retourne."""
+        conn.execute("UPDATE sports SET version = version + 1 WHERE user_email = ? AND sport_name = ?",
+                     (user_email, sport_name))
+        row = conn.execute("SELECT version FROM sports WHERE user_email = ? AND sport_name = ?",
+                           (user_email, sport_name)).fetchone()
+        return row[0] if row is not None else None
+
+    @staticmethod
+    def _date_window(start, end):
+        """Retourne la condition SQL et les paramètres limitant les dates entre start et end."""
+        clause, params = "", ()
+        if start is not None:
+            clause, params = clause + " AND date >= ?", params + (start.isoformat(),)
+        if end is not None:
+            clause, params = clause + " AND date <= ?", params + (end.isoformat(),)
+        return clause, params
+
+    def load_sports(self, user_email, sport_name=None, start=None, end=None):
+        where = "user_email = ?" + (" AND sport_name = ?" if sport_name is not None else "")
+        params = (user_email,) if sport_name is None else (user_email, sport_name)
+        window, window_params = self._date_window(start, end)
+
+        started = time.perf_counter()
+        with self._lock:
+            # Versions lues avant les performances : une écriture intercalée rend la version périmée, pas fausse
+            sports = self._conn.execute(f"SELECT sport_name, unit, goal, version FROM sports WHERE {where}",
+                                        params).fetchall()
+            rows = self._conn.execute(
+                f"SELECT sport_name, date, value FROM sport_entries WHERE {where}{window} ORDER BY sport_name, date",
+                params + window_params
+            ).fetchall()
+        profiling.record_backend_call(started, lambda: (sports, rows))
+
+        data = {name: {"unit": unit, "entries": EntrySeries(), "goal": goal} for name, unit, goal, _ in sports}
+        columns = {name: ([], []) for name in data}
+        for name, day, value in rows:
+            if name in columns:
+                columns[name][0].append(day)
+                columns[name][1].append(value)
+
+        versions = {name: version for name, _, _, version in sports}
+        for name, (dates, values) in columns.items():
+            data[name]["entries"] = EntrySeries(dates, values)
+            # Seule la série complète garde sa version : elle sert à vérifier les écritures suivantes
+            if start is None and end is None:
+                data[name]["entries"].version = versions[name]
+        return data
+
+    def load_best(self, user_email, sport_name, before):
+        started = time.perf_counter()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT MAX(value) FROM sport_entries WHERE user_email = ? AND sport_name = ? AND date < ?",
+                (user_email, sport_name, before.isoformat())
+            ).fetchone()
+        profiling.record_backend_call(started, lambda: row)
+        return row[0]
+
+    def load_catalog(self, user_email, sport_name=None):
+        where = "s.user_email = ?" + (" AND s.sport_name = ?" if sport_name is not None else "")
+        params = (user_email,) if sport_name is None else (user_email, sport_name)
+
+        started = time.perf_counter()
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT s.sport_name, s.unit, s.goal, (SELECT count(*) FROM sport_entries e "
+                f"WHERE e.user_email = s.user_email AND e.sport_name = s.sport_name) FROM sports s WHERE {where}",
+                params
+            ).fetchall()
+        profiling.record_backend_call(started, lambda: rows)
+        return {name: {"unit": unit, "goal": goal, "count": count} for name, unit, goal, count in rows}
+
+    def load_entries(self, user_email, sport_name, start=None, end=None):
+        window, window_params = self._date_window(start, end)
+
+        started = time.perf_counter()
+        with self._lock:
+            version = self._conn.execute("SELECT version FROM sports WHERE user_email = ? AND sport_name = ?",
+                                         (user_email, sport_name)).fetchone()
+            rows = self._conn.execute(
+                f"SELECT date, value FROM sport_entries WHERE user_email = ? AND sport_name = ?{window} ORDER BY date",
+                (user_email, sport_name) + window_params
+            ).fetchall()
+        profiling.record_backend_call(started, lambda: rows)
+        series = EntrySeries([day for day, _ in rows], [value for _, value in rows])
+        if start is None and end is None and version is not None:
+            series.version = version[0]
+        return series
+
+    def save_sport(self, user_email, sport_name, unit, goal=None):
+        with self._lock, self._conn as conn:
+            conn.execute(
+                "INSERT INTO sports (user_email, sport_name, unit, goal) VALUES (?, ?, ?, ?)",
+                (user_email, sport_name, unit, goal)
+            )
+
+    def update_entries(self, user_email, sport_name, series):
+        with self._lock, self._conn as conn:
+            conn.execute("DELETE FROM sport_entries WHERE user_email = ? AND sport_name = ?",
+                         (user_email, sport_name))
+            conn.executemany(
+                "INSERT INTO sport_entries (user_email, sport_name, date, value) VALUES (?, ?, ?, ?)",
+                ((user_email, sport_name, d, v) for d, v in zip(series.date_strings(), series.values.tolist()))
+            )
+            version = self._bump_version(conn, user_email, sport_name)
+        written = EntrySeries(series.dates, series.values)
+        written.version = version
+        return written
+
+    def apply_changes(self, user_email, sport_name, upserts, deletions=(), current=None):
+        with self._lock, self._conn as conn:
+            before = conn.execute("SELECT version FROM sports WHERE user_email = ? AND sport_name = ?",
+                                  (user_email, sport_name)).fetchone()
+            conn.executemany(
+                "INSERT INTO sport_entries (user_email, sport_name, date, value) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (user_email, sport_name, date) DO UPDATE SET value = excluded.value",
+                ((user_email, sport_name, d, v) for d, v in upserts.items())
+            )
+            conn.executemany(
+                "DELETE FROM sport_entries WHERE user_email = ? AND sport_name = ? AND date = ?",
+                ((user_email, sport_name, d) for d in deletions)
+            )
+            version = self._bump_version(conn, user_email, sport_name)
+        # current à jour avant l'écriture (même version, lue dans la transaction) : la nouvelle version
+        # correspond exactement à current modifiée par le lot ; sinon la série n'est pas connue
+        if current is None or current.version is None or before is None or current.version != before[0]:
+            return None
+        written = current.with_changes(upserts, deletions)
+        written.version = version
+        return written
+
+    def load_summaries(self, user_email, today):
+        started = time.perf_counter()
+        with self._lock:
+            rows = self._conn.execute(self.SUMMARY_QUERY, {"user": user_email, "today": today.isoformat()}).fetchall()
+        profiling.record_backend_call(started, lambda: rows)
+
+        return {
+            name: {"unit": unit, "goal": goal, **dict(zip(SUMMARY_FIELDS, values))}
+            for name, unit, goal, *values in rows
+        }
+
+    def load_activity(self, user_email):
+        started = time.perf_counter()
+        with self._lock:
+            rows = self._conn.execute(self.ACTIVITY_QUERY, {"user": user_email}).fetchall()
+        profiling.record_backend_call(started, lambda: rows)
+        return rows
+
+    def load_versions(self, user_email):
+        started = time.perf_counter()
+        with self._lock:
+            rows = self._conn.execute("SELECT sport_name, version FROM sports WHERE user_email = ?",
+                                      (user_email,)).fetchall()
+        profiling.record_backend_call(started, lambda: rows)
+        return dict(rows)
@@ -0,0 +1,6 @@
+# tests/conftest.py
+import os
+import sys
+
+# Modules de l'application à la racine du dépôt (pytest lancé depuis la racine ou depuis tests/)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
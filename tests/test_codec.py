@@ -0,0 +1,94 @@
+# tests/test_codec.py
+"""Format compact "KG1:" de la colonne sports.entries : aller-retour exact et refus des valeurs illisibles."""
+import base64
+
+import numpy as np
+import pytest
+
+from codec import HEADER, decode_entries, encode_entries, is_compact, pack_entries, unpack_entries
+from series import EntrySeries
+
+
+def round_trip(series):
+    raw = encode_entries(series)
+    assert is_compact(raw)
+    return decode_entries(raw)
+
+
+def assert_same(decoded, series):
+    assert decoded.dates.dtype == np.dtype("datetime64[D]")
+    assert decoded.values.dtype == np.float64
+    np.testing.assert_array_equal(decoded.dates, series.dates)
+    np.testing.assert_array_equal(decoded.values, series.values)
+
+
+def test_empty_series():
+    decoded = round_trip(EntrySeries())
+    assert len(decoded) == 0
+    assert decoded.to_records() == []
+
+
+@pytest.mark.parametrize("values, value_size", [
+    ([10.0, 12.5, 0.25], 4),        # exacts en float32 : stockés sur 4 octets
+    ([10.1, 1 / 3, 1e300], 8),      # non représentables en float32 : stockés sur 8 octets
+])
+def test_float32_and_float64_values(values, value_size):
+    series = EntrySeries.from_records([
+        {"date": f"2024-01-0{i + 1}", "value": value} for i, value in enumerate(values)
+    ])
+    assert HEADER.unpack_from(pack_entries(series))[3] == value_size
+    assert_same(round_trip(series), series)
+
+
+@pytest.mark.parametrize("dates, delta_size", [
+    (["2024-01-01", "2024-01-02", "2024-09-01"], 1),
+    (["2024-01-01", "2024-01-02", "2100-01-01"], 2),
+    (["1900-01-01", "2024-01-01", "9999-12-31"], 4),
+])
+def test_wide_date_gaps(dates, delta_size):
+    series = EntrySeries.from_records([{"date": date, "value": 1.0} for date in dates])
+    assert HEADER.unpack_from(pack_entries(series))[2] == delta_size
+    assert_same(round_trip(series), series)
+
+
+def test_dates_before_1970():
+    series = EntrySeries.from_records([
+        {"date": "1901-03-04", "value": 2.0}, {"date": "1969-12-31", "value": 3.0},
+        {"date": "1970-01-01", "value": 4.0}, {"date": "1970-01-02", "value": 5.0}
+    ])
+    decoded = round_trip(series)
+    assert_same(decoded, series)
+    assert decoded.date_strings()[:2] == ["1901-03-04", "1969-12-31"]
+
+
+def test_truncated_payloads_are_rejected():
+    series = EntrySeries.from_records([{"date": "2024-01-01", "value": 1.5}, {"date": "2024-01-03", "value": 2.5}])
+    payload = pack_entries(series)
+    # En-tête incomplet, écarts ou valeurs manquants
+    for size in (0, HEADER.size - 1, HEADER.size, len(payload) - 1):
+        with pytest.raises(ValueError):
+            unpack_entries(payload[:size])
+    # Contenu en trop : pas une série plus courte
+    with pytest.raises(ValueError):
+        unpack_entries(payload + b"\0")
+
+    raw = encode_entries(series)
+    with pytest.raises(ValueError):
+        decode_entries(raw[:-4])
+
+
+def test_invalid_sizes_and_base64_are_rejected():
+    with pytest.raises(ValueError):
+        unpack_entries(HEADER.pack(1, 0, 3, 8) + bytes(8))
+    with pytest.raises(ValueError):
+        decode_entries("KG1:not base64!")
+
+
+def test_unknown_versions_are_rejected():
+    payload = base64.b64encode(pack_entries(EntrySeries())).decode("ascii")
+    for raw in (f"KG2:{payload}", f"KG0:{payload}", f"KG:{payload}", '[{"date": "2024-01-01", "value": 1}]'):
+        with pytest.raises(ValueError, match="Format de performances inconnu"):
+            decode_entries(raw)
+    # Une version inconnue reste reconnue comme compacte : elle n'est pas relue comme du JSON
+    assert is_compact(f"KG2:{payload}")
+    assert not is_compact('[{"date": "2024-01-01", "value": 1}]')
@@ -0,0 +1,42 @@
+# tests/test_downsample.py
+"""Préparation des séries pour les graphiques : budget de points et courbes superposées."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from downsample import AGGREGATIONS, DEFAULT_MAX_POINTS, RAW_POINTS_FACTOR, prepare_chart_frame, prepare_grouped_frame
+
+
+def frame(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({"date": pd.date_range("2020-01-01", periods=n, freq="D"), "value": rng.random(n) * 100})
+
+
+@pytest.mark.parametrize("mode", list(AGGREGATIONS))
+def test_grouped_frame_keeps_each_curve(mode):
+    names = ["Moyenne 7 jours", "Meilleure 30 jours"]
+    curves = pd.concat([frame(2000, seed).assign(curve=name) for seed, name in enumerate(names)], ignore_index=True)
+
+    prepared = prepare_grouped_frame(curves, "curve", mode)
+
+    assert list(prepared["curve"].unique()) == names
+    assert prepared["curve"].notna().all()
+    for name, group in prepared.groupby("curve"):
+        expected = prepare_chart_frame(curves[curves["curve"] == name], mode)
+        assert group["value"].tolist() == expected["value"].tolist()
+
+
+def test_grouped_frame_of_empty_frame_is_empty():
+    empty = pd.DataFrame(columns=["date", "value", "curve"])
+    assert prepare_grouped_frame(empty, "curve", "Mensuelle (meilleure)").empty
+
+
+@pytest.mark.parametrize("mode", list(AGGREGATIONS))
+def test_chart_frame_stays_within_budget(mode):
+    budget = DEFAULT_MAX_POINTS * (RAW_POINTS_FACTOR if AGGREGATIONS[mode] == "raw" else 1)
+    df = frame(budget * 3)
+
+    prepared = prepare_chart_frame(df, mode)
+
+    assert 0 < len(prepared) <= budget
+    assert prepared["value"].max() == df["value"].max()
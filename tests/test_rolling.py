@@ -0,0 +1,65 @@
+# tests/test_rolling.py
+"""Analyses glissantes d'une période lue sans l'historique complet : mêmes courbes et mêmes records."""
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+from rolling import ROLLING_CURVES, ROLLING_LOOKBACK, compute_rolling, consistency_metrics, rolling_frame
+from series import EntrySeries
+from storage import SQLiteBackend
+
+USER = "test@example.com"
+START, END = date(2024, 3, 1), date(2024, 6, 30)
+
+
+@pytest.fixture
+def history():
+    # Meilleure performance ancienne (100), puis un maximum local (80) sur la période : pas un record
+    rng = np.random.default_rng(0)
+    days = np.sort(rng.choice(np.arange(18500, 19900), 600, replace=False))
+    values = rng.random(600) * 50
+    values[np.argmax(days >= np.datetime64("2023-01-01").astype(np.int64))] = 100.0
+    values[np.argmax(days >= np.datetime64("2024-05-01").astype(np.int64))] = 80.0
+    return EntrySeries.from_columns([str(np.datetime64(int(d), "D")) for d in days], values)
+
+
+def windowed(history, prior_best):
+    lookback_start = START - timedelta(days=ROLLING_LOOKBACK)
+    return compute_rolling(history.between(lookback_start, END), prior_best)
+
+
+def test_window_with_lookback_matches_full_history(history):
+    full = compute_rolling(history)
+    prior = history.between(None, START - timedelta(days=ROLLING_LOOKBACK + 1))
+    part = windowed(history, float(prior.values.max()))
+
+    full_curves, full_records = rolling_frame(full, list(ROLLING_CURVES), START, END)
+    part_curves, part_records = rolling_frame(part, list(ROLLING_CURVES), START, END)
+
+    assert np.allclose(full_curves["value"], part_curves["value"])
+    assert full_records.equals(part_records)
+    assert consistency_metrics(full, START, END) == consistency_metrics(part, START, END)
+
+
+def test_records_need_the_prior_best(history):
+    # Sans la meilleure performance antérieure, tout maximum local de la période passe pour un record
+    _, unseeded = rolling_frame(windowed(history, None), [], START, END)
+    _, full = rolling_frame(compute_rolling(history), [], START, END)
+    assert len(full) == 0
+    assert len(unseeded) > 0
+
+
+def test_sqlite_best_before_seeds_the_records(tmp_path, history):
+    backend = SQLiteBackend(str(tmp_path / "test.db"))
+    backend.save_sport(USER, "Course", "km")
+    backend.update_entries(USER, "Course", history)
+    lookback_start = START - timedelta(days=ROLLING_LOOKBACK)
+
+    best = backend.load_best(USER, "Course", lookback_start)
+
+    assert best == float(history.between(None, lookback_start - timedelta(days=1)).values.max())
+    assert backend.load_best(USER, "Course", date(1990, 1, 1)) is None
+    _, records = rolling_frame(windowed(history, best), [], START, END)
+    _, full = rolling_frame(compute_rolling(history), [], START, END)
+    assert records.equals(full)
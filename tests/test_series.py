@@ -0,0 +1,56 @@
+# tests/test_series.py
+"""Écritures par lot sur EntrySeries : doublons, suppressions absentes et série vide."""
+import numpy as np
+
+from series import EntrySeries
+
+
+def make_series(*pairs):
+    return EntrySeries.from_records([{"date": date, "value": value} for date, value in pairs])
+
+
+def test_with_changes_duplicate_dates_keep_the_last_value():
+    series = make_series(("2024-01-01", 1.0), ("2024-01-03", 3.0))
+    # Deux clés pour le même jour (date seule et horodatage) : la dernière l'emporte
+    changed = series.with_changes({"2024-01-02": 2.0, "2024-01-02T18:30:00": 2.5, "2024-01-03": 4.0},
+                                  ["2024-01-01", "2024-01-01"])
+
+    assert changed.to_records() == [{"date": "2024-01-02", "value": 2.5}, {"date": "2024-01-03", "value": 4.0}]
+    assert (changed.dates[1:] > changed.dates[:-1]).all()
+
+
+def test_with_changes_upsert_wins_over_deletion_of_the_same_date():
+    series = make_series(("2024-01-01", 1.0))
+    assert series.with_changes({"2024-01-01": 5.0}, ["2024-01-01"]).to_records() == [{"date": "2024-01-01", "value": 5.0}]
+
+
+def test_with_changes_ignores_absent_deletions():
+    series = make_series(("2024-01-02", 2.0), ("2024-01-04", 4.0))
+    # Avant, entre et après les dates existantes
+    changed = series.with_changes({}, ["2023-12-31", "2024-01-03", "2024-02-01"])
+
+    assert changed.to_records() == series.to_records()
+    assert series.with_changes({"2024-01-03": 3.0}, ["2024-01-05"]).date_strings() == [
+        "2024-01-02", "2024-01-03", "2024-01-04"
+    ]
+
+
+def test_with_changes_on_the_empty_series():
+    empty = EntrySeries()
+
+    assert len(empty.with_changes({})) == 0
+    assert len(empty.with_changes({}, ["2024-01-01"])) == 0
+    changed = empty.with_changes({"2024-01-02": 2.0, "2024-01-01": 1.0}, ["2024-01-03"])
+    assert changed.to_records() == [{"date": "2024-01-01", "value": 1.0}, {"date": "2024-01-02", "value": 2.0}]
+    assert changed.values.dtype == np.float64
+    # Tout supprimer donne la série vide
+    assert len(changed.with_changes({}, ["2024-01-01", "2024-01-02"])) == 0
+
+
+def test_with_changes_does_not_modify_the_series():
+    series = make_series(("2024-01-01", 1.0), ("2024-01-02", 2.0))
+    series.version = 3
+    changed = series.with_changes({"2024-01-01": 9.0}, ["2024-01-02"])
+
+    assert series.to_records() == [{"date": "2024-01-01", "value": 1.0}, {"date": "2024-01-02", "value": 2.0}]
+    assert series.version == 3 and changed.version is None
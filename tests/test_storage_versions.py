@@ -0,0 +1,60 @@
+# tests/test_storage_versions.py
+"""Versions retournées par les écritures : une session qui vient d'écrire n'a pas à relire le sport."""
+from datetime import date
+
+import pytest
+
+from series import EntrySeries
+from storage import SQLiteBackend
+
+USER = "test@example.com"
+
+
+@pytest.fixture
+def backend(tmp_path):
+    backend = SQLiteBackend(str(tmp_path / "test.db"))
+    backend.save_sport(USER, "Course", "km")
+    backend.update_entries(USER, "Course", EntrySeries.from_records([
+        {"date": "2024-01-01", "value": 5.0}, {"date": "2024-01-03", "value": 6.0}
+    ]))
+    return backend
+
+
+def test_reads_carry_the_stored_version(backend):
+    versions = backend.load_versions(USER)
+    assert backend.load_entries(USER, "Course").version == versions["Course"]
+    assert backend.load_sports(USER)["Course"]["entries"].version == versions["Course"]
+    # Une période n'est pas la série stockée : pas de version
+    assert backend.load_entries(USER, "Course", end=date(2024, 1, 2)).version is None
+    assert backend.load_sports(USER, start=date(2024, 1, 2))["Course"]["entries"].version is None
+
+
+def test_update_entries_returns_the_new_version(backend):
+    series = EntrySeries.from_records([{"date": "2024-02-01", "value": 7.0}])
+    written = backend.update_entries(USER, "Course", series)
+
+    assert written.version == backend.load_versions(USER)["Course"]
+    assert written.date_strings() == ["2024-02-01"]
+    # La série passée n'est pas modifiée
+    assert series.version is None
+
+
+def test_apply_changes_returns_the_written_series_and_version(backend):
+    current = backend.load_entries(USER, "Course")
+    written = backend.apply_changes(USER, "Course", {"2024-01-05": 8.0}, ["2024-01-01"], current)
+
+    assert written.version == current.version + 1 == backend.load_versions(USER)["Course"]
+    assert written.to_records() == backend.load_entries(USER, "Course").to_records()
+
+    deleted = backend.delete_entry(USER, "Course", "2024-01-03", written)
+    assert deleted.version == backend.load_versions(USER)["Course"]
+    assert deleted.date_strings() == ["2024-01-05"]
+
+
+def test_stale_or_missing_current_returns_none(backend):
+    current = backend.load_entries(USER, "Course")
+    # Écriture d'une autre session entre la lecture et l'écriture
+    backend.apply_changes(USER, "Course", {"2024-01-04": 1.0})
+
+    assert backend.apply_changes(USER, "Course", {"2024-01-06": 2.0}, current=current) is None
+    assert backend.apply_changes(USER, "Course", {"2024-01-07": 3.0}) is None
@@ -0,0 +1,149 @@
+# tests/test_supabase_reads.py
+"""Lectures Supabase contre un serveur PostgREST de substitution local : regroupement des lectures
+simultanées, séparation par les écritures, connexions réutilisées et relance des lectures."""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+from supabase import ClientOptions, create_client
+
+import utils
+from storage import SupabaseBackend
+
+USER = "test@example.com"
+CATALOG = [{"sport_name": "Course", "unit": "km", "goal": None, "json_entry_count": 3}]
+
+
+class StandIn(BaseHTTPRequestHandler):
+    """Répond au catalogue (GET) et aux écritures (POST, PATCH) ; délai et lenteurs réglables par test."""
+
+    protocol_version = "HTTP/1.1"
+    state = None
+
+    def log_message(self, *args):
+        pass
+
+    def _respond(self, body):
+        payload = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        state = self.state
+        with state["lock"]:
+            state["requests"].append(("GET", self.client_address[1]))
+            slow = state["slow"] > 0
+            state["slow"] -= int(slow)
+        time.sleep(state["slow_delay"] if slow else state["delay"])
+        self._respond(CATALOG)
+
+    def _write(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        state = self.state
+        with state["lock"]:
+            state["requests"].append((self.command, self.client_address[1]))
+            slow = state["slow"] > 0
+            state["slow"] -= int(slow)
+        time.sleep(state["slow_delay"] if slow else 0)
+        self._respond([])
+
+    do_POST = do_PATCH = _write
+
+
+@pytest.fixture
+def server():
+    state = {"lock": threading.Lock(), "requests": [], "delay": 0.0, "slow": 0, "slow_delay": 1.0}
+    handler = type("Handler", (StandIn,), {"state": state})
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield httpd, state
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def make_backend(httpd, read_retries=2):
+    config = {"timeout": 0.5, "connect_timeout": 0.5}
+    client = create_client(f"http://127.0.0.1:{httpd.server_port}", "test-key",
+                           ClientOptions(httpx_client=utils._http_client(config), postgrest_client_timeout=0.5))
+    return SupabaseBackend(client, "json", read_retries=read_retries, retry_delay=0.01)
+
+
+def run_together(calls):
+    """Lance les appels dans des threads simultanés et retourne leurs résultats."""
+    results = [None] * len(calls)
+
+    def run(i, call):
+        results[i] = call()
+
+    threads = [threading.Thread(target=run, args=(i, call)) for i, call in enumerate(calls)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_simultaneous_identical_reads_share_one_request(server):
+    httpd, state = server
+    state["delay"] = 0.3
+    backend = make_backend(httpd)
+
+    results = run_together([lambda: backend.load_catalog(USER)] * 8)
+
+    assert len(state["requests"]) == 1
+    assert all(result is results[0] for result in results)
+    assert results[0] == {"Course": {"unit": "km", "goal": None, "count": 3}}
+
+
+def test_read_after_a_write_does_not_join_an_older_read(server):
+    httpd, state = server
+    state["delay"] = 0.4
+    backend = make_backend(httpd)
+
+    def write_then_read():
+        time.sleep(0.1)
+        backend.save_sport(USER, "Vélo", "km")
+        return backend.load_catalog(USER)
+
+    # La lecture lancée après l'écriture ne doit pas recevoir le résultat de la lecture commencée avant
+    run_together([lambda: backend.load_catalog(USER), write_then_read])
+
+    assert [method for method, _ in state["requests"]].count("GET") == 2
+
+
+def test_sequential_reads_reuse_one_connection(server):
+    httpd, state = server
+    backend = make_backend(httpd)
+
+    for _ in range(5):
+        backend.load_catalog(USER)
+
+    assert len(state["requests"]) == 5
+    assert len({port for _, port in state["requests"]}) == 1
+
+
+def test_timed_out_read_is_retried(server):
+    httpd, state = server
+    state["slow"] = 1
+    backend = make_backend(httpd)
+
+    assert backend.load_catalog(USER) == {"Course": {"unit": "km", "goal": None, "count": 3}}
+    assert len(state["requests"]) == 2
+
+
+def test_timeouts_surface_without_retries_and_writes_are_not_retried(server):
+    httpd, state = server
+    state["slow"] = 10
+
+    with pytest.raises(httpx.TimeoutException):
+        make_backend(httpd, read_retries=0).load_catalog(USER)
+    with pytest.raises(httpx.TimeoutException):
+        make_backend(httpd).update_entries(USER, "Course", utils.EntrySeries())
+
+    assert [method for method, _ in state["requests"]] == ["GET", "PATCH"]
@@ -0,0 +1,149 @@
+# tests/test_writebehind.py
+"""Écritures différées : ordre des lots, fusion, blocage après échec, relance ou abandon, reprise du journal."""
+import threading
+import time
+
+import pytest
+
+from storage import SQLiteBackend
+from writebehind import WriteBehindQueue, merge_changes
+
+USER = "test@example.com"
+
+
+class FlakyBackend:
+    """SQLiteBackend dont les écritures échouent tant que failing contient le sport ; garde les lots reçus."""
+
+    def __init__(self, path):
+        self.backend = SQLiteBackend(path)
+        self.failing = set()
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def apply_changes(self, user_email, sport_name, upserts, deletions=(), current=None):
+        with self.lock:
+            self.calls.append((sport_name, dict(upserts), list(deletions)))
+        if sport_name in self.failing:
+            raise RuntimeError(f"{sport_name} indisponible")
+        return self.backend.apply_changes(user_email, sport_name, upserts, deletions, current)
+
+    def records(self, sport_name):
+        return self.backend.load_entries(USER, sport_name).to_records()
+
+
+@pytest.fixture
+def storage(tmp_path):
+    storage = FlakyBackend(str(tmp_path / "test.db"))
+    for sport_name in ("Course", "Vélo"):
+        storage.backend.save_sport(USER, sport_name, "km")
+    return storage
+
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+def test_merge_changes_keeps_the_last_change_of_each_date():
+    upserts, deletions = merge_changes([
+        ({"2024-01-01": 1.0, "2024-01-02": 2.0}, []),
+        ({}, ["2024-01-01", "2024-01-03"]),
+        ({"2024-01-03": 3.0, "2024-01-02": 4.0}, []),
+    ])
+    assert upserts == {"2024-01-02": 4.0, "2024-01-03": 3.0}
+    assert deletions == ["2024-01-01"]
+    assert merge_changes([]) == ({}, [])
+
+
+def test_batches_are_applied_in_order(storage, tmp_path):
+    queue = WriteBehindQueue(str(tmp_path / "journal.db"), storage)
+    queue.enqueue(USER, "Course", {"2024-01-01": 1.0, "2024-01-02": 2.0})
+    queue.enqueue(USER, "Course", {}, ["2024-01-01"])
+    queue.enqueue(USER, "Course", {"2024-01-01": 3.0})
+    queue.enqueue(USER, "Course", {"2024-01-02": 5.0})
+
+    assert queue.flush()
+    assert storage.records("Course") == [{"date": "2024-01-01", "value": 3.0}, {"date": "2024-01-02", "value": 5.0}]
+    assert queue.pending_changes(USER) == {}
+
+
+def test_failed_batch_blocks_later_batches_of_the_same_sport(storage, tmp_path):
+    storage.failing.add("Course")
+    queue = WriteBehindQueue(str(tmp_path / "journal.db"), storage, max_attempts=2, retry_delay=0.01)
+    queue.enqueue(USER, "Course", {"2024-01-01": 1.0})
+
+    assert wait_until(lambda: queue.status(USER)["Course"]["failed"] == 1)
+    assert queue.status(USER)["Course"]["error"] == "Course indisponible"
+    assert len(storage.calls) == 2
+
+    # Le lot suivant attend derrière le lot en échec ; les autres sports ne sont pas bloqués
+    queue.enqueue(USER, "Course", {"2024-01-02": 2.0})
+    queue.enqueue(USER, "Vélo", {"2024-01-01": 20.0})
+    assert wait_until(lambda: storage.records("Vélo"))
+    assert not queue.flush(timeout=0.2)
+    assert [call[0] for call in storage.calls].count("Course") == 2
+    assert queue.pending_changes(USER) == {"Course": [({"2024-01-01": 1.0}, []), ({"2024-01-02": 2.0}, [])]}
+
+
+def test_retry_sends_the_blocked_batches(storage, tmp_path):
+    storage.failing.add("Course")
+    queue = WriteBehindQueue(str(tmp_path / "journal.db"), storage, max_attempts=1, retry_delay=0.01)
+    queue.enqueue(USER, "Course", {"2024-01-01": 1.0})
+    assert wait_until(lambda: queue.status(USER).get("Course", {}).get("failed"))
+    queue.enqueue(USER, "Course", {"2024-01-02": 2.0})
+
+    storage.failing.clear()
+    queue.retry(USER, "Course")
+
+    assert queue.flush()
+    assert storage.records("Course") == [{"date": "2024-01-01", "value": 1.0}, {"date": "2024-01-02", "value": 2.0}]
+    assert queue.status(USER) == {}
+
+
+def test_discard_drops_the_unsent_batches(storage, tmp_path):
+    storage.failing.add("Course")
+    queue = WriteBehindQueue(str(tmp_path / "journal.db"), storage, max_attempts=1, retry_delay=0.01)
+    queue.enqueue(USER, "Course", {"2024-01-01": 1.0})
+    assert wait_until(lambda: queue.status(USER).get("Course", {}).get("failed"))
+
+    storage.failing.clear()
+    queue.discard(USER, "Course")
+
+    assert queue.flush()
+    assert queue.pending_changes(USER) == {}
+    assert storage.records("Course") == []
+
+
+def test_journal_is_replayed_after_a_restart(storage, tmp_path):
+    path = str(tmp_path / "journal.db")
+    storage.failing.add("Course")
+    # Relance lointaine : le lot reste dans le journal comme à l'arrêt du processus
+    WriteBehindQueue(path, storage, retry_delay=60).enqueue(USER, "Course", {"2024-01-01": 1.0})
+    assert wait_until(lambda: storage.calls)
+
+    storage.failing.clear()
+    restarted = WriteBehindQueue(path, storage)
+
+    assert restarted.flush()
+    assert storage.records("Course") == [{"date": "2024-01-01", "value": 1.0}]
+
+
+def test_thread_survives_journal_errors(storage, tmp_path):
+    queue = WriteBehindQueue(str(tmp_path / "journal.db"), storage, retry_delay=0.01)
+    with queue._lock:
+        queue._conn.execute("ALTER TABLE journal RENAME TO journal_moved")
+    queue._wakeup.set()
+    assert wait_until(lambda: queue.error is not None)
+    assert "journal" in queue.error
+
+    with queue._lock:
+        queue._conn.execute("ALTER TABLE journal_moved RENAME TO journal")
+    queue.enqueue(USER, "Course", {"2024-01-01": 1.0})
+
+    assert queue.flush()
+    assert wait_until(lambda: queue.error is None)
+    assert storage.records("Course") == [{"date": "2024-01-01", "value": 1.0}]
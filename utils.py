@@ -1,8 +1,20 @@
 # utils.py
 import streamlit as st
-import json
-from datetime import date, datetime, timedelta
-from supabase import create_client, Client
+import threading
+import time
+import httpx
+import numpy as np
+import pandas as pd
+from concurrent.futures import Future
+from datetime import date, timedelta
+from supabase import create_client, Client, ClientOptions
+from series import EntrySeries, as_series
+import profiling
+from datacache import SharedCache
+from storage import LazySport, SQLiteBackend, SupabaseBackend
+from rolling import compute_rolling, extend_rolling
+from snapshot import SnapshotStore
+from writebehind import WriteBehindQueue, apply_pending
 
 # Unités de mesure disponibles
 UNITS = {
@@ -17,6 +29,14 @@ UNITS = {
     "pts": "points"
 }
 
+# Périodes d'analyse proposées (nombre de jours, None : tout l'historique)
+DATE_WINDOWS = {
+    "3 derniers mois": 91,
+    "6 derniers mois": 182,
+    "12 derniers mois": 365,
+    "Tout l'historique": None
+}
+
 
 def get_unit_display(unit_short):
     """Retourne l'abréviation de l'unité pour l'affichage."""
@@ -28,157 +48,942 @@ def get_unit_full_name(unit_short):
     return UNITS.get(unit_short, unit_short)
 
 
+def _http_client(config):
+    """Client HTTP partagé : connexions réutilisées (keep-alive) et délais explicites par requête."""
+    return httpx.Client(
+        timeout=httpx.Timeout(config.get("timeout", 10.0), connect=config.get("connect_timeout", 3.0)),
+        limits=httpx.Limits(max_connections=config.get("max_connections", 20),
+                            max_keepalive_connections=config.get("max_keepalive_connections", 10),
+                            keepalive_expiry=30.0)
+    )
+
+
 @st.cache_resource
 def init_supabase() -> Client:
-    """Initialise et retourne le client Supabase."""
+    """Initialise et retourne le client Supabase (section [supabase] : url, key, délais et pool de connexions)."""
     try:
-        url = st.secrets["supabase"]["url"]
-        key = st.secrets["supabase"]["key"]
-        return create_client(url, key)
+        config = st.secrets["supabase"]
+        options = ClientOptions(httpx_client=_http_client(config),
+                                postgrest_client_timeout=config.get("timeout", 10.0))
+        return create_client(config["url"], config["key"], options)
     except Exception as e:
         st.error(f"Erreur de connexion à Supabase : {str(e)}")
         st.stop()
 
 
+@st.cache_resource
+def get_storage():
+    """Retourne le backend de stockage configuré dans st.secrets (section [storage])."""
+    config = st.secrets.get("storage", {})
+    if config.get("backend", "supabase") == "sqlite":
+        return SQLiteBackend(config.get("sqlite_path", "keepgoing.db"))
+    return SupabaseBackend(init_supabase(), config.get("entries_mode", "json"),
+                           config.get("entries_format", "json"), config.get("read_retries", 2))
+
+
+@st.cache_resource
+def get_write_queue():
+    """Retourne la file d'écritures différées du processus ([storage] write_behind = true), ou None."""
+    config = st.secrets.get("storage", {})
+    if not config.get("write_behind", False):
+        return None
+    return WriteBehindQueue(config.get("journal_path", "keepgoing_journal.db"), get_storage())
+
+
+@st.cache_resource
+def get_shared_cache():
+    """Retourne le cache des séries partagé par les sessions du processus ([storage] shared_cache_mb,
+    256 par défaut ; 0 le désactive), ou None."""
+    budget = st.secrets.get("storage", {}).get("shared_cache_mb", 256)
+    return SharedCache(int(budget * 1024 * 1024)) if budget else None
+
+
+@st.cache_resource
+def get_snapshot_store():
+    """Retourne les instantanés disque des sports ([storage] snapshot_dir, snapshot_ttl_hours,
+    snapshot_max_mb), ou None si aucun répertoire n'est configuré."""
+    config = st.secrets.get("storage", {})
+    if not config.get("snapshot_dir"):
+        return None
+    return SnapshotStore(config["snapshot_dir"], config.get("snapshot_ttl_hours", 168) * 3600,
+                         int(config.get("snapshot_max_mb", 64) * 1024 * 1024))
+
+
+def _shared_key(kind, sport_name, version):
+    """Clé du cache partagé pour une version des données d'un sport (None si la version est inconnue)."""
+    return (kind, st.user.email, sport_name, version) if version is not None else None
+
+
+def _known_version(sport_name):
+    """Retourne la version d'un sport connue de la session sans requête (revalidation), ou None."""
+    markers = _get_sports_cache()["markers"]
+    return markers.get(sport_name) if markers is not None else None
+
+
+def _lookup_shared_entries(sport_name):
+    """Retourne la série d'un sport déjà lue par une autre session pour sa version connue, ou None."""
+    shared = get_shared_cache()
+    key = _shared_key("entries", sport_name, _known_version(sport_name))
+    return shared.get(key) if shared is not None and key is not None else None
+
+
+def _share_entries(sport_name, series, version=None):
+    """Retourne l'instance partagée d'une série complète lue dans le backend.
+
+    Clé : la version retournée avec la série, sinon celle connue avant la lecture (données au moins
+    aussi récentes). Les sessions d'un même utilisateur gardent ainsi une seule copie de chaque version.
+    """
+    shared = get_shared_cache()
+    key = _shared_key("entries", sport_name, series.version if series.version is not None else version)
+    return shared.put(key, series) if shared is not None and key is not None else series
+
+
+def _pending_changes(sport_names=None):
+    """Retourne les lots du journal pas encore envoyés au backend ({sport: [(upserts, deletions), ...]})."""
+    queue = get_write_queue()
+    return queue.pending_changes(st.user.email, sport_names) if queue is not None else {}
+
+
+def _get_sports_cache():
+    """Retourne le cache de session des sports, réinitialisé si l'utilisateur change."""
+    cache = st.session_state.get("_sports_cache")
+    if cache is None or cache["user"] != st.user.email:
+        cache = {"user": st.user.email, "data": None, "stale": set(), "versions": {}, "summaries": {},
+                 "aggregates": {}, "windows": {}, "bests": {}, "rolling": {}, "markers": None,
+                 "checked_at": 0.0}
+        st.session_state["_sports_cache"] = cache
+    return cache
+
+
+def _touch_sport(sport_name):
+    """Incrémente la version en cache d'un sport après une écriture."""
+    cache = _get_sports_cache()
+    cache["versions"][sport_name] = cache["versions"].get(sport_name, 0) + 1
+    cache["aggregates"] = {}
+
+
+def invalidate_user_sports(sport_name=None):
+    """Invalide le cache d'un sport, ou de tous les sports si aucun n'est précisé."""
+    cache = _get_sports_cache()
+    cache["aggregates"] = {}
+    if sport_name is None:
+        cache["data"] = None
+        cache["stale"].clear()
+    elif cache["data"] is not None:
+        cache["stale"].add(sport_name)
+
+
+def _cached_sport(sport_name):
+    """Retourne le sport en cache, ou None si le cache n'est pas chargé."""
+    cache = _get_sports_cache()
+    if cache["data"] is None:
+        return None
+    return cache["data"].get(sport_name)
+
+
+def _cached_entries(sport_name):
+    """Retourne la série en cache d'un sport, ou None si elle n'est pas chargée (sans la charger)."""
+    sport = _cached_sport(sport_name)
+    return sport.get("entries") if sport is not None else None
+
+
+@profiling.timed("utils.fetch_sport_entries")
+def _fetch_sport_entries(sport_name):
+    """Charge les performances d'un sport au premier accès (None en cas d'échec)."""
+    try:
+        # Journal lu avant le backend : un lot envoyé entre les deux lectures est appliqué deux fois, sans effet
+        pending = _pending_changes([sport_name])
+        series = _lookup_shared_entries(sport_name)
+        if series is None:
+            version = _known_version(sport_name)
+            series = _share_entries(sport_name, get_storage().load_entries(st.user.email, sport_name), version)
+        return apply_pending(series, pending.get(sport_name))
+    except Exception as e:
+        st.error(f"Erreur lors du chargement : {str(e)}")
+        return None
+
+
+def _catalog_sport(sport_name, fields):
+    """Crée l'entrée du catalogue d'un sport, ses performances étant chargées à la demande."""
+    return LazySport(sport_name, fields, _fetch_sport_entries)
+
+
+def _with_joined_entries(catalog, pending):
+    """Prépare les performances jointes au catalogue par un backend qui a dû les lire pour les compter
+    (voir StorageBackend.load_catalog) : partagées et complétées par le journal, comme au premier accès."""
+    for sport_name, fields in catalog.items():
+        if "entries" in fields:
+            fields["entries"] = apply_pending(_share_entries(sport_name, fields["entries"]), pending.get(sport_name))
+            fields["count"] = len(fields["entries"])
+    return catalog
+
+
+def _revalidate_interval():
+    """Intervalle minimal (secondes) entre deux vérifications de fraîcheur ([storage] revalidate_seconds),
+    None si la revalidation est désactivée."""
+    return st.secrets.get("storage", {}).get("revalidate_seconds")
+
+
+@profiling.timed("utils.revalidate")
+def _revalidate(cache):
+    """Compare les versions des sports à celles du cache et invalide les seuls sports modifiés ailleurs
+    (et les agrégats calculés par la base, même si le catalogue n'est pas chargé).
+
+    Au plus une requête courte (sport, version) par intervalle ; aucune entre deux intervalles.
+    """
+    interval = _revalidate_interval()
+    if interval is None or time.monotonic() - cache["checked_at"] < interval:
+        return
+    if cache["data"] is None and set(cache["aggregates"]) <= {"day"}:
+        # Rien en cache à vérifier
+        return
+    try:
+        markers = get_storage().load_versions(st.user.email)
+    except Exception:
+        # Revalidation facultative : le cache reste utilisable, nouvel essai à l'intervalle suivant
+        cache["checked_at"] = time.monotonic()
+        return
+    cache["checked_at"] = time.monotonic()
+    if markers is None:
+        return
+
+    known = cache["markers"] or {}
+    for sport_name in set(markers) | set(known) | set(cache["data"] or ()):
+        if markers.get(sport_name) != known.get(sport_name):
+            invalidate_user_sports(sport_name)
+    cache["markers"] = markers
+
+
+def _refresh_snapshot(storage, snapshots, user_email, with_markers):
+    """Lit toutes les données d'un utilisateur et réécrit son instantané (thread de fond, hors du script)."""
+    # Versions lues avant les données, comme au chargement complet
+    markers = storage.load_versions(user_email) if with_markers else None
+    sports = storage.load_sports(user_email)
+    snapshots.save(user_email, sports)
+    return sports, markers
+
+
+def _start_refresh(cache, restored):
+    """Lance le rafraîchissement de l'instantané en arrière-plan.
+
+    restored : la session affiche l'instantané, le résultat sera comparé à ses données (_apply_refresh).
+    """
+    storage, snapshots, user_email = get_storage(), get_snapshot_store(), st.user.email
+    with_markers = restored and _revalidate_interval() is not None
+    future = Future()
+
+    def run():
+        try:
+            future.set_result(_refresh_snapshot(storage, snapshots, user_email, with_markers))
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=run, name="snapshot-refresh", daemon=True).start()
+    cache["refresh"] = {"future": future, "restored": restored, "touched": dict(cache["versions"])}
+
+
+def _restore_snapshot(cache):
+    """Remplit le cache de session depuis l'instantané disque de l'utilisateur (False s'il n'y en a pas)."""
+    snapshots = get_snapshot_store()
+    if snapshots is None or cache.get("refresh_failed"):
+        return False
+    snapshot = snapshots.load(st.user.email)
+    if snapshot is None:
+        return False
+
+    pending = _pending_changes()
+    cache["data"] = {}
+    for sport_name, sport in snapshot["sports"].items():
+        entries = apply_pending(sport["entries"], pending.get(sport_name))
+        cache["data"][sport_name] = _catalog_sport(
+            sport_name, {"unit": sport["unit"], "goal": sport["goal"], "count": len(entries), "entries": entries}
+        )
+    _start_refresh(cache, restored=True)
+    return True
+
+
+def _use_snapshot(cache):
+    """Pages sans catalogue (tableau de bord) : remplit le cache depuis l'instantané disque s'il existe,
+    sinon en fait écrire un en arrière-plan (une fois par session) pour les sessions suivantes."""
+    if cache["data"] is not None or "refresh" in cache or get_snapshot_store() is None:
+        return
+    if not _restore_snapshot(cache) and not cache.get("snapshot_started"):
+        cache["snapshot_started"] = True
+        _start_refresh(cache, restored=False)
+
+
+def _same_sport(sport, fresh):
+    """Indique si un sport en cache a le même contenu que sa version relue (unité, objectif, performances)."""
+    entries, fresh_entries = sport.get("entries"), fresh["entries"]
+    return (sport["unit"] == fresh["unit"] and sport.get("goal") == fresh.get("goal") and entries is not None
+            and np.array_equal(entries.dates, fresh_entries.dates)
+            and np.array_equal(entries.values, fresh_entries.values))
+
+
+@profiling.timed("utils.apply_refresh")
+def _apply_refresh(cache):
+    """Intègre le rafraîchissement de fond s'il est terminé ; retourne True si l'affichage a changé.
+
+    Les sports écrits par la session pendant le rafraîchissement ne sont pas remplacés (la lecture de
+    fond peut être antérieure à l'écriture) : ils sont relus normalement.
+    """
+    refresh = cache.get("refresh")
+    if refresh is None or not refresh["future"].done():
+        return False
+    del cache["refresh"]
+    if not refresh["restored"]:
+        return False
+
+    try:
+        sports, markers = refresh["future"].result()
+    except Exception:
+        # Instantané non confirmé par le backend : chargement complet (erreur affichée par le chemin habituel)
+        cache["refresh_failed"] = True
+        invalidate_user_sports()
+        return True
+
+    data = cache["data"]
+    pending = _pending_changes(list(sports))
+    changed = False
+    for sport_name in set(data) | set(sports):
+        if cache["versions"].get(sport_name, 0) != refresh["touched"].get(sport_name, 0):
+            invalidate_user_sports(sport_name)
+            continue
+        fresh = sports.get(sport_name)
+        if fresh is None:
+            data.pop(sport_name, None)
+            _touch_sport(sport_name)
+            changed = True
+            continue
+
+        entries = apply_pending(fresh["entries"], pending.get(sport_name))
+        fresh = {"unit": fresh["unit"], "goal": fresh.get("goal"), "entries": entries}
+        if sport_name not in data or not _same_sport(data[sport_name], fresh):
+            _touch_sport(sport_name)
+            changed = True
+        # Remplacé même à l'identique : la série relue porte la version courante (écritures conditionnelles)
+        data[sport_name] = _catalog_sport(sport_name, {**fresh, "count": len(entries)})
+
+    if markers is not None:
+        cache["markers"] = markers
+        cache["checked_at"] = time.monotonic()
+    return changed
+
+
+def _check_freshness(cache):
+    """Intègre le rafraîchissement de fond terminé puis revalide le cache (sauf pendant l'affichage d'un
+    instantané, confirmé par le rafraîchissement lui-même)."""
+    _apply_refresh(cache)
+    if not cache.get("refresh", {}).get("restored", False):
+        _revalidate(cache)
+
+
+def _remember_versions(cache):
+    """Lit les versions avant un premier chargement d'agrégats, pour que la revalidation suivante ne
+    compare pas à un cache sans versions."""
+    if cache["markers"] is None and _revalidate_interval() is not None:
+        cache["markers"] = get_storage().load_versions(st.user.email)
+        cache["checked_at"] = time.monotonic()
+
+
+@profiling.timed("utils.load_user_sports")
 def load_user_sports():
-    """Charge les sports de l'utilisateur depuis Supabase."""
-    supabase = init_supabase()
+    """Charge le catalogue des sports de l'utilisateur, depuis le cache de session si possible.
+
+    Retourne {sport: {"unit", "goal", "count", "entries"}} ; les performances d'un sport ne sont
+    chargées qu'au premier accès à sport["entries"] (voir load_sport_entries pour en charger plusieurs).
+    """
+    cache = _get_sports_cache()
+    _check_freshness(cache)
+    if cache["data"] is not None and not cache["stale"]:
+        return cache["data"]
+
+    storage = get_storage()
     try:
-        response = supabase.table("sports").select("*").eq("user_email", st.user.email).execute()
-        data = {}
-
-        for row in response.data:
-            raw_entries = row.get("entries", [])
-
-            # Accepte string JSON OU liste
-            if isinstance(raw_entries, str):
-                try:
-                    raw_entries = json.loads(raw_entries)
-                except Exception:
-                    raw_entries = []
-
-            data[row["sport_name"]] = {
-                "unit": row["unit"],
-                "entries": raw_entries,
-                "goal": row.get("goal")
-            }
+        if cache["data"] is None and _restore_snapshot(cache):
+            # Affichage immédiat depuis l'instantané disque, rafraîchi en arrière-plan
+            return cache["data"]
+        if cache["data"] is None:
+            # Versions lues avant le catalogue : une écriture intercalée sera vue à la revalidation suivante
+            if _revalidate_interval() is not None:
+                cache["markers"] = storage.load_versions(st.user.email)
+                cache["checked_at"] = time.monotonic()
+            pending = _pending_changes()
+            catalog = _with_joined_entries(storage.load_catalog(st.user.email), pending)
+            cache["data"] = {name: _catalog_sport(name, fields) for name, fields in catalog.items()}
+            if get_snapshot_store() is not None and "refresh" not in cache:
+                # Pas encore d'instantané : écrit en arrière-plan pour les prochaines sessions
+                _start_refresh(cache, restored=False)
+        else:
+            # Recharge uniquement les sports invalidés
+            for sport_name in list(cache["stale"]):
+                pending = _pending_changes([sport_name])
+                fetched = _with_joined_entries(storage.load_catalog(st.user.email, sport_name), pending)
+                if sport_name in fetched:
+                    cache["data"][sport_name] = _catalog_sport(sport_name, fetched[sport_name])
+                else:
+                    cache["data"].pop(sport_name, None)
+                cache["stale"].discard(sport_name)
+                _touch_sport(sport_name)
+
+        return cache["data"]
+
+    except Exception as e:
+        st.error(f"Erreur lors du chargement : {str(e)}")
+        return cache["data"] if cache["data"] is not None else {}
+
+
+@profiling.timed("utils.load_sport_entries")
+def load_sport_entries(sport_names=None):
+    """Charge les performances des sports demandés (tous par défaut) et retourne les sports.
+
+    Les séries déjà lues par une autre session (cache partagé) ne sont pas relues ; parmi les autres,
+    une seule est lue seule, plusieurs le sont en une requête.
+    """
+    data = load_user_sports()
+    names = list(data) if sport_names is None else sport_names
+    missing = [name for name in names if name in data and "entries" not in data[name]]
+
+    if len(missing) == 1:
+        data[missing[0]]["entries"]
+    elif missing:
+        # Séries déjà lues par une autre session : seules les autres sont demandées au backend
+        series = {name: _lookup_shared_entries(name) for name in missing}
+        unread = [name for name in missing if series[name] is None]
+        storage = get_storage()
+        try:
+            pending = _pending_changes(missing)
+            versions = {name: _known_version(name) for name in unread}
+            if len(unread) == 1:
+                fetched = {unread[0]: storage.load_entries(st.user.email, unread[0])}
+            elif unread:
+                fetched = {name: sport["entries"] for name, sport in storage.load_sports(st.user.email).items()}
+            else:
+                fetched = {}
+        except Exception as e:
+            st.error(f"Erreur lors du chargement : {str(e)}")
+            return data
+        for name in missing:
+            if name in fetched:
+                series[name] = _share_entries(name, fetched[name], versions[name])
+            if series[name] is not None:
+                data[name]["entries"] = apply_pending(series[name], pending.get(name))
+                data[name]["count"] = len(data[name]["entries"])
+    return data
+
+
+def entries_loader(sport_names):
+    """Retourne une fonction sans argument qui lit l'historique complet des sports demandés.
+
+    Elle n'utilise ni st.user ni st.session_state : elle peut s'exécuter hors du script, par exemple
+    dans le thread qui construit le fichier d'un st.download_button. Les séries déjà en cache sont
+    reprises telles quelles, les autres sont lues au moment de l'appel.
+    """
+    data = load_user_sports()
+    storage, queue, user_email = get_storage(), get_write_queue(), st.user.email
+    sports = {name: dict(data[name]) for name in sport_names if name in data}
+
+    def load():
+        missing = [name for name, sport in sports.items() if "entries" not in sport]
+        if len(missing) == 1:
+            fetched = {missing[0]: storage.load_entries(user_email, missing[0])}
+        elif missing:
+            fetched = {name: sport["entries"] for name, sport in storage.load_sports(user_email).items()}
+        else:
+            fetched = {}
+        pending = queue.pending_changes(user_email, missing) if queue is not None and missing else {}
+        return {
+            name: {**sport, "entries": sport["entries"] if name not in missing
+                   else apply_pending(fetched.get(name, EntrySeries()), pending.get(name))}
+            for name, sport in sports.items()
+        }
+
+    return load
+
+
+@profiling.timed("utils.load_best_before")
+def load_best_before(sport_name, before):
+    """Retourne la meilleure performance d'un sport avant la date before (exclue), None s'il n'y en a pas.
+
+    Calculée localement si l'historique est chargé (ou si le journal contient des écritures du sport),
+    sinon lue par le backend et mémorisée pour la version courante du sport.
+    """
+    data = load_user_sports()
+    if sport_name not in data:
+        return None
+    cache = _get_sports_cache()
+    if "entries" not in data[sport_name] and _pending_changes([sport_name]):
+        load_sport_entries([sport_name])
+    entries = data[sport_name].get("entries")
+    if entries is not None:
+        prior = entries.between(None, before - timedelta(days=1))
+        return float(prior.values.max()) if len(prior) else None
+
+    key = (cache["versions"].get(sport_name, 0), before)
+    memo = cache["bests"].get(sport_name)
+    if memo is None or memo[0] != key:
+        try:
+            best = get_storage().load_best(st.user.email, sport_name, before)
+        except Exception as e:
+            st.error(f"Erreur lors du chargement : {str(e)}")
+            return None
+        memo = (key, best)
+        cache["bests"][sport_name] = memo
+    return memo[1]
+
+
+def get_window_start(days):
+    """Retourne la première date d'une période des days derniers jours (None : pas de borne)."""
+    if days is None:
+        return None
+    return date.today() - timedelta(days=days - 1)
+
+
+@profiling.timed("utils.load_entries_window")
+def load_entries_window(sport_names, start=None, end=None):
+    """Retourne {sport: performances entre start et end} (dates incluses, None : pas de borne).
+
+    Découpées localement si l'historique d'un sport est déjà chargé ; sinon seule la période est lue,
+    en une requête pour tous les sports manquants, et mémorisée pour la version courante du sport.
+    """
+    if start is None and end is None:
+        data = load_sport_entries(sport_names)
+        return {name: data[name]["entries"] for name in sport_names if name in data}
 
+    data = load_user_sports()
+    cache = _get_sports_cache()
+    windows = {}
+    missing = []
+    for name in sport_names:
+        if name not in data:
+            continue
+        entries = data[name].get("entries")
+        memo = cache["windows"].get(name)
+        if entries is not None:
+            windows[name] = entries.between(start, end)
+        elif memo is not None and memo[0] == (cache["versions"].get(name, 0), start, end):
+            windows[name] = memo[1]
+        else:
+            missing.append(name)
+
+    if missing:
+        storage = get_storage()
+        try:
+            pending = _pending_changes(missing)
+            if len(missing) == 1:
+                fetched = {missing[0]: storage.load_entries(st.user.email, missing[0], start, end)}
+            else:
+                fetched = {
+                    name: sport["entries"]
+                    for name, sport in storage.load_sports(st.user.email, start=start, end=end).items()
+                }
+        except Exception as e:
+            st.error(f"Erreur lors du chargement : {str(e)}")
+            fetched = {}
+
+        for name in missing:
+            if name in fetched:
+                fetched[name] = apply_pending(fetched[name], pending.get(name), start, end)
+                cache["windows"][name] = ((cache["versions"].get(name, 0), start, end), fetched[name])
+            windows[name] = fetched.get(name, EntrySeries())
+
+    # Ordre des sports demandé
+    return {name: windows[name] for name in sport_names if name in windows}
+
+
+def _fresh_cached_data():
+    """Retourne les sports en cache s'ils sont à jour et tous chargés avec leurs performances, sinon None.
+
+    Revalide d'abord le cache : les pages qui n'utilisent que des résumés ne passent pas par load_user_sports.
+    """
+    cache = _get_sports_cache()
+    _check_freshness(cache)
+    _use_snapshot(cache)
+    data = cache["data"]
+    if data is not None and not cache["stale"] and all("entries" in sport for sport in data.values()):
         return data
+    return None
+
+
+def _get_aggregates():
+    """Retourne le cache des agrégats calculés par la base, vidé au changement de jour."""
+    cache = _get_sports_cache()
+    today = date.today()
+    if cache["aggregates"].get("day") != today:
+        cache["aggregates"] = {"day": today}
+    return cache["aggregates"]
+
+
+@profiling.timed("utils.load_user_summaries")
+def load_user_summaries():
+    """Retourne le résumé de chaque sport ({sport: {"unit", "goal", "total", "last", ...}}).
+
+    Calculé localement si les performances sont déjà en cache, sinon agrégé par la base en une requête,
+    sans charger les performances.
+    """
+    data = _fresh_cached_data()
+    if data is not None:
+        return summarize_sports(data)
+    if _pending_changes():
+        # Écritures différées pas encore dans la base : agrégats calculés avec le journal appliqué
+        return summarize_sports(load_sport_entries())
+
+    try:
+        summaries = _aggregated_summaries()
+    except Exception as e:
+        st.error(f"Erreur lors du chargement : {str(e)}")
+        return {}
+    if summaries is None:
+        # Backend sans agrégation : calcul à partir des performances
+        return summarize_sports(load_sport_entries())
+    return summaries
+
 
+@profiling.timed("utils.load_lifetime_summaries")
+def load_lifetime_summaries():
+    """Retourne les résumés sur tout l'historique s'ils sont disponibles sans lire les performances :
+    calculés à partir du cache ou agrégés par la base. Sinon (mode "json", écritures différées en
+    attente), retourne {} plutôt que de charger tout l'historique.
+    """
+    data = _fresh_cached_data()
+    if data is not None:
+        return summarize_sports(data)
+    if _pending_changes():
+        return {}
+    try:
+        return _aggregated_summaries() or {}
     except Exception as e:
         st.error(f"Erreur lors du chargement : {str(e)}")
         return {}
 
 
+def _aggregated_summaries():
+    """Retourne les résumés agrégés par la base (mémorisés pour la journée), None si le backend ne sait
+    pas agréger."""
+    aggregates = _get_aggregates()
+    if "summaries" not in aggregates:
+        _remember_versions(_get_sports_cache())
+        summaries = get_storage().load_summaries(st.user.email, date.today())
+        if summaries is None:
+            return None
+        for summary in summaries.values():
+            first, last = summary["first"], summary["last"]
+            summary["progression"] = (last / first - 1) * 100 if summary["total"] > 1 and first else 0
+        aggregates["summaries"] = summaries
+    return aggregates["summaries"]
+
+
+@profiling.timed("utils.load_user_activity")
+def load_user_activity():
+    """Retourne les séances par période ({"week", "month", "year"} : DataFrames période x sport).
+
+    Calculées localement si les performances sont déjà en cache, sinon agrégées par la base.
+    """
+    data = _fresh_cached_data()
+    if data is not None or _pending_changes():
+        return get_activity_rollups(data if data is not None else load_sport_entries())
+
+    aggregates = _get_aggregates()
+    if "activity" not in aggregates:
+        try:
+            _remember_versions(_get_sports_cache())
+            rows = get_storage().load_activity(st.user.email)
+        except Exception as e:
+            st.error(f"Erreur lors du chargement : {str(e)}")
+            return activity_rollups_from_counts([], [])
+        if rows is None:
+            return get_activity_rollups(load_sport_entries())
+
+        sports = list(load_user_summaries().keys())
+        aggregates["activity"] = activity_rollups_from_counts(sports, rows)
+    return aggregates["activity"]
+
+
+@profiling.timed("utils.save_sport")
 def save_sport(sport_name, unit, goal=None):
-    """Ajoute un nouveau sport dans Supabase."""
-    supabase = init_supabase()
+    """Ajoute un nouveau sport."""
     try:
-        data = {
-            "user_email": st.user.email,
-            "sport_name": sport_name,
-            "unit": unit,
-            "entries": json.dumps([]),
-            "goal": goal
-        }
-        supabase.table("sports").insert(data).execute()
+        get_storage().save_sport(st.user.email, sport_name, unit, goal)
+
+        cache = _get_sports_cache()
+        if cache["data"] is not None:
+            cache["data"][sport_name] = _catalog_sport(
+                sport_name, {"unit": unit, "goal": goal, "count": 0, "entries": EntrySeries()}
+            )
+        _touch_sport(sport_name)
         return True
     except Exception as e:
+        invalidate_user_sports(sport_name)
         st.error(f"Erreur : {str(e)}")
         return False
 
 
+def _set_cached_entries(sport_name, series):
+    """Remplace la série en cache d'un sport après une écriture réussie."""
+    sport = _cached_sport(sport_name)
+    if sport is not None:
+        sport["entries"] = series
+        sport["count"] = len(series)
+    _touch_sport(sport_name)
+    # Série retournée par le backend avec sa version : servie telle quelle aux autres sessions
+    _share_entries(sport_name, series)
+
+    # Version connue après l'écriture : pas de relecture à la revalidation ; sinon le sport sera relu
+    markers = _get_sports_cache()["markers"]
+    if markers is not None:
+        if series.version is not None:
+            markers[sport_name] = series.version
+        else:
+            markers.pop(sport_name, None)
+
+
+def _cache_written_entries(sport_name, current, written, expected):
+    """Met le cache à jour après une écriture réussie.
+
+    written : série retournée par le backend (avec sa version, écritures concurrentes incluses) ;
+    à défaut, expected : série en cache avec les modifications appliquées localement.
+    """
+    series = written if written is not None else expected
+    if series is None:
+        invalidate_user_sports(sport_name)
+        return
+    _set_cached_entries(sport_name, series)
+    # Analyses glissantes prolongées seulement sans écriture concurrente fusionnée (version suivante)
+    merged = written is not None and (current is None or current.version is None
+                                      or written.version != current.version + 1)
+    if current is not None and not merged:
+        _advance_rolling(sport_name, current, series)
+
+
+@profiling.timed("utils.update_sport_entries")
 def update_sport_entries(sport_name, entries):
-    """Met à jour les performances d'un sport."""
-    supabase = init_supabase()
+    """Remplace toutes les performances d'un sport (EntrySeries ou liste d'entrées JSON).
+
+    Seule la différence avec la série connue est écrite, en un lot (apply_entry_changes) : écriture
+    conditionnelle à la version, réappliquée en cas de conflit, et différée si le journal est actif.
+    """
+    series = as_series(entries)
+    data = load_sport_entries([sport_name])
+    if sport_name not in data:
+        st.error(f"Erreur : sport introuvable : {sport_name}")
+        return False
+    current = data[sport_name]["entries"]
+
+    replacement = dict(zip(series.date_strings(), series.values.tolist()))
+    upserts = {d: v for d, v in replacement.items() if current.get(d) != v}
+    deletions = [d for d in current.date_strings() if d not in replacement]
+    return apply_entry_changes(sport_name, upserts, deletions)
+
+
+@profiling.timed("utils.apply_entry_changes")
+def apply_entry_changes(sport_name, upserts, deletions=()):
+    """Applique un lot de modifications ({date: valeur}) et de suppressions en une seule écriture."""
+    if not upserts and not deletions:
+        return True
+
+    current = _cached_entries(sport_name)
+    queue = get_write_queue()
+    written = None
     try:
-        supabase.table("sports").update({
-            "entries": json.dumps(entries)
-        }).eq("user_email", st.user.email).eq("sport_name", sport_name).execute()
+        if queue is not None:
+            # Écriture différée : le lot est journalisé, le backend est mis à jour en arrière-plan
+            queue.enqueue(st.user.email, sport_name, upserts, deletions)
+        else:
+            written = get_storage().apply_changes(st.user.email, sport_name, upserts, deletions, current)
+        _cache_written_entries(sport_name, current, written, current.with_changes(upserts, deletions)
+                               if current is not None else None)
         return True
     except Exception as e:
+        invalidate_user_sports(sport_name)
         st.error(f"Erreur : {str(e)}")
         return False
 
 
+def upsert_entry(sport_name, date_str, value):
+    """Ajoute ou remplace la performance d'un sport à une date donnée."""
+    return apply_entry_changes(sport_name, {date_str: value})
+
+
+@profiling.timed("utils.delete_entry")
 def delete_entry(sport_name, date_str):
     """Supprime une entrée spécifique d'un sport."""
-    supabase = init_supabase()
+    if get_write_queue() is not None:
+        # Même file que les ajouts, pour conserver l'ordre des écritures du sport
+        return apply_entry_changes(sport_name, {}, [date_str])
+
+    current = _cached_entries(sport_name)
     try:
-        # Charger les données actuelles
-        response = supabase.table("sports").select("entries").eq("user_email", st.user.email).eq("sport_name",
-                                                                                                 sport_name).execute()
-
-        if response.data:
-            entries = response.data[0]["entries"]
-            if isinstance(entries, str):
-                entries = json.loads(entries)
-
-            # Filtrer l'entrée à supprimer
-            entries = [e for e in entries if e["date"] != date_str]
-
-            # Mettre à jour
-            supabase.table("sports").update({
-                "entries": json.dumps(entries)
-            }).eq("user_email", st.user.email).eq("sport_name", sport_name).execute()
-            return True
+        written = get_storage().delete_entry(st.user.email, sport_name, date_str, current)
+        _cache_written_entries(sport_name, current, written, current.without_date(date_str)
+                               if current is not None else None)
+        return True
     except Exception as e:
+        invalidate_user_sports(sport_name)
         st.error(f"Erreur : {str(e)}")
         return False
 
 
-def calculate_streak(entries):
-    if not entries:
-        return 0
+@profiling.timed("utils.import_sport_entries")
+def import_sport_entries(sport_name, upserts, on_progress=None):
+    """Écrit des performances importées par lots, en signalant la progression (nombre écrit)."""
+    items = list(upserts.items())
+    batch_size = get_storage().write_batch_size or max(len(items), 1)
 
-    dates = sorted(
-        {datetime.fromisoformat(e["date"]).date() for e in entries}
-    )
+    for start in range(0, len(items), batch_size):
+        if not apply_entry_changes(sport_name, dict(items[start:start + batch_size])):
+            return False
+        if on_progress is not None:
+            on_progress(min(start + batch_size, len(items)))
+    return True
 
-    best = streak = 1
 
-    for i in range(1, len(dates)):
-        if (dates[i] - dates[i - 1]).days == 1:
-            streak += 1
-            best = max(best, streak)
-        else:
-            streak = 1
+def _today_day():
+    """Retourne la date du jour en nombre de jours depuis l'epoch."""
+    return int(np.datetime64(date.today(), "D").astype(np.int64))
 
-    return best
 
+def _month_start_day():
+    """Retourne le premier jour du mois courant en nombre de jours depuis l'epoch."""
+    return int(np.datetime64(date.today().replace(day=1), "D").astype(np.int64))
 
-def get_weekly_progress(entries):
-    """Calcule le nombre de sessions cette semaine."""
-    if not entries:
+
+def _streak_runs(days):
+    """Retourne la longueur des séries de jours consécutifs (dates triées et uniques)."""
+    breaks = np.flatnonzero(np.diff(days) != 1)
+    bounds = np.concatenate(([-1], breaks, [len(days) - 1]))
+    return np.diff(bounds)
+
+
+def calculate_streak(entries):
+    """Calcule la meilleure série de jours consécutifs."""
+    series = as_series(entries)
+    if not len(series):
         return 0
+    return int(_streak_runs(series.days).max())
+
 
-    week_ago = date.today() - timedelta(days=7)
-    return sum(1 for e in entries if datetime.fromisoformat(e["date"]).date() >= week_ago)
+def get_weekly_progress(entries):
+    """Calcule le nombre de sessions cette semaine."""
+    series = as_series(entries)
+    return int(np.count_nonzero(series.days >= _today_day() - 7))
 
 
 def get_monthly_progress(entries):
     """Calcule le nombre de sessions ce mois."""
-    if not entries:
-        return 0
-
-    month_start = date.today().replace(day=1)
-    return sum(1 for e in entries if datetime.fromisoformat(e["date"]).date() >= month_start)
+    series = as_series(entries)
+    return int(np.count_nonzero(series.days >= _month_start_day()))
 
 
 def calculate_stats(entries):
     """Calcule les statistiques d'un sport."""
-    if not entries:
+    series = as_series(entries)
+    if not len(series):
         return None
 
-    values = [e["value"] for e in entries]
+    values = series.values
     return {
-        "last": values[-1],
-        "best": max(values),
-        "worst": min(values),
-        "avg": sum(values) / len(values),
-        "median": sorted(values)[len(values) // 2],
+        "last": float(values[-1]),
+        "best": float(values.max()),
+        "worst": float(values.min()),
+        "avg": float(values.mean()),
+        "median": float(np.partition(values, len(values) // 2)[len(values) // 2]),
         "total": len(values),
-        "progression": ((values[-1] / values[0] - 1) * 100) if len(values) > 1 else 0
+        "progression": float((values[-1] / values[0] - 1) * 100) if len(values) > 1 and values[0] else 0
+    }
+
+
+@profiling.timed("utils.summarize_entries")
+def summarize_entries(entries):
+    """Calcule le résumé complet d'un sport (stats, séries, activité récente) sur une série."""
+    series = as_series(entries)
+    stats = calculate_stats(series)
+    if stats is None:
+        return {
+            "total": 0, "first": None, "last": None, "best": None, "worst": None, "avg": None,
+            "median": None, "progression": 0, "current_streak": 0, "best_streak": 0, "week": 0, "month": 0
+        }
+
+    days = series.days
+    runs = _streak_runs(days)
+    today = _today_day()
+
+    stats.update({
+        "first": float(series.values[0]),
+        "current_streak": int(runs[-1]) if days[-1] >= today - 1 else 0,
+        "best_streak": int(runs.max()),
+        "week": int(np.count_nonzero(days >= today - 7)),
+        "month": int(np.count_nonzero(days >= _month_start_day()))
+    })
+    return stats
+
+
+@profiling.timed("utils.get_sport_summary")
+def get_sport_summary(sport_name, entries):
+    """Retourne le résumé d'un sport, mémorisé pour la version courante de ses données."""
+    cache = _get_sports_cache()
+    key = (cache["versions"].get(sport_name, 0), id(entries), len(entries), date.today())
+
+    memo = cache["summaries"].get(sport_name)
+    if memo is None or memo[0] != key:
+        memo = (key, summarize_entries(entries))
+        cache["summaries"][sport_name] = memo
+    return memo[1]
+
+
+@profiling.timed("utils.get_rolling_analytics")
+def get_rolling_analytics(sport_name, entries, prior_best=None):
+    """Retourne les analyses glissantes d'un sport (voir rolling.py), mémorisées pour sa série.
+
+    prior_best : meilleure performance antérieure à une série partielle (voir load_best_before).
+    Pour une série du cache partagé, l'analyse y est aussi partagée avec les autres sessions.
+    """
+    cache = _get_sports_cache()
+    memo = cache["rolling"].get(sport_name)
+    if memo is None or memo[0] is not entries or memo[1].get("prior_best") != prior_best:
+        shared = get_shared_cache()
+        version = entries.version if entries.version is not None else _known_version(sport_name)
+        key = _shared_key("entries", sport_name, version) if shared is not None else None
+        if key is not None and prior_best is None and shared.peek(key) is entries:
+            rolling_key = ("rolling",) + key[1:]
+            state = shared.get(rolling_key)
+            if state is None:
+                state = shared.put(rolling_key, compute_rolling(entries))
+        else:
+            state = compute_rolling(entries, prior_best)
+        memo = (entries, state)
+        cache["rolling"][sport_name] = memo
+    return memo[1]
+
+
+def _advance_rolling(sport_name, previous, series):
+    """Prolonge les analyses glissantes mémorisées quand une écriture n'a ajouté qu'une dernière performance."""
+    cache = _get_sports_cache()
+    memo = cache["rolling"].pop(sport_name, None)
+    if memo is None or memo[0] is not previous or len(series) != len(previous) + 1:
+        return
+    day = int(series.days[-1])
+    if len(previous) and day <= previous.days[-1]:
+        return
+    cache["rolling"][sport_name] = (series, extend_rolling(memo[1], day, float(series.values[-1])))
+
+
+def summarize_sports(data):
+    """Retourne le résumé de chaque sport chargé, avec son unité et son objectif."""
+    return {
+        name: {"unit": sport["unit"], "goal": sport.get("goal"), **get_sport_summary(name, sport["entries"])}
+        for name, sport in data.items()
+    }
+
+
+@profiling.timed("utils.get_global_summary")
+def get_global_summary(summaries):
+    """Agrège les résumés des sports ({sport: résumé}) : totaux, semaine, mois, meilleure série."""
+    return {
+        "sports": len(summaries),
+        "total": sum(s["total"] for s in summaries.values()),
+        "week": sum(s["week"] for s in summaries.values()),
+        "month": sum(s["month"] for s in summaries.values()),
+        "best_streak": max((s["best_streak"] for s in summaries.values()), default=0)
     }
 
 
@@ -212,44 +1017,137 @@ def get_user_level(total_sessions):
     return levels[0]
 
 
-def get_activity_by_period(data, period="week"):
-    """Retourne l'activité groupée par période."""
-    all_entries = []
-    for sport_name, sport_data in data.items():
-        for entry in sport_data["entries"]:
-            all_entries.append({
-                "date": datetime.fromisoformat(entry["date"]),
-                "sport": sport_name
-            })
+@profiling.timed("utils.compute_activity_rollups")
+def compute_activity_rollups(data):
+    """Compte les séances par semaine ISO, mois et année, par sport, en une passe vectorisée.
+
+    Retourne {"week": df, "month": df, "year": df} ; chaque DataFrame a une ligne par période
+    (périodes vides incluses, à zéro) et une colonne par sport.
+    """
+    sports = list(data.keys())
+    series = [as_series(data[name]["entries"]) for name in sports]
+    dates = np.concatenate([s.dates for s in series] + [np.array([], dtype="datetime64[D]")])
+    sport_idx = np.repeat(np.arange(len(sports)), [len(s) for s in series])
+
+    days = dates.astype(np.int64)
+    keys = {
+        # Lundi de la semaine ISO (le 01/01/1970 était un jeudi)
+        "week": (days - (days + 3) % 7, sport_idx, None),
+        "month": (dates.astype("datetime64[M]").astype(np.int64), sport_idx, None),
+        "year": (dates.astype("datetime64[Y]").astype(np.int64), sport_idx, None)
+    }
+    return _rollup_frames(sports, keys)
 
-    if not all_entries:
-        return {}
 
-    activity = {}
-    for entry in all_entries:
+def activity_rollups_from_counts(sports, rows):
+    """Construit les agrégats d'activité à partir des séances comptées par la base.
+
+    rows : [(période, sport, début ISO, séances)], début étant le lundi, le 1er du mois ou le 1er janvier.
+    """
+    position = {name: i for i, name in enumerate(sports)}
+    keys = {}
+    for period, unit in (("week", "D"), ("month", "M"), ("year", "Y")):
+        selected = [row for row in rows if row[0] == period and row[1] in position]
+        starts = np.array([str(row[2])[:10] for row in selected], dtype="datetime64[D]")
+        keys[period] = (
+            starts.astype(f"datetime64[{unit}]").astype(np.int64),
+            np.array([position[row[1]] for row in selected], dtype=np.int64),
+            np.array([row[3] for row in selected], dtype=np.float64)
+        )
+    return _rollup_frames(sports, keys)
+
+
+def _rollup_frames(sports, keys):
+    """Construit les DataFrames période x sport (périodes vides incluses, à zéro).
+
+    keys : {période: (clé de période, indice du sport, poids ou None)} par ligne ; la clé est un numéro
+    de jour (lundi) pour les semaines, de mois ou d'année sinon.
+    """
+    rollups = {}
+    for period, (key, sport_idx, weights) in keys.items():
+        if not len(key):
+            rollups[period] = pd.DataFrame(columns=sports, dtype=int)
+            continue
+
+        step = 7 if period == "week" else 1
+        first = key.min()
+        bins = np.arange(first, key.max() + step, step)
+        flat = (key - first) // step * len(sports) + sport_idx
+        counts = np.bincount(flat, weights, minlength=len(bins) * len(sports)).astype(np.int64)
+        counts = counts.reshape(len(bins), len(sports))
+
         if period == "week":
-            # Semaine ISO (lundi = début)
-            key = entry["date"].strftime("%Y-W%W")
+            labels = pd.DatetimeIndex(bins.astype("datetime64[D]")).strftime("%G-W%V")
         elif period == "month":
-            key = entry["date"].strftime("%Y-%m")
-        else:  # year
-            key = entry["date"].strftime("%Y")
+            labels = np.datetime_as_string(bins.astype("datetime64[M]"))
+        else:
+            labels = np.datetime_as_string(bins.astype("datetime64[Y]"))
+
+        rollups[period] = pd.DataFrame(counts, index=pd.Index(labels, name="Période"), columns=sports)
+
+    return rollups
+
+
+def get_activity_rollups(data):
+    """Retourne les agrégats d'activité des trois périodes, mémorisés pour la version courante des données."""
+    cache = _get_sports_cache()
+    key = tuple(
+        (name, cache["versions"].get(name, 0), id(s["entries"]), len(s["entries"])) for name, s in data.items()
+    )
+
+    memo = cache.get("rollups")
+    if memo is None or memo[0] != key:
+        memo = (key, compute_activity_rollups(data))
+        cache["rollups"] = memo
+    return memo[1]
+
+
+@profiling.timed("utils.get_activity_by_period")
+def get_activity_by_period(data, period="week", by_sport=False):
+    """Retourne l'activité groupée par période (semaine ISO, mois ou année), périodes vides incluses.
 
-        activity[key] = activity.get(key, 0) + 1
+    Par défaut, un dictionnaire {période: séances} ; avec by_sport, le DataFrame période x sport.
+    """
+    rollup = get_activity_rollups(data)[period]
+    if by_sport:
+        return rollup
+    if rollup.empty:
+        return {}
+    return {label: int(count) for label, count in rollup.sum(axis=1).items()}
+
+
+def load_sidebar_summary():
+    """Retourne les totaux de la sidebar (voir get_global_summary) sans lire l'historique des sports.
+
+    Résumés du cache ou agrégés par la base s'ils sont disponibles ; sinon (mode "json"), nombre de
+    sports et de séances du catalogue, semaine, mois et meilleure série étant inconnus (None).
+    None si l'utilisateur n'a aucun sport.
+    """
+    summaries = load_lifetime_summaries()
+    if summaries:
+        return get_global_summary(summaries)
+    data = load_user_sports()
+    if not data:
+        return None
+    return {"sports": len(data), "total": sum(sport["count"] for sport in data.values()),
+            "week": None, "month": None, "best_streak": None}
 
-    return dict(sorted(activity.items()))
 
+def render_sidebar(data=None):
+    """Affiche la sidebar avec les statistiques complètes.
 
-def render_sidebar(data):
-    """Affiche la sidebar avec les statistiques complètes."""
+    data : sports déjà chargés avec leurs performances ; sans data, les totaux sont lus sans charger
+    l'historique (load_sidebar_summary).
+    """
+    summary = get_global_summary(summarize_sports(data)) if data else load_sidebar_summary()
     with st.sidebar:
-        if data:
+        if summary:
             # Calcul des statistiques
-            total_sports = len(data)
-            total_sessions = sum(len(s["entries"]) for s in data.values())
-            week_total = sum(get_weekly_progress(s["entries"]) for s in data.values())
-            month_total = sum(get_monthly_progress(s["entries"]) for s in data.values())
-            max_streak = max([calculate_streak(s["entries"]) for s in data.values()], default=0)
+            total_sports = summary["sports"]
+            total_sessions = summary["total"]
+            week_total = summary["week"]
+            month_total = summary["month"]
+            max_streak = summary["best_streak"]
             level_info = get_user_level(total_sessions)
 
             # Niveau de l'utilisateur
@@ -269,12 +1167,12 @@ def render_sidebar(data):
             col1, col2 = st.columns(2)
             with col1:
                 st.metric("Sports", total_sports)
-                st.metric("Ce mois", month_total)
+                st.metric("Ce mois", month_total if month_total is not None else "-")
             with col2:
                 st.metric("Total", total_sessions)
-                st.metric("Cette semaine", week_total)
+                st.metric("Cette semaine", week_total if week_total is not None else "-")
 
-            st.metric("🔥 Meilleure série", f"{max_streak} jours")
+            st.metric("🔥 Meilleure série", f"{max_streak} jours" if max_streak is not None else "-")
 
             # st.divider()
 
@@ -286,5 +1184,93 @@ def render_sidebar(data):
 
         st.divider()
 
+        render_sync_status()
+        cache = _get_sports_cache()
+        if cache.get("refresh", {}).get("restored"):
+            cache.pop("refresh_done", None)
+            render_refresh_status()
+
         if st.button("🚪 Se déconnecter", use_container_width=True):
-            st.logout()
\ No newline at end of file
+            st.logout()
+
+        # Fin du rerun : panneau de profilage (activé par [debug] profiling dans st.secrets)
+        profile = profiling.end_rerun()
+        if profile is not None and profile.panel:
+            render_profile_panel(profile)
+
+
+def render_sync_status():
+    """Affiche les écritures différées en attente ou en échec, avec relance ou abandon en cas d'échec."""
+    queue = get_write_queue()
+    if queue is None:
+        return
+    status = queue.status(st.user.email)
+    if not status:
+        return
+
+    pending = sum(s["pending"] for s in status.values())
+    if pending:
+        st.caption(f"⏳ {pending} modification(s) en cours de synchronisation")
+        if queue.error:
+            st.warning(f"Synchronisation interrompue, nouvel essai en cours\n\n{queue.error}")
+    for sport_name, sport in status.items():
+        if not sport["failed"]:
+            continue
+        st.warning(f"{sport_name} : {sport['failed']} modification(s) non synchronisée(s)\n\n{sport['error']}")
+        col1, col2 = st.columns(2)
+        with col1:
+            if st.button("Réessayer", key=f"sync_retry_{sport_name}", use_container_width=True):
+                queue.retry(st.user.email, sport_name)
+                st.rerun()
+        with col2:
+            if st.button("Abandonner", key=f"sync_discard_{sport_name}", use_container_width=True):
+                queue.discard(st.user.email, sport_name)
+                invalidate_user_sports(sport_name)
+                st.rerun()
+    st.divider()
+
+
+@st.fragment(run_every=1)
+def render_refresh_status():
+    """Indique l'actualisation en cours des données affichées depuis l'instantané disque.
+
+    La page n'est relancée que si les données ont changé. Sinon, une fois l'actualisation intégrée, le
+    fragment ne fait plus rien (indicateur de session "refresh_done") et n'est plus rendu au rerun suivant.
+    """
+    cache = _get_sports_cache()
+    if cache.get("refresh_done"):
+        return
+    if _apply_refresh(cache):
+        st.rerun()
+    if "refresh" in cache:
+        st.caption("🔄 Actualisation des données...")
+    else:
+        cache["refresh_done"] = True
+
+
+def render_profile_panel(profile):
+    """Affiche les mesures du rerun dans un expander de la sidebar."""
+    summary = profile.summary()
+    with st.expander("🛠️ Profilage du rerun"):
+        st.caption(f"{summary['page']} : {summary['total_ms']:.1f} ms")
+        col1, col2 = st.columns(2)
+        with col1:
+            st.metric("Appels stockage", summary["backend_calls"])
+        with col2:
+            st.metric("Reçu (estimé)", f"{summary['backend_bytes'] / 1024:.1f} Ko")
+        st.caption(f"Temps stockage : {summary['backend_ms']:.1f} ms")
+        shared = get_shared_cache()
+        if shared is not None:
+            stats = shared.stats()
+            st.caption(
+                f"Cache partagé : {stats['hits']} succès, {stats['misses']} échecs, {stats['evictions']} évictions, "
+                f"{stats['entries']} séries, {stats['bytes'] / 1024 / 1024:.1f} / {stats['max_bytes'] / 1024 / 1024:.0f} Mo"
+            )
+        if summary["sections"]:
+            st.dataframe(
+                pd.DataFrame(summary["sections"]).rename(columns={
+                    "name": "Section", "calls": "Appels", "total_ms": "Total (ms)", "max_ms": "Max (ms)"
+                }),
+                use_container_width=True,
+                hide_index=True
+            )
\ No newline at end of file
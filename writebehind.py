@@ -0,0 +1,197 @@
+# writebehind.py
+import json
+import sqlite3
+import threading
+import time
+
+
+def merge_changes(changes):
+    """Fusionne une suite de lots (upserts, deletions) en un seul lot équivalent, dans l'ordre."""
+    upserts, deletions = {}, set()
+    for batch_upserts, batch_deletions in changes:
+        for date_str in batch_deletions:
+            upserts.pop(date_str, None)
+            deletions.add(date_str)
+        for date_str, value in batch_upserts.items():
+            deletions.discard(date_str)
+            upserts[date_str] = value
+    return upserts, sorted(deletions)
+
+
+def apply_pending(series, changes, start=None, end=None):
+    """Applique à une série lue dans le backend les lots encore dans le journal (bornés à une période)."""
+    if not changes:
+        return series
+    upserts, deletions = merge_changes(changes)
+    if start is not None or end is not None:
+        low, high = start.isoformat() if start else "", end.isoformat() if end else "9999"
+        upserts = {d: v for d, v in upserts.items() if low <= d[:10] <= high}
+    return series.with_changes(upserts, deletions)
+
+
+class WriteBehindQueue:
+    """Écritures différées : chaque lot est d'abord ajouté à un journal SQLite local puis envoyé au backend
+    par un thread de fond, dans l'ordre pour chaque sport. Une erreur du thread lui-même (journal
+    illisible...) est conservée dans error et le tour est relancé.
+
+    Un lot en échec est relancé avec une attente croissante ; après max_attempts échecs il est marqué
+    "failed" et bloque les lots suivants du même sport jusqu'à retry() ou discard(). Les lots restés dans
+    le journal sont repris au redémarrage du processus.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS journal (
+            id           INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_email   TEXT NOT NULL,
+            sport_name   TEXT NOT NULL,
+            upserts      TEXT NOT NULL,
+            deletions    TEXT NOT NULL,
+            status       TEXT NOT NULL DEFAULT 'pending',
+            attempts     INTEGER NOT NULL DEFAULT 0,
+            next_attempt REAL NOT NULL DEFAULT 0,
+            error        TEXT
+        );
+        CREATE INDEX IF NOT EXISTS journal_user_sport ON journal (user_email, sport_name, id);
+    """
+
+    # Premier lot en attente de chaque sport, sauf si un lot plus ancien du même sport est en échec
+    NEXT_QUERY = """
+        SELECT user_email, sport_name, next_attempt FROM journal j
+        WHERE status = 'pending'
+          AND id = (SELECT min(id) FROM journal k WHERE k.user_email = j.user_email AND k.sport_name = j.sport_name)
+        ORDER BY id
+    """
+
+    def __init__(self, path, storage, max_attempts=5, retry_delay=1.0):
+        self.path = path
+        self.storage = storage
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        # Connexion partagée entre les reruns et le thread de fond, comme SQLiteBackend
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=FULL")
+        self._conn.executescript(self.SCHEMA)
+        # Reprise au démarrage : l'attente avant relance calculée par le processus précédent ne s'applique plus
+        with self._conn:
+            self._conn.execute("UPDATE journal SET next_attempt = 0 WHERE status = 'pending'")
+        self._wakeup = threading.Event()
+        # Dernière erreur du thread d'envoi hors écriture au backend (None après un tour sans erreur)
+        self.error = None
+        self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+        self._thread.start()
+
+    def enqueue(self, user_email, sport_name, upserts, deletions=()):
+        """Ajoute un lot au journal (écriture durable) et réveille le thread d'envoi."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO journal (user_email, sport_name, upserts, deletions) VALUES (?, ?, ?, ?)",
+                (user_email, sport_name, json.dumps(upserts), json.dumps(list(deletions)))
+            )
+        self._wakeup.set()
+
+    def pending_changes(self, user_email, sport_names=None):
+        """Retourne les lots du journal non encore envoyés ({sport: [(upserts, deletions), ...]}), dans l'ordre."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT sport_name, upserts, deletions FROM journal WHERE user_email = ? ORDER BY id", (user_email,)
+            ).fetchall()
+        changes = {}
+        for sport_name, upserts, deletions in rows:
+            if sport_names is None or sport_name in sport_names:
+                changes.setdefault(sport_name, []).append((json.loads(upserts), json.loads(deletions)))
+        return changes
+
+    def status(self, user_email):
+        """Retourne l'état de synchronisation par sport ({sport: {"pending", "failed", "error"}})."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT sport_name, status, upserts, deletions, error FROM journal WHERE user_email = ? ORDER BY id",
+                (user_email,)
+            ).fetchall()
+        result = {}
+        for sport_name, status, upserts, deletions, error in rows:
+            sport = result.setdefault(sport_name, {"pending": 0, "failed": 0, "error": None})
+            sport[status] += len(json.loads(upserts)) + len(json.loads(deletions))
+            sport["error"] = error or sport["error"]
+        return result
+
+    def retry(self, user_email, sport_name):
+        """Remet en attente les lots en échec d'un sport."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE journal SET status = 'pending', attempts = 0, next_attempt = 0 "
+                "WHERE user_email = ? AND sport_name = ?", (user_email, sport_name)
+            )
+        self._wakeup.set()
+
+    def discard(self, user_email, sport_name):
+        """Abandonne les lots non envoyés d'un sport."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM journal WHERE user_email = ? AND sport_name = ?", (user_email, sport_name))
+
+    def flush(self, timeout=10.0):
+        """Attend que le journal ne contienne plus de lot à envoyer (True) ou l'expiration du délai."""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            with self._lock:
+                (waiting,) = self._conn.execute("SELECT count(*) FROM journal WHERE status = 'pending'").fetchone()
+            if not waiting:
+                return True
+            self._wakeup.set()
+            time.sleep(0.05)
+        return False
+
+    def _run(self):
+        while True:
+            self._wakeup.clear()
+            try:
+                with self._lock:
+                    heads = self._conn.execute(self.NEXT_QUERY).fetchall()
+                now = time.time()
+                ready = [(user_email, sport_name) for user_email, sport_name, next_attempt in heads
+                         if next_attempt <= now]
+                for user_email, sport_name in ready:
+                    self._send(user_email, sport_name)
+                self.error = None
+            except Exception as e:
+                # Erreur hors envoi (journal verrouillé ou illisible...) : le thread ne doit pas s'arrêter
+                # en silence ; l'erreur est conservée pour l'affichage et le tour relancé après retry_delay
+                self.error = str(e)
+                self._wakeup.wait(self.retry_delay)
+                continue
+            if not ready:
+                # Attente jusqu'à la prochaine relance prévue, ou jusqu'à un nouveau lot
+                delay = min((next_attempt - now for _, _, next_attempt in heads), default=None)
+                self._wakeup.wait(delay)
+
+    def _send(self, user_email, sport_name):
+        """Envoie en une écriture les lots en attente d'un sport, fusionnés dans l'ordre."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, upserts, deletions, attempts FROM journal "
+                "WHERE user_email = ? AND sport_name = ? AND status = 'pending' ORDER BY id", (user_email, sport_name)
+            ).fetchall()
+        if not rows:
+            return
+        ids = [row[0] for row in rows]
+        upserts, deletions = merge_changes((json.loads(u), json.loads(d)) for _, u, d, _ in rows)
+        placeholders = ",".join("?" * len(ids))
+
+        try:
+            # current=None : en mode JSON, le backend relit la colonne avant de la réécrire
+            self.storage.apply_changes(user_email, sport_name, upserts, deletions)
+        except Exception as e:
+            attempts = rows[0][3] + 1
+            status = "failed" if attempts >= self.max_attempts else "pending"
+            with self._lock, self._conn:
+                self._conn.execute(
+                    f"UPDATE journal SET attempts = ?, status = ?, next_attempt = ?, error = ? "
+                    f"WHERE id IN ({placeholders})",
+                    (attempts, status, time.time() + self.retry_delay * 2 ** (attempts - 1), str(e), *ids)
+                )
+            return
+
+        with self._lock, self._conn:
+            self._conn.execute(f"DELETE FROM journal WHERE id IN ({placeholders})", ids)